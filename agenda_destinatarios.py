@@ -0,0 +1,146 @@
+"""
+Agenda local de destinatários já cadastrados no portal
+
+Todo registro clicava em "Novo Destinatário" e digitava os 10 campos do modal, mesmo pra
+coordenador que já recebeu dezenas de envios. O portal guarda os destinatários salvos, então
+aqui fica registrado quem já está lá (chave CPF + CEP normalizados): nos próximos envios
+basta buscar e selecionar o destinatário salvo em vez de preencher o modal de novo.
+
+Junto com a chave vai uma assinatura do endereço - se a planilha mudou o endereço do
+coordenador (mesmo CPF e CEP), a entrada não serve e o destinatário é cadastrado de novo.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_cpf(cpf) -> str:
+    """'123.456.789-01', 12345678901 ou 12345678901.0 -> '12345678901' ('' se não for CPF/CNPJ)"""
+    if cpf is None or (isinstance(cpf, float) and cpf != cpf):
+        return ''
+    if isinstance(cpf, float) and cpf.is_integer():
+        cpf = int(cpf)
+    digitos = ''.join(c for c in str(cpf) if c.isdigit())
+    if not digitos:
+        return ''
+    # Excel come os zeros à esquerda do CPF
+    if len(digitos) < 11:
+        digitos = digitos.zfill(11)
+    return digitos if len(digitos) in (11, 14) else ''
+
+
+def chave_destinatario(dados: Dict) -> Optional[str]:
+    """'cpf:cep' do registro, ou None se faltar CPF ou CEP válido"""
+    cpf = normalizar_cpf(dados.get('CPF'))
+    cep = str(dados.get('CEP') or '').replace('-', '').replace('.', '').strip()
+    if cep.endswith('.0'):
+        cep = cep[:-2]
+    if not cpf or len(cep) != 8 or not cep.isdigit():
+        return None
+    return f"{cpf}:{cep}"
+
+
+def assinatura_endereco(valores: Dict[str, str]) -> str:
+    """Hash curto dos valores do modal (os mesmos que seriam digitados)"""
+    texto = json.dumps({campo: str(valor).strip().upper() for campo, valor in valores.items()}, sort_keys=True)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16]
+
+
+class AgendaDestinatarios:
+
+    def __init__(self, caminho: Optional[Path] = None):
+        """
+        Args:
+            caminho: Arquivo JSON da agenda (padrão: config.ARQUIVO_AGENDA_DESTINATARIOS)
+        """
+        self.caminho = Path(caminho or config.ARQUIVO_AGENDA_DESTINATARIOS)
+        self._lock = threading.Lock()
+        self._alterado = False
+        self.entradas = self._carregar()
+
+    def _carregar(self) -> dict:
+        if not self.caminho.exists():
+            return {}
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                entradas = json.load(f)
+            logger.info(f"Agenda de destinatários carregada: {len(entradas)} destinatários salvos no portal")
+            return entradas
+        except Exception as e:
+            # Agenda ilegível só custa o preenchimento completo do modal - começa do zero
+            logger.warning(f"Agenda de destinatários ilegível, ignorando: {str(e)}")
+            return {}
+
+    def consultar(self, dados: Dict, valores: Dict[str, str]) -> Optional[Dict]:
+        """
+        Entrada do destinatário se ele já está salvo no portal com o mesmo endereço
+
+        Args:
+            dados: Registro da planilha (CPF e CEP formam a chave)
+            valores: Valores do modal ({id do campo: valor}) pra conferir a assinatura
+        """
+        chave = chave_destinatario(dados)
+        if chave is None:
+            return None
+        entrada = self.entradas.get(chave)
+        if not entrada or entrada.get('assinatura') != assinatura_endereco(valores):
+            return None
+        return entrada
+
+    def registrar(self, dados: Dict, valores: Dict[str, str]):
+        """Marca o destinatário como salvo no portal (chamado depois do Salvar do modal)"""
+        chave = chave_destinatario(dados)
+        if chave is None:
+            return
+        with self._lock:
+            self.entradas[chave] = {
+                'cpf': chave.split(':')[0],
+                'nome': valores.get('nomeDestinatario', ''),
+                'assinatura': assinatura_endereco(valores),
+                'usos': 0,
+                'salvo_em': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._alterado = True
+        self.salvar()
+
+    def registrar_uso(self, dados: Dict):
+        """Conta uma seleção bem sucedida (só em memória - vai pro disco junto com o próximo salvar)"""
+        chave = chave_destinatario(dados)
+        with self._lock:
+            entrada = self.entradas.get(chave)
+            if entrada:
+                entrada['usos'] += 1
+                self._alterado = True
+
+    def remover(self, dados: Dict):
+        """Destinatário não apareceu na busca do portal (apagado lá?) - esquece a entrada"""
+        chave = chave_destinatario(dados)
+        with self._lock:
+            if self.entradas.pop(chave, None) is None:
+                return
+            self._alterado = True
+        logger.info(f"Agenda de destinatários: {chave} não está mais no portal, removido")
+        self.salvar()
+
+    def salvar(self):
+        """Grava a agenda no disco (escrita atômica, igual ao cache de seletores)"""
+        with self._lock:
+            if not self._alterado:
+                return
+            try:
+                self.caminho.parent.mkdir(parents=True, exist_ok=True)
+                temporario = self.caminho.with_suffix('.tmp')
+                with open(temporario, 'w', encoding='utf-8') as f:
+                    json.dump(self.entradas, f, ensure_ascii=False, indent=2)
+                os.replace(temporario, self.caminho)
+                self._alterado = False
+            except Exception as e:
+                logger.warning(f"Não foi possível salvar agenda de destinatários: {str(e)}")
@@ -0,0 +1,342 @@
+"""
+Cliente do Web Service SIGEP dos Correios (SOAP/XML)
+
+Alternativa ao Selenium: em vez de ~40s por registro clicando no portal, a pré-postagem vai
+direto pro web service com as credenciais do config (API_USUARIO, API_SENHA, API_CONTRATO...).
+A sessão HTTP é reaproveitada (keep-alive, pool de conexões) e os registros vão em paralelo.
+Os resultados têm o mesmo formato do CorreiosAutomator.processar_postagem, então o resto do
+sistema (checkpoint, relatórios) não precisa saber qual backend foi usado.
+
+Pra testar sem bater nos Correios: `python stub_api_correios.py` e CORREIOS_API_URL=http://localhost:8089
+"""
+import heapq
+import logging
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+import config
+from etiquetas import PoolEtiquetas
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_SIGEP = "http://cliente.bean.master.sigep.bsb.correios.com.br/"
+
+URLS_SIGEP = {
+    "homologacao": "https://apphom.correios.com.br/SigepMasterJPA/AtendeClienteService/AtendeCliente",
+    "producao": "https://apps.correios.com.br/SigepMasterJPA/AtendeClienteService/AtendeCliente",
+}
+
+
+class ErroApiCorreios(Exception):
+    """Erro devolvido pelo web service (SOAP Fault) ou resposta fora do esperado"""
+
+
+def _texto(valor) -> str:
+    """Valor da planilha vira texto limpo (NaN/None viram vazio)"""
+    if valor is None:
+        return ''
+    texto = str(valor).strip()
+    return '' if texto in ['nan', 'None', 'N/A'] else texto
+
+
+def _somente_digitos(valor) -> str:
+    texto = _texto(valor)
+    if texto.endswith('.0'):
+        texto = texto[:-2]
+    return ''.join(c for c in texto if c.isdigit())
+
+
+def _pode_ter_fechado(erro: Exception) -> bool:
+    """
+    fechaPlp que deu esse erro pode ter fechado a PLP do lado de lá?
+
+    Sem resposta depois da requisição sair (ReadTimeout, conexão caindo no meio da resposta) pode;
+    com SOAP Fault o web service respondeu e recusou, e sem conseguir conectar nada foi enviado.
+    """
+    if isinstance(erro, (ErroApiCorreios, requests.exceptions.ConnectTimeout)):
+        return False
+    if isinstance(erro, requests.exceptions.ConnectionError):
+        # Falha ao conectar chega embrulhada num MaxRetryError; queda no meio da resposta não
+        causa = erro.args[0] if erro.args else None
+        return not isinstance(getattr(causa, 'reason', causa), NewConnectionError)
+    return True
+
+
+class CorreiosApiClient:
+
+    def __init__(self, url: str = None, concorrencia: int = None, timeout: float = None,
+                 usar_pool_etiquetas: bool = None):
+        """
+        Args:
+            url: Endpoint do SIGEP (padrão: config.API_URL ou o do API_AMBIENTE)
+            concorrencia: Requisições simultâneas em processar_lote (padrão: config.API_CONCORRENCIA)
+            timeout: Timeout de cada requisição em segundos
+            usar_pool_etiquetas: Pega os códigos do PoolEtiquetas (padrão: config.USAR_POOL_ETIQUETAS)
+        """
+        self.url = url or config.API_URL or URLS_SIGEP[config.API_AMBIENTE]
+        self.concorrencia = concorrencia or config.API_CONCORRENCIA
+        self.timeout = timeout or config.TIMEOUT_PADRAO
+        if usar_pool_etiquetas is None:
+            usar_pool_etiquetas = config.USAR_POOL_ETIQUETAS
+
+        # Uma sessão só pra tudo: conexão TCP/TLS reaproveitada entre requisições (keep-alive)
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.concorrencia)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.headers.update({"Content-Type": "text/xml; charset=utf-8"})
+
+        # Etiquetas reservadas em faixa, DV calculado localmente (sem isso: 2 chamadas por registro)
+        self.etiquetas = PoolEtiquetas(self) if usar_pool_etiquetas else None
+
+        logger.info(f"Cliente API Correios: {self.url} ({config.API_AMBIENTE}, {self.concorrencia} conexões)")
+
+    def fechar(self):
+        self.sessao.close()
+
+    # ------------------------------------------------------------------ SOAP
+
+    def _chamar(self, operacao: str, parametros: List[tuple]) -> ET.Element:
+        """
+        Faz a chamada SOAP e devolve o elemento de resposta da operação
+
+        Args:
+            operacao: Nome da operação (ex: 'solicitaEtiquetas')
+            parametros: Lista de (nome, valor) - lista e não dict porque tem parâmetro repetido
+        """
+        corpo = "".join(f"<{nome}>{escape(str(valor))}</{nome}>" for nome, valor in parametros)
+        envelope = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+            f'xmlns:cli="{NAMESPACE_SIGEP}">'
+            f'<soapenv:Body><cli:{operacao}>{corpo}</cli:{operacao}></soapenv:Body>'
+            '</soapenv:Envelope>'
+        )
+        resposta = self.sessao.post(self.url, data=envelope.encode('utf-8'), timeout=self.timeout)
+
+        try:
+            raiz = ET.fromstring(resposta.content)
+        except ET.ParseError:
+            raise ErroApiCorreios(f"{operacao}: resposta inválida (HTTP {resposta.status_code})")
+
+        falha = raiz.find('.//{*}Fault')
+        if falha is not None:
+            mensagem = falha.findtext('faultstring') or falha.findtext('{*}faultstring') or 'SOAP Fault'
+            raise ErroApiCorreios(f"{operacao}: {mensagem.strip()}")
+        if resposta.status_code != 200:
+            raise ErroApiCorreios(f"{operacao}: HTTP {resposta.status_code}")
+
+        retorno = raiz.find(f'.//{{*}}{operacao}Response')
+        if retorno is None:
+            raise ErroApiCorreios(f"{operacao}: resposta sem {operacao}Response")
+        return retorno
+
+    def _credenciais(self) -> List[tuple]:
+        return [("usuario", config.API_USUARIO), ("senha", config.API_SENHA)]
+
+    # ------------------------------------------------------------- Operações
+
+    def solicitar_faixa(self, quantidade: int = 1) -> Tuple[str, int, int, str]:
+        """
+        Reserva etiquetas pro serviço configurado
+
+        Returns:
+            Tupla (prefixo, primeiro número, último número, sufixo) - ex: ('DL', 76023727, 76023826, 'BR')
+        """
+        retorno = self._chamar("solicitaEtiquetas", [
+            ("tipoDestinatario", "C"),
+            ("identificador", config.API_CNPJ),
+            ("idServico", config.API_ID_SERVICO),
+            ("qtdEtiquetas", quantidade),
+        ] + self._credenciais())
+        faixa = (retorno.findtext('return') or retorno.findtext('{*}return') or '').strip()
+        inicio, _, fim = faixa.partition(',')
+        if not inicio or not fim:
+            raise ErroApiCorreios(f"solicitaEtiquetas: faixa inesperada '{faixa}'")
+        return inicio[:2], int(inicio[2:10]), int(fim[2:10]), inicio[-2:]
+
+    def solicitar_etiquetas(self, quantidade: int = 1) -> List[str]:
+        """Etiquetas sem DV no formato do SIGEP: 'DL76023727 BR' (espaço no lugar do DV)"""
+        prefixo, primeiro, ultimo, sufixo = self.solicitar_faixa(quantidade)
+        return [f"{prefixo}{numero:08d} {sufixo}" for numero in range(primeiro, ultimo + 1)]
+
+    def gerar_digitos_verificadores(self, etiquetas: List[str]) -> List[int]:
+        """Pede o DV de cada etiqueta pro web service"""
+        retorno = self._chamar(
+            "geraDigitoVerificadorEtiquetas",
+            [("etiquetas", etiqueta) for etiqueta in etiquetas] + self._credenciais()
+        )
+        digitos = [int(el.text) for el in retorno.iter() if el.tag.split('}')[-1] == 'return']
+        if len(digitos) != len(etiquetas):
+            raise ErroApiCorreios("geraDigitoVerificadorEtiquetas: quantidade de dígitos não confere")
+        return digitos
+
+    def obter_codigo_objeto(self) -> str:
+        """Código de rastreamento completo (com DV) pro próximo objeto"""
+        if self.etiquetas is not None:
+            return self.etiquetas.proximo()
+        etiqueta = self.solicitar_etiquetas(1)[0]
+        digito = self.gerar_digitos_verificadores([etiqueta])[0]
+        return etiqueta.replace(' ', str(digito))
+
+    def _montar_xml_plp(self, dados: Dict, codigo_objeto: str) -> str:
+        """XML correioslog de uma PLP com um objeto (mesmo mapeamento de colunas do Selenium)"""
+        remetente = config.API_REMETENTE
+        numero = _texto(dados.get('NÚMERO')).upper()
+        if numero in ['', 'S/Nº', 'SN']:
+            numero = 'S/N'
+        peso_kg = _texto(dados.get('Peso (kg)')).replace(',', '.')
+        try:
+            peso_gramas = int(float(peso_kg) * 1000) if peso_kg else config.API_PESO_PADRAO_GRAMAS
+        except ValueError:
+            peso_gramas = config.API_PESO_PADRAO_GRAMAS
+
+        def campo(nome, valor):
+            return f"<{nome}><![CDATA[{_texto(valor)}]]></{nome}>"
+
+        return (
+            '<?xml version="1.0" encoding="ISO-8859-1" ?>'
+            '<correioslog>'
+            '<tipo_arquivo>Postagem</tipo_arquivo><versao_arquivo>2.3</versao_arquivo>'
+            f'<plp><id_plp/><valor_global/><mcu_unidade_postagem/><nome_unidade_postagem/>'
+            f'<cartao_postagem>{config.API_CARTAO_POSTAGEM}</cartao_postagem></plp>'
+            '<remetente>'
+            f'<numero_contrato>{config.API_CONTRATO}</numero_contrato>'
+            f'<numero_diretoria>{config.API_DIRETORIA}</numero_diretoria>'
+            f'<codigo_administrativo>{config.API_CODIGO_ADMINISTRATIVO}</codigo_administrativo>'
+            + campo('nome_remetente', remetente['nome'])
+            + campo('logradouro_remetente', remetente['logradouro'])
+            + campo('numero_remetente', remetente['numero'])
+            + campo('complemento_remetente', remetente['complemento'])
+            + campo('bairro_remetente', remetente['bairro'])
+            + f"<cep_remetente>{_somente_digitos(remetente['cep'])}</cep_remetente>"
+            + campo('cidade_remetente', remetente['cidade'])
+            + f"<uf_remetente>{remetente['uf']}</uf_remetente>"
+            + campo('telefone_remetente', remetente['telefone'])
+            + '<fax_remetente/>'
+            + campo('email_remetente', remetente['email'])
+            + '</remetente>'
+            '<forma_pagamento/>'
+            '<objeto_postal>'
+            f'<numero_etiqueta>{codigo_objeto}</numero_etiqueta>'
+            '<codigo_objeto_cliente/>'
+            f'<codigo_servico_postagem>{config.API_CODIGO_SERVICO}</codigo_servico_postagem>'
+            f'<cubagem>0,00</cubagem><peso>{peso_gramas}</peso><rt1/><rt2/>'
+            '<destinatario>'
+            + campo('nome_destinatario', dados.get('COORDENADOR MUNICIPAL'))
+            + f"<telefone_destinatario>{_somente_digitos(dados.get('TELEFONE'))}</telefone_destinatario>"
+            + '<celular_destinatario/>'
+            + campo('email_destinatario', dados.get('EMAIL'))
+            + campo('logradouro_destinatario', dados.get('LOGRADOURO'))
+            + campo('complemento_destinatario', dados.get('COMPLEMENTO'))
+            + campo('numero_end_destinatario', numero)
+            + f"<cpf_cnpj_destinatario>{_somente_digitos(dados.get('CPF'))}</cpf_cnpj_destinatario>"
+            + '</destinatario>'
+            '<nacional>'
+            + campo('bairro_destinatario', dados.get('BAIRRO'))
+            + campo('cidade_destinatario', dados.get('CIDADE'))
+            + f"<uf_destinatario>{_texto(dados.get('UF.1')).upper()}</uf_destinatario>"
+            + f"<cep_destinatario>{_somente_digitos(dados.get('CEP')).zfill(8)}</cep_destinatario>"
+            + '<codigo_usuario_postal/><centro_custo_cliente/><numero_nota_fiscal/><serie_nota_fiscal/>'
+            '<valor_nota_fiscal/><natureza_nota_fiscal/><descricao_objeto/><valor_a_cobrar>0,0</valor_a_cobrar>'
+            '</nacional>'
+            '<servico_adicional><codigo_servico_adicional>025</codigo_servico_adicional>'
+            '<valor_declarado>0,00</valor_declarado></servico_adicional>'
+            '<dimensao_objeto><tipo_objeto>002</tipo_objeto><dimensao_altura>2</dimensao_altura>'
+            '<dimensao_largura>11</dimensao_largura><dimensao_comprimento>16</dimensao_comprimento>'
+            '<dimensao_diametro>0</dimensao_diametro></dimensao_objeto>'
+            '<data_postagem_sara/><status_processamento>0</status_processamento>'
+            '<numero_comprovante_postagem/><valor_cobrado/>'
+            '</objeto_postal>'
+            '</correioslog>'
+        )
+
+    def fechar_plp(self, dados: Dict, codigo_objeto: str, xml_plp: str) -> str:
+        """Fecha a PLP (pré-lista de postagem) do objeto - é o que vale como pré-postagem"""
+        etiqueta_sem_dv = codigo_objeto[:10] + codigo_objeto[11:]
+        retorno = self._chamar("fechaPlpVariosServicos", [
+            ("xml", xml_plp),
+            ("idPlpCliente", dados.get('_linha') or 0),
+            ("cartaoPostagem", config.API_CARTAO_POSTAGEM),
+            ("listaEtiquetas", etiqueta_sem_dv),
+        ] + self._credenciais())
+        return (retorno.findtext('return') or retorno.findtext('{*}return') or '').strip()
+
+    # ------------------------------------------------------------- Registros
+
+    def processar_postagem(self, dados: Dict) -> Dict:
+        """Pré-postagem de um registro via API - mesmo formato de retorno do CorreiosAutomator"""
+        plp_enviada = False
+        try:
+            logger.info(f"[API] Processando postagem linha {dados.get('_linha', 'N/A')}")
+            codigo_objeto = self.obter_codigo_objeto()
+            # XML montado antes: erro nele (dado ruim da planilha) não saiu da máquina
+            xml_plp = self._montar_xml_plp(dados, codigo_objeto)
+            plp_enviada = True
+            numero_plp = self.fechar_plp(dados, codigo_objeto, xml_plp)
+            logger.info(f"[API] ✓ Linha {dados.get('_linha')}: {codigo_objeto} (PLP {numero_plp})")
+            return {
+                'linha': dados.get('_linha'),
+                'destinatario': dados.get('COORDENADOR MUNICIPAL'),
+                'codigo_rastreamento': codigo_objeto,
+                'plp': numero_plp,
+                'status': 'sucesso',
+                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+        except Exception as e:
+            logger.error(f"[API] Erro ao processar postagem linha {dados.get('_linha')}: {str(e)}")
+            return {
+                'linha': dados.get('_linha'),
+                'destinatario': dados.get('COORDENADOR MUNICIPAL'),
+                'erro': str(e),
+                'tipo_erro': type(e).__name__,
+                'status': 'erro',
+                'confirmacao_enviada': plp_enviada and _pode_ter_fechado(e),
+                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+
+    def processar_lote(self, registros: List[Dict], ao_concluir: Optional[Callable] = None,
+                       reenfileirar: Optional[Callable] = None) -> List[Dict]:
+        """
+        Processa vários registros com requisições simultâneas
+
+        Args:
+            registros: Registros válidos
+            ao_concluir: Callback (registro, resultado) chamado na thread principal conforme terminam
+            reenfileirar: Callback (registro, resultado, tentativa) -> segundos até a retentativa ou None
+                se o resultado é final (mesma política do pool de navegadores, ver retentativas.py)
+
+        Returns:
+            Resultados na mesma ordem de `registros`
+        """
+        resultados: List[Optional[Dict]] = [None] * len(registros)
+        # Retentativas esperando o backoff: (pronto_em, ordem, tentativa) - não seguram uma thread dormindo
+        agendadas: List[Tuple[float, int, int]] = []
+        with ThreadPoolExecutor(max_workers=self.concorrencia, thread_name_prefix="api") as executor:
+            em_andamento = {executor.submit(self.processar_postagem, registro): (ordem, 1)
+                            for ordem, registro in enumerate(registros)}
+            while em_andamento or agendadas:
+                while agendadas and agendadas[0][0] <= time.monotonic():
+                    _, ordem, tentativa = heapq.heappop(agendadas)
+                    em_andamento[executor.submit(self.processar_postagem, registros[ordem])] = (ordem, tentativa)
+                espera = max(0.0, agendadas[0][0] - time.monotonic()) if agendadas else None
+                if not em_andamento:
+                    time.sleep(espera)
+                    continue
+                prontos, _ = wait(em_andamento, timeout=espera, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    ordem, tentativa = em_andamento.pop(futuro)
+                    registro, resultado = registros[ordem], futuro.result()
+                    atraso = reenfileirar(registro, resultado, tentativa) if reenfileirar else None
+                    if atraso is not None:
+                        heapq.heappush(agendadas, (time.monotonic() + atraso, ordem, tentativa + 1))
+                        continue
+                    resultados[ordem] = resultado
+                    if ao_concluir:
+                        ao_concluir(registro, resultado)
+        return resultados
@@ -0,0 +1,297 @@
+"""
+Benchmarks do automatizador
+
+Cada subcomando mede uma parte do sistema com dados sintéticos, sem os Correios:
+
+    python benchmark.py validacao --linhas 50000 200000
+    python benchmark.py relatorio --linhas 10000 100000
+    python benchmark.py portal --registros 30 --latencia-cep 0.5   (Chrome headless + portal_simulado)
+    python benchmark.py portal --perfil completo                    (Chrome de antes, pra comparar com o enxuto)
+    python benchmark.py portal --sem-captura-rede                   (código só pela tela, como antes)
+"""
+import argparse
+import copy
+import gc
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+import config
+from agenda_destinatarios import AgendaDestinatarios
+from cache_seletores import CacheSeletores
+from correios import CorreiosAutomator
+from excel import ExcelHandler
+from portal_simulado import iniciar_portal
+from relatorio import ReportGenerator
+
+
+def gerar_registros(quantidade: int, proporcao_invalidos: float = 0.05, semente: int = 42) -> List[Dict]:
+    """Registros parecidos com os da planilha dos coordenadores (com alguns erros de propósito)"""
+    aleatorio = random.Random(semente)
+    ufs = ['DF', 'GO', 'PE', 'SP', 'BA', 'MG']
+    registros = []
+    for i in range(quantidade):
+        registro = {
+            'COORDENADOR MUNICIPAL': f"Coordenador {i}",
+            'CPF': f"{aleatorio.randint(0, 99999999999):011d}",
+            'LOGRADOURO': f"Rua {aleatorio.randint(1, 300)}",
+            'NÚMERO': aleatorio.choice([aleatorio.randint(1, 9999), 'S/N', 'S/Nº', str(aleatorio.randint(1, 999))]),
+            'COMPLEMENTO': aleatorio.choice([None, 'Casa', 'Apto 101']),
+            'BAIRRO': 'Centro',
+            'CIDADE': f"Cidade {aleatorio.randint(1, 5000)}",
+            'UF.1': aleatorio.choice(ufs),
+            'CEP': aleatorio.choice([f"{aleatorio.randint(1000000, 99999999):08d}",
+                                     f"{aleatorio.randint(10000, 99999)}-{aleatorio.randint(0, 999):03d}"]),
+            'TELEFONE': f"61{aleatorio.randint(900000000, 999999999)}",
+            'EMAIL': f"coord{i}@exemplo.com",
+        }
+        if aleatorio.random() < proporcao_invalidos:
+            defeito = aleatorio.choice(['CEP', 'NÚMERO', 'CIDADE'])
+            registro[defeito] = {'CEP': '7000', 'NÚMERO': '12A', 'CIDADE': None}[defeito]
+        registros.append(registro)
+    return registros
+
+
+def _cronometrar(funcao: Callable, repeticoes: int) -> float:
+    """Melhor tempo de `repeticoes` execuções (menos ruído que a média)"""
+    melhor = float('inf')
+    # Igual ao timeit: sem GC no meio, senão as cópias grandes dos registros dominam a medição
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            melhor = min(melhor, time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    return melhor
+
+
+def bench_validacao(args):
+    handler = ExcelHandler()
+
+    def por_registro(dados):
+        # Loop antigo do validar_dados: um registro por vez
+        validos, invalidos = [], []
+        for idx, registro in enumerate(dados, start=2):
+            erros = handler._validar_registro(registro)
+            registro['_linha'] = idx
+            if erros:
+                registro['_erros'] = erros
+                invalidos.append(registro)
+            else:
+                validos.append(registro)
+        return validos, invalidos
+
+    print(f"{'linhas':>10} {'por registro':>14} {'vetorizado':>12} {'ganho':>8}")
+    for quantidade in args.linhas:
+        base = gerar_registros(quantidade)
+        copias = [copy.deepcopy(base) for _ in range(2 * args.repeticoes)]
+        t_loop = _cronometrar(lambda: por_registro(copias.pop()), args.repeticoes)
+        t_vetor = _cronometrar(lambda: handler.validar_dados(copias.pop()), args.repeticoes)
+
+        esperado = por_registro(copy.deepcopy(base))
+        obtido = handler.validar_dados(copy.deepcopy(base))
+        if [r['_linha'] for r in esperado[1]] != [r['_linha'] for r in obtido[1]]:
+            raise AssertionError("Validação vetorizada divergiu do loop por registro")
+
+        print(f"{quantidade:>10} {t_loop:>13.3f}s {t_vetor:>11.3f}s {t_loop / t_vetor:>7.1f}x")
+
+
+def gerar_resultados(quantidade: int, semente: int = 42):
+    """Resultados de um lote: ~85% sucesso, ~10% erro e ~5% inválidos (com todas as colunas da planilha)"""
+    aleatorio = random.Random(semente)
+    sucessos, erros, invalidos = [], [], []
+    for linha, registro in enumerate(gerar_registros(quantidade, proporcao_invalidos=0, semente=semente), 2):
+        sorteio = aleatorio.random()
+        if sorteio < 0.05:
+            registro['_linha'] = linha
+            registro['_erros'] = ["CEP inválido (deve ter 8 dígitos): 7000"]
+            invalidos.append(registro)
+        elif sorteio < 0.15:
+            erros.append({'linha': linha, 'destinatario': registro['COORDENADOR MUNICIPAL'], 'status': 'erro',
+                          'erro': "Message: no such element: botão 'Salvar' do modal não encontrado",
+                          'acao_manual': False, 'timestamp': "2026-02-10 03:12:45"})
+        else:
+            sucessos.append({'linha': linha, 'destinatario': registro['COORDENADOR MUNICIPAL'], 'status': 'sucesso',
+                             'codigo_rastreamento': f"AN{aleatorio.randint(0, 99999999):08d}1BR",
+                             'timestamp': "2026-02-10 03:12:45"})
+    return sucessos, erros, invalidos
+
+
+def _texto_linha_a_linha(caminho, sucessos, erros, invalidos):
+    # TXT antigo do gerar_relatorio_texto: vários f.write pequenos por registro
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write("RESUMO\n")
+        for secao, registros in (("PROCESSAMENTOS BEM-SUCEDIDOS", sucessos), ("PROCESSAMENTOS COM ERRO", erros)):
+            f.write("\n" + "="*80 + "\n")
+            f.write(secao + "\n")
+            f.write("="*80 + "\n\n")
+            for idx, resultado in enumerate(registros, 1):
+                f.write(f"{idx}. Linha {resultado.get('linha', 'N/A')}\n")
+                f.write(f"   Destinatário: {resultado.get('destinatario', 'N/A')}\n")
+                if 'erro' in resultado:
+                    f.write(f"   Erro: {resultado.get('erro', 'Erro desconhecido')}\n")
+                else:
+                    f.write(f"   Código de Rastreamento: {resultado.get('codigo_rastreamento', 'N/A')}\n")
+                f.write("\n")
+        for idx, resultado in enumerate(invalidos, 1):
+            f.write(f"{idx}. Linha {resultado.get('_linha', 'N/A')}\n")
+            f.write(f"   Destinatário: {resultado.get('Nome Destinatário', 'N/A')}\n")
+            for erro in resultado.get('_erros', ['Erro de validação']):
+                f.write(f"   - {erro}\n")
+            f.write("\n")
+
+
+def bench_relatorio(args):
+    motor_original = config.MOTOR_RELATORIO
+    relatorios_dir_original = config.RELATORIOS_DIR
+    print(f"{'linhas':>10} {'xlsx pandas':>12} {'xlsx rápido':>12} {'ganho':>7} {'txt antigo':>11} {'txt blocos':>11} {'ganho':>7}")
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            config.RELATORIOS_DIR = Path(pasta)
+            gerador = ReportGenerator()
+            for quantidade in args.linhas:
+                sucessos, erros, invalidos = gerar_resultados(quantidade)
+                tempos = {}
+                for motor in ("pandas", "rapido"):
+                    config.MOTOR_RELATORIO = motor
+                    tempos[motor] = _cronometrar(
+                        lambda: gerador.gerar_relatorio_completo(sucessos, erros, invalidos), args.repeticoes)
+                t_txt_antigo = _cronometrar(
+                    lambda: _texto_linha_a_linha(Path(pasta) / "antigo.txt", sucessos, erros, invalidos), args.repeticoes)
+                t_txt_blocos = _cronometrar(
+                    lambda: gerador.gerar_relatorio_texto(sucessos, erros, invalidos), args.repeticoes)
+                print(f"{quantidade:>10} {tempos['pandas']:>11.2f}s {tempos['rapido']:>11.2f}s "
+                      f"{tempos['pandas'] / tempos['rapido']:>6.1f}x {t_txt_antigo:>10.2f}s {t_txt_blocos:>10.2f}s "
+                      f"{t_txt_antigo / t_txt_blocos:>6.1f}x")
+    finally:
+        config.MOTOR_RELATORIO = motor_original
+        config.RELATORIOS_DIR = relatorios_dir_original
+
+
+def _imprimir_desempenho(linhas: List[Dict], max_seletores: int = 8):
+    """Tabela do MedidorTempos.resumo(): registro e passos inteiros, só os seletores que mais gastaram"""
+    print(f"\n{'etapa':<42} {'n':>5} {'p50':>7} {'p95':>7} {'máx':>7} {'total':>8}")
+    seletores = 0
+    for linha in linhas:
+        if linha['Categoria'] == 'seletor':
+            seletores += 1
+            if seletores > max_seletores:
+                continue
+        etapa = f"{linha['Categoria']}: {linha['Etapa']}"[:42]
+        print(f"{etapa:<42} {linha['Amostras']:>5} {linha['p50 (s)']:>6.2f}s {linha['p95 (s)']:>6.2f}s "
+              f"{linha['Máx (s)']:>6.2f}s {linha['Total (s)']:>7.1f}s")
+
+
+def _memoria_chrome(driver) -> Dict[str, float]:
+    """Heap JS (MB) e nós de DOM da aba, pelo Performance.getMetrics do CDP"""
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metricas = {m['name']: m['value'] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})['metrics']}
+        return {'heap_mb': metricas.get('JSHeapUsedSize', 0) / 2 ** 20, 'nos': metricas.get('Nodes', 0)}
+    except Exception:
+        return {}
+
+
+def bench_portal(args):
+    servidor = iniciar_portal(0, args.latencia_cep, args.latencia_pagina, args.latencia_recurso)
+    base = f"http://127.0.0.1:{servidor.server_address[1]}"
+    urls_originais = (config.CORREIOS_PRE_POSTAGEM_URL, config.CORREIOS_PRE_POSTAGEM_REGISTRADOS_URL)
+    config.CORREIOS_PRE_POSTAGEM_URL = f"{base}/bem-vindo"
+    config.CORREIOS_PRE_POSTAGEM_REGISTRADOS_URL = f"{base}/prepostagem/painels/faturar/registrados"
+    originais = (config.MODO_CONTINUACAO, config.PERFIL_NAVEGADOR, config.CAPTURA_CODIGO_REDE)
+    config.MODO_CONTINUACAO = not args.sem_continuacao
+    config.PERFIL_NAVEGADOR = args.perfil
+    config.CAPTURA_CODIGO_REDE = not args.sem_captura_rede
+
+    registros = gerar_registros(args.registros, proporcao_invalidos=0)
+    # Parte dos registros repete um destinatário anterior (caminho da agenda de destinatários)
+    aleatorio = random.Random(7)
+    for i in range(len(registros)):
+        if i and aleatorio.random() < args.repetidos:
+            registros[i] = dict(registros[aleatorio.randrange(i)])
+        registros[i]['_linha'] = i + 2
+
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            # Cache e agenda temporários: cada rodada começa do zero e não suja dados/
+            automator = CorreiosAutomator(
+                headless=not args.janela, interativo=False, nivel_screenshot="desligado", perfil_persistente=False,
+                cache_seletores=CacheSeletores(Path(pasta) / "cache_seletores.json"),
+                agenda=AgendaDestinatarios(Path(pasta) / "agenda_destinatarios.json")
+            )
+            try:
+                inicio_navegador = time.perf_counter()
+                automator.iniciar_navegador()
+                automator.driver.get(config.CORREIOS_PRE_POSTAGEM_URL)
+                automator.logado = True
+                t_navegador = time.perf_counter() - inicio_navegador
+
+                inicio = time.perf_counter()
+                resultados = [automator.processar_postagem(registro) for registro in registros]
+                duracao = time.perf_counter() - inicio
+                memoria = _memoria_chrome(automator.driver)
+            finally:
+                automator.fechar_navegador()
+    finally:
+        config.CORREIOS_PRE_POSTAGEM_URL, config.CORREIOS_PRE_POSTAGEM_REGISTRADOS_URL = urls_originais
+        config.MODO_CONTINUACAO, config.PERFIL_NAVEGADOR, config.CAPTURA_CODIGO_REDE = originais
+        servidor.shutdown()
+
+    codigos = {r['codigo_rastreamento'] for r in resultados if r.get('status') == 'sucesso'}
+    emitidos = {p['codigo'] for p in servidor.estado.pre_postagens}
+    print(f"\nPerfil {args.perfil} - navegador aberto em {t_navegador:.1f}s")
+    print(f"{len(registros)} registros em {duracao:.1f}s -> {len(registros) / duracao * 60:.1f} registros/min "
+          f"({duracao / len(registros):.2f}s por registro)")
+    print(f"Códigos capturados: {len(codigos & emitidos)}/{len(emitidos)} emitidos pelo portal "
+          f"| erros: {sum(r.get('status') != 'sucesso' for r in resultados)}")
+    print(f"Origem do código: {sum(r.get('origem_codigo') == 'rede' for r in resultados)} da resposta de rede, "
+          f"{sum(r.get('origem_codigo') == 'tela' for r in resultados)} da tela "
+          f"| alertas de código: {sum(bool(r.get('alerta_codigo')) for r in resultados)}")
+    print(f"Imagens/fontes/scripts baixados do portal: {servidor.estado.recursos_servidos}"
+          + (f" | heap JS {memoria['heap_mb']:.1f} MB, {memoria['nos']:.0f} nós de DOM" if memoria else ""))
+    _imprimir_desempenho(automator.medidor.resumo())
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmarks do Automatizador de Correios")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    validacao = subparsers.add_parser("validacao", help="Validação da planilha: loop por registro x vetorizada")
+    validacao.add_argument("--linhas", type=int, nargs="+", default=[50000, 200000])
+    validacao.add_argument("--repeticoes", type=int, default=3)
+    validacao.set_defaults(funcao=bench_validacao)
+
+    relatorio = subparsers.add_parser("relatorio", help="Relatório final: pandas x xlsx linha a linha / TXT em blocos")
+    relatorio.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000])
+    relatorio.add_argument("--repeticoes", type=int, default=1)
+    relatorio.set_defaults(funcao=bench_relatorio)
+
+    portal = subparsers.add_parser("portal", help="processar_postagem no Chrome contra o portal simulado")
+    portal.add_argument("--registros", type=int, default=30)
+    portal.add_argument("--latencia-cep", type=float, default=0.5, help="Segundos da busca de CEP do portal")
+    portal.add_argument("--latencia-pagina", type=float, default=0.2, help="Segundos de atraso por página HTML")
+    portal.add_argument("--latencia-recurso", type=float, default=0.3,
+                        help="Segundos por imagem/fonte/script de analytics do portal")
+    portal.add_argument("--repetidos", type=float, default=0.3, help="Proporção de destinatários repetidos")
+    portal.add_argument("--sem-continuacao", action="store_true",
+                        help="Fluxo completo em todo registro (compara com o modo continuação)")
+    portal.add_argument("--perfil", choices=["enxuto", "completo"], default="enxuto",
+                        help="Perfil do Chrome (config.PERFIL_NAVEGADOR)")
+    portal.add_argument("--sem-captura-rede", action="store_true",
+                        help="Código só pela tela (compara com a captura pela resposta da confirmação)")
+    portal.add_argument("--janela", action="store_true", help="Mostra o Chrome (padrão: headless)")
+    portal.set_defaults(funcao=bench_portal)
+
+    return parser
+
+
+if __name__ == "__main__":
+    # Log de validação (uma linha por registro inválido) distorce a medição
+    logging.basicConfig(level=logging.ERROR)
+    args = criar_parser().parse_args()
+    args.funcao(args)
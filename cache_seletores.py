@@ -0,0 +1,108 @@
+"""
+Cache persistente de seletores
+
+Cada elemento do portal tem uma lista de 5-13 seletores de fallback, e cada seletor que
+falha custa 2-5s de WebDriverWait. Aqui fica guardado qual seletor funcionou da última vez
+pra cada elemento lógico, então ele é tentado primeiro nos próximos registros (e nas próximas
+execuções, porque vai pro disco). Se o vencedor parar de funcionar, a entrada expira sozinha.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class CacheSeletores:
+
+    def __init__(self, caminho: Optional[Path] = None, max_falhas: int = None):
+        """
+        Args:
+            caminho: Arquivo JSON do cache (padrão: config.ARQUIVO_CACHE_SELETORES)
+            max_falhas: Falhas seguidas do seletor vencedor até a entrada expirar
+        """
+        self.caminho = Path(caminho or config.ARQUIVO_CACHE_SELETORES)
+        self.max_falhas = max_falhas or config.CACHE_SELETORES_MAX_FALHAS
+        self._lock = threading.Lock()
+        self._alterado = False
+        self.entradas = self._carregar()
+
+    def _carregar(self) -> dict:
+        if not self.caminho.exists():
+            return {}
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                entradas = json.load(f)
+            logger.info(f"Cache de seletores carregado: {len(entradas)} elementos")
+            return entradas
+        except Exception as e:
+            # Cache corrompido não pode travar a automação - começa do zero
+            logger.warning(f"Cache de seletores ilegível, ignorando: {str(e)}")
+            return {}
+
+    def ordenar(self, chave: str, seletores: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Devolve os seletores com o último vencedor (se ainda estiver na lista) em primeiro lugar"""
+        entrada = self.entradas.get(chave)
+        if not entrada:
+            return list(seletores)
+        vencedor = (entrada['by'], entrada['seletor'])
+        if vencedor not in seletores:
+            # Lista de seletores mudou no código - vencedor antigo não vale mais
+            return list(seletores)
+        return [vencedor] + [s for s in seletores if s != vencedor]
+
+    def registrar_sucesso(self, chave: str, by: str, seletor: str):
+        """Marca o seletor como vencedor do elemento"""
+        with self._lock:
+            entrada = self.entradas.get(chave)
+            if entrada and entrada['by'] == by and entrada['seletor'] == seletor:
+                entrada['acertos'] += 1
+                if entrada['falhas_seguidas']:
+                    entrada['falhas_seguidas'] = 0
+                    self._alterado = True
+                return
+
+            logger.info(f"Cache de seletores: '{chave}' agora usa {by} = {seletor[:60]}")
+            self.entradas[chave] = {
+                'by': by,
+                'seletor': seletor,
+                'acertos': 1,
+                'falhas_seguidas': 0,
+                'atualizado_em': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._alterado = True
+        self.salvar()
+
+    def registrar_falha(self, chave: str, by: str, seletor: str):
+        """Conta falha do vencedor; depois de `max_falhas` seguidas a entrada expira"""
+        with self._lock:
+            entrada = self.entradas.get(chave)
+            if not entrada or entrada['by'] != by or entrada['seletor'] != seletor:
+                return
+            entrada['falhas_seguidas'] += 1
+            self._alterado = True
+            if entrada['falhas_seguidas'] < self.max_falhas:
+                return
+            logger.info(f"Cache de seletores: entrada '{chave}' expirou após {entrada['falhas_seguidas']} falhas")
+            del self.entradas[chave]
+        self.salvar()
+
+    def salvar(self):
+        """Grava o cache no disco (escrita atômica pra não corromper se o processo morrer no meio)"""
+        with self._lock:
+            if not self._alterado:
+                return
+            try:
+                self.caminho.parent.mkdir(parents=True, exist_ok=True)
+                temporario = self.caminho.with_suffix('.tmp')
+                with open(temporario, 'w', encoding='utf-8') as f:
+                    json.dump(self.entradas, f, ensure_ascii=False, indent=2)
+                os.replace(temporario, self.caminho)
+                self._alterado = False
+            except Exception as e:
+                logger.warning(f"Não foi possível salvar cache de seletores: {str(e)}")
@@ -0,0 +1,117 @@
+"""
+Screenshots com política de nível e gravação em segundo plano
+
+Cada postagem bem-sucedida tirava uns 6 screenshots síncronos (PNG no Chrome + escrita no disco)
+só pra jogar fora depois. Agora:
+  - o nível decide o que vale capturar (desligado / erros / passos / todos)
+  - a escrita no disco vai pra uma thread separada, fora do caminho do registro
+  - no nível 'erros', os passos principais ficam num buffer circular em memória e
+    só vão pro disco se o registro falhar (a evidência do que aconteceu antes do erro não se perde)
+"""
+import logging
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+from typing import List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+# Nível mínimo pra cada categoria ir direto pro disco
+NIVEIS = {'desligado': 0, 'erros': 1, 'passos': 2, 'todos': 3}
+NIVEL_CATEGORIA = {'erro': 1, 'passo': 2, 'detalhe': 3}
+
+
+class GerenciadorCapturas:
+
+    def __init__(self, nivel: str = None, tamanho_buffer: int = None, diretorio: Path = None):
+        """
+        Args:
+            nivel: 'desligado', 'erros', 'passos' ou 'todos' (padrão: config.NIVEL_SCREENSHOT)
+            tamanho_buffer: Quantos passos recentes guardar em memória no nível 'erros' (0 desliga)
+            diretorio: Onde gravar (padrão: config.LOGS_DIR)
+        """
+        nivel = nivel or config.NIVEL_SCREENSHOT
+        if nivel not in NIVEIS:
+            raise ValueError(f"Nível de screenshot inválido: {nivel} (use {', '.join(NIVEIS)})")
+        self.nivel = NIVEIS[nivel]
+        self.diretorio = Path(diretorio or config.LOGS_DIR)
+        tamanho = config.SCREENSHOT_BUFFER_TAMANHO if tamanho_buffer is None else tamanho_buffer
+        self.buffer = deque(maxlen=tamanho) if tamanho > 0 else None
+        self._fila = queue.Queue()
+        self._thread = None
+
+    def _iniciar_gravador(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._gravar_em_loop, name="gravador-screenshots", daemon=True)
+        self._thread.start()
+
+    def _gravar_em_loop(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                self._fila.task_done()
+                return
+            caminho, png = item
+            try:
+                caminho.parent.mkdir(parents=True, exist_ok=True)
+                with open(caminho, 'wb') as f:
+                    f.write(png)
+                logger.debug(f"Screenshot gravado: {caminho}")
+            except Exception as e:
+                logger.error(f"Erro ao gravar screenshot {caminho}: {str(e)}")
+            finally:
+                self._fila.task_done()
+
+    def _enfileirar(self, nome_arquivo: str, png: bytes) -> Path:
+        caminho = self.diretorio / nome_arquivo
+        self._iniciar_gravador()
+        self._fila.put((caminho, png))
+        return caminho
+
+    def capturar(self, driver, nome_arquivo: str, categoria: str = 'passo') -> Optional[Path]:
+        """
+        Captura conforme a política
+
+        Returns:
+            Caminho onde o arquivo vai ser gravado, ou None se não foi pro disco
+        """
+        if self.nivel == 0 or driver is None:
+            return None
+
+        vai_pro_disco = self.nivel >= NIVEL_CATEGORIA.get(categoria, 2)
+        vai_pro_buffer = not vai_pro_disco and categoria == 'passo' and self.buffer is not None
+        if not (vai_pro_disco or vai_pro_buffer):
+            return None
+
+        png = driver.get_screenshot_as_png()
+        if vai_pro_buffer:
+            self.buffer.append((nome_arquivo, png))
+            return None
+
+        caminho = self._enfileirar(nome_arquivo, png)
+        logger.info(f"Screenshot salvo: {caminho}")
+        return caminho
+
+    def iniciar_registro(self):
+        """Descarta o buffer do registro anterior (que terminou bem)"""
+        if self.buffer is not None:
+            self.buffer.clear()
+
+    def descarregar_buffer(self, prefixo: str) -> List[Path]:
+        """Registro falhou: grava os passos guardados em memória com o prefixo informado"""
+        if not self.buffer:
+            return []
+        caminhos = [self._enfileirar(f"{prefixo}_{nome}", png) for nome, png in self.buffer]
+        self.buffer.clear()
+        logger.info(f"{len(caminhos)} screenshots do buffer gravados para {prefixo}")
+        return caminhos
+
+    def encerrar(self):
+        """Espera a fila de gravação esvaziar e para a thread"""
+        if self._thread and self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+        self._thread = None
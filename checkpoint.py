@@ -0,0 +1,166 @@
+"""
+Journal de checkpoint pra retomar lotes longos
+
+Se o Chrome morre na linha 400 de 600, o progresso tava só na memória e rodar de novo
+postava tudo outra vez (pré-postagem duplicada!). Agora cada registro concluído vai pra um
+arquivo JSONL append-only, com fsync por linha, e na próxima execução as linhas que já deram
+certo são puladas. O hash do conteúdo da linha garante que, se a planilha foi editada,
+a linha alterada é processada de novo.
+
+Erro que aconteceu depois do Confirmar (confirmacao_enviada) também não é repetido: a pré-postagem
+pode ter sido criada no portal. A linha sai no relatório como erro pra conferir na mão; pra mandar
+de novo mesmo assim, --ignorar-checkpoint.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _normalizar_valor(valor) -> str:
+    """Mesmo valor tem que dar o mesmo texto, venha do pandas (NaN, 123.0) ou do openpyxl (None, 123)"""
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def hash_registro(registro: Dict) -> str:
+    """Hash do conteúdo da linha (ignora campos internos tipo _linha/_erros)"""
+    conteudo = {
+        str(chave): _normalizar_valor(valor)
+        for chave, valor in registro.items()
+        if not str(chave).startswith('_')
+    }
+    texto = json.dumps(conteudo, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+class JournalCheckpoint:
+
+    def __init__(self, caminho_planilha: str, tipo_processo: str = "postagem", caminho: Optional[Path] = None):
+        """
+        Args:
+            caminho_planilha: Planilha de entrada (um journal por planilha/tipo)
+            tipo_processo: 'postagem' ou 'coleta'
+            caminho: Arquivo do journal (padrão: logs/checkpoint_<tipo>_<planilha>.jsonl)
+        """
+        nome = f"checkpoint_{tipo_processo}_{Path(caminho_planilha).stem}.jsonl"
+        self.caminho = Path(caminho or config.CHECKPOINT_DIR / nome)
+        self.tipo_processo = tipo_processo
+        self._lock = threading.Lock()
+        self.concluidos: Dict[Tuple[int, str], Dict] = {}
+        # Erro depois da confirmação: não volta pro portal sem alguém conferir
+        self.bloqueados: Dict[Tuple[int, str], Dict] = {}
+        self._carregar()
+
+    def _carregar(self):
+        if not self.caminho.exists():
+            return
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for numero, linha in enumerate(f, 1):
+                try:
+                    entrada = json.loads(linha)
+                except json.JSONDecodeError:
+                    # Última linha cortada no meio do crash - ignora
+                    logger.warning(f"Checkpoint: linha {numero} ilegível em {self.caminho.name}, ignorando")
+                    continue
+                self._indexar(entrada)
+        logger.info(f"Checkpoint carregado: {len(self.concluidos)} registros já concluídos"
+                    + (f", {len(self.bloqueados)} com erro depois da confirmação" if self.bloqueados else "")
+                    + f" em {self.caminho.name}")
+
+        # Se o processo morreu no meio de uma escrita, fecha a linha cortada pra próxima entrada não grudar nela
+        with open(self.caminho, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def _indexar(self, entrada: Dict):
+        chave = (entrada.get('linha'), entrada.get('hash'))
+        if entrada.get('status') == 'sucesso':
+            self.concluidos[chave] = entrada
+            self.bloqueados.pop(chave, None)
+        elif entrada.get('confirmacao_enviada') and chave not in self.concluidos:
+            self.bloqueados[chave] = entrada
+        # Demais erros ficam no arquivo só como histórico - a linha é tentada de novo
+
+    def ja_concluido(self, registro: Dict) -> Optional[Dict]:
+        """Entrada do journal se a linha (com o mesmo conteúdo) já foi concluída com sucesso"""
+        return self.concluidos.get((registro.get('_linha'), hash_registro(registro)))
+
+    def separar_pendentes(self, registros: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Separa o que ainda falta processar do que já foi feito numa execução anterior
+
+        Returns:
+            Tupla (pendentes, resultados_retomados) - os retomados já no formato de resultado: sucesso,
+            ou erro pra conferir no portal se a execução anterior falhou depois de confirmar
+        """
+        pendentes = []
+        retomados = []
+        for registro in registros:
+            entrada = self.ja_concluido(registro)
+            if entrada is None:
+                bloqueado = self.bloqueados.get((registro.get('_linha'), hash_registro(registro)))
+                if bloqueado is None:
+                    pendentes.append(registro)
+                else:
+                    retomados.append(self._resultado_bloqueado(bloqueado))
+                continue
+            resultado = {
+                'linha': entrada.get('linha'),
+                'destinatario': entrada.get('destinatario'),
+                'status': 'sucesso',
+                'timestamp': entrada.get('timestamp'),
+                'retomado_do_checkpoint': True,
+            }
+            chave_codigo = 'codigo_coleta' if self.tipo_processo == 'coleta' else 'codigo_rastreamento'
+            resultado[chave_codigo] = entrada.get('codigo')
+            retomados.append(resultado)
+        return pendentes, retomados
+
+    @staticmethod
+    def _resultado_bloqueado(entrada: Dict) -> Dict:
+        return {
+            'linha': entrada.get('linha'),
+            'destinatario': entrada.get('destinatario'),
+            'status': 'erro',
+            'erro': (f"Execução anterior falhou depois de confirmar ({entrada.get('erro')}) - a pré-postagem pode "
+                     "existir no portal; conferir antes de repetir (--ignorar-checkpoint processa de novo)"),
+            'acao_manual': True,
+            'confirmacao_enviada': True,
+            'timestamp': entrada.get('timestamp'),
+            'retomado_do_checkpoint': True,
+        }
+
+    def registrar(self, registro: Dict, resultado: Dict):
+        """Grava o resultado final do registro e força ida pro disco (fsync) antes de seguir"""
+        entrada = {
+            'linha': registro.get('_linha'),
+            'hash': hash_registro(registro),
+            'status': resultado.get('status'),
+            'codigo': resultado.get('codigo_coleta') or resultado.get('codigo_rastreamento'),
+            'destinatario': resultado.get('destinatario'),
+            'erro': resultado.get('erro'),
+            'confirmacao_enviada': bool(resultado.get('confirmacao_enviada')),
+            'timestamp': resultado.get('timestamp') or time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.caminho, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._indexar(entrada)
@@ -12,8 +12,10 @@ RELATORIOS_DIR = BASE_DIR / "relatorios"
 LOGS_DIR = BASE_DIR / "logs"
 
 CORREIOS_LOGIN_URL = "https://empresas.correios.com.br/#/login"
-CORREIOS_PRE_POSTAGEM_URL = "https://prepostagem.correios.com.br/bem-vindo"
-CORREIOS_PRE_POSTAGEM_REGISTRADOS_URL = "https://prepostagem.correios.com.br/prepostagem/painels/faturar/registrados"
+# Base da pré-postagem - sobrescreve pra apontar pro portal simulado (ex: http://127.0.0.1:8090)
+CORREIOS_PRE_POSTAGEM_BASE = os.getenv("CORREIOS_PORTAL_URL", "https://prepostagem.correios.com.br").rstrip("/")
+CORREIOS_PRE_POSTAGEM_URL = f"{CORREIOS_PRE_POSTAGEM_BASE}/bem-vindo"
+CORREIOS_PRE_POSTAGEM_REGISTRADOS_URL = f"{CORREIOS_PRE_POSTAGEM_BASE}/prepostagem/painels/faturar/registrados"
 CORREIOS_POSTAGEM_URL = "https://empresas.correios.com.br/#/postagem"
 CORREIOS_COLETA_URL = "https://empresas.correios.com.br/#/coleta"
 
@@ -31,14 +33,148 @@ API_CODIGO_SERVICO = os.getenv("CORREIOS_API_SERVICO", "04170")  # 04170=SEDEX,
 
 # Ambiente: 'producao' ou 'homologacao'
 API_AMBIENTE = os.getenv("CORREIOS_API_AMBIENTE", "homologacao")
+API_URL = os.getenv("CORREIOS_API_URL", "")  # sobrescreve o endpoint do ambiente (ex: http://localhost:8089 do stub)
+API_CNPJ = os.getenv("CORREIOS_API_CNPJ", "34028316000103")
+API_ID_SERVICO = os.getenv("CORREIOS_API_ID_SERVICO", "124849")  # id interno do SIGEP pro API_CODIGO_SERVICO
+API_DIRETORIA = os.getenv("CORREIOS_API_DIRETORIA", "10")
+API_CODIGO_ADMINISTRATIVO = os.getenv("CORREIOS_API_CODIGO_ADMINISTRATIVO", "17000190")
+API_CONCORRENCIA = 8  # requisições simultâneas no backend API
+API_PESO_PADRAO_GRAMAS = 300  # quando a planilha não informa o peso
+# Etiquetas reservadas em faixa (uma chamada) e entregues localmente com DV calculado aqui
+USAR_POOL_ETIQUETAS = True
+ETIQUETAS_RESERVA_LOTE = 200
+ARQUIVO_POOL_ETIQUETAS = DADOS_DIR / "pool_etiquetas.json"
+# Remetente vai no XML da PLP (no portal ele é escolhido na tela)
+API_REMETENTE = {
+    "nome": os.getenv("CORREIOS_REMETENTE_NOME", "CEBRASPE"),
+    "logradouro": os.getenv("CORREIOS_REMETENTE_LOGRADOURO", ""),
+    "numero": os.getenv("CORREIOS_REMETENTE_NUMERO", ""),
+    "complemento": os.getenv("CORREIOS_REMETENTE_COMPLEMENTO", ""),
+    "bairro": os.getenv("CORREIOS_REMETENTE_BAIRRO", ""),
+    "cep": os.getenv("CORREIOS_REMETENTE_CEP", ""),
+    "cidade": os.getenv("CORREIOS_REMETENTE_CIDADE", ""),
+    "uf": os.getenv("CORREIOS_REMETENTE_UF", ""),
+    "telefone": os.getenv("CORREIOS_REMETENTE_TELEFONE", ""),
+    "email": os.getenv("CORREIOS_REMETENTE_EMAIL", ""),
+}
+
+# 'selenium' (portal, login manual) ou 'api' (web service SIGEP, sem navegador - só postagem)
+BACKEND = os.getenv("CORREIOS_BACKEND", "selenium")
 
 # Esses timeouts foram calibrados depois de MUITO teste com o site dos Correios
 HEADLESS_MODE = False
 TIMEOUT_PADRAO = 30  # segundos
 TEMPO_ESPERA_ELEMENTO = 10
 
+# Perfil do Chrome: 'enxuto' corta o peso de cada navegação (page load 'eager', headless novo,
+# sem imagens, URLs abaixo bloqueadas via CDP); 'completo' é o Chrome padrão de antes
+PERFIL_NAVEGADOR = os.getenv("CORREIOS_PERFIL_NAVEGADOR", "enxuto")
+# Perfil do Chrome guardado no projeto: a sessão do portal sobrevive entre execuções e o login manual
+# só é pedido quando ela expira. Só o navegador principal usa (workers do pool recebem os cookies dele)
+USAR_PERFIL_PERSISTENTE = True
+PERFIL_CHROME_DIR = BASE_DIR / "perfil_chrome"
+# Padrões do Network.setBlockedURLs (* é curinga). Nada de recaptcha/gstatic: o login manual é nesse Chrome
+URLS_BLOQUEADAS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*hotjar.com*",
+    "*facebook.net*", "*clarity.ms*", "*/analytics.js*",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm",
+]
+# Imagens só são bloqueadas depois do login (a tela de login pode ter captcha); no headless nem carregam
+URLS_IMAGENS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico"]
+
+# Orçamento máximo (s) de cada espera por condição - se o portal responder antes, segue na hora.
+# Os valores são mais ou menos os sleeps antigos com folga, já que agora só estouram quando o site trava.
+ORCAMENTO_ESPERAS = {
+    "pagina_estavel": 8,     # navegação completa (antes: 3s + 2s fixos)
+    "navegacao": 6,          # troca de painel depois de clicar em link
+    "nova_pre_postagem": 5,  # formulário novo abrir
+    "remetente": 4,          # busca do remetente
+    "modal_abrir": 3,        # modal de destinatário aparecer
+    "autofill_cep": 4,       # portal preencher endereço depois do CEP (antes: 3s fixos)
+    "modal_fechar": 4,       # modal sumir depois do Salvar (antes: 2s fixos)
+    "busca_destinatario": 3, # busca na lista de destinatários salvos do portal
+    "confirmacao": 10,       # processamento depois de Confirmar (antes: 5s fixos)
+    "login": 8,              # página estabilizar depois do login (antes: 5s fixos)
+}
+QUIETUDE_ESPERA = 0.3  # tempo sem XHR/mutação pra considerar a página "parada"
+INTERVALO_CONSULTA_ESPERA = 0.1
+
+# Código de rastreamento lido do JSON de resposta da confirmação (log de performance do Chrome + CDP).
+# A busca na tela (seletores) continua como plano B
+CAPTURA_CODIGO_REDE = True
+TEMPO_CAPTURA_CODIGO_REDE = 5  # orçamento (s) pra resposta da confirmação chegar
+TEMPO_CAPTURA_CODIGO_TELA = 3  # sem código na resposta: orçamento (s) pro código válido aparecer na tela
+URLS_RESPOSTA_CODIGO = ["prepostagem", "pre-postagem", "pre_postagem", "objeto", "etiqueta", "rastreamento"]
+CHAVES_CODIGO_OBJETO = ["codigoObjeto", "codigoRastreamento", "codigo_objeto", "codigoRastreio",
+                        "numeroEtiqueta", "etiqueta", "objeto"]
+
+# Cache do seletor vencedor de cada elemento (tentado primeiro nos próximos registros/execuções)
+ARQUIVO_CACHE_SELETORES = DADOS_DIR / "cache_seletores.json"
+CACHE_SELETORES_MAX_FALHAS = 2  # falhas seguidas do vencedor até a entrada expirar
+
+# Preenche o modal de destinatário com um único execute_script (campo a campo vira fallback)
+PREENCHIMENTO_JS = True
+
+# Agenda de destinatários já salvos no portal (CPF + CEP): repetido é selecionado em vez de digitado no modal
+USAR_AGENDA_DESTINATARIOS = True
+ARQUIVO_AGENDA_DESTINATARIOS = DADOS_DIR / "agenda_destinatarios.json"
+
+# Depois de confirmar, abre a próxima pré-postagem da própria tela (pula bem-vindo/registrados/remetente)
+MODO_CONTINUACAO = True
+MAX_FALHAS_CONTINUACAO = 3  # continuações seguidas sem reconhecer o formulário até desligar o modo
+
+# Pool de navegadores: depois do login manual os cookies vão pros outros Chromes.
+# Não passa de MAX_NAVEGADORES_PARALELOS porque o portal derruba a sessão com muita requisição junta.
+NAVEGADORES_PARALELOS = 1
+MAX_NAVEGADORES_PARALELOS = 4
+INTERVALO_INICIO_WORKERS = 2  # segundos entre a abertura de cada navegador extra
+HEADLESS_WORKERS = True
+
+# Modo não interativo (lote sem ninguém na frente do terminal)
+TEMPO_MAXIMO_LOGIN = 600  # segundos esperando o login manual no navegador
+# Ritmo adaptativo no lugar da pausa fixa entre registros (o portal derruba sessão com requisição muito rápida).
+# Limite de registros iniciados por minuto, somando todos os navegadores - ver ritmo.py
+# Começa onde a pausa fixa de 1s deixava (um início por segundo - com registro de vários segundos quase nunca
+# segura ninguém): quem puxa pra baixo é o recuo multiplicativo quando o portal reclama
+RITMO_INICIAL = 60
+RITMO_MINIMO = 1
+RITMO_MAXIMO = 120
+RITMO_INCREMENTO = 2  # registros/min a mais a cada registro saudável (volta do recuo em poucas dezenas de registros)
+RITMO_FATOR_RECUO = 0.5  # taxa multiplicada por isso em falha transitória/lentidão (ao quadrado em sessão derrubada)
+RITMO_LIMIAR_LATENCIA = 2.0  # registro 2x mais lento que a média recente = portal sofrendo
+MAX_REENFILEIRAMENTOS_ACAO_MANUAL = 1  # quantas vezes falha de interface (seletor/ação manual) volta pro fim da fila
+MAX_RELOGINS_SEM_PROGRESSO = 2  # sessão caindo de novo sem nenhum registro concluído desde o último login = desiste
+
+# Screenshots: 'desligado', 'erros', 'passos' ou 'todos'. No nível 'erros' os últimos passos ficam
+# em memória e só vão pro disco se o registro falhar.
+NIVEL_SCREENSHOT = "erros"
+SCREENSHOT_BUFFER_TAMANHO = 6
+
+# Motor do Excel de relatório: 'rapido' (xlsxwriter constant_memory, linha a linha) ou 'pandas' (DataFrame por aba)
+MOTOR_RELATORIO = "rapido"
+BLOCO_RELATORIO_TEXTO = 2000  # registros formatados por escrita no TXT
+
+# Relatório incremental: Excel parcial no máximo a cada N segundos (0 = só o relatório final).
+# Cada parcial reescreve o workbook inteiro, então o intervalo também cresce com o tempo que ele levou
+# (RELATORIO_PARCIAL_FATOR x a última geração) - em lote enorme o parcial nunca vira o gargalo
+RELATORIO_PARCIAL_INTERVALO = 60
+RELATORIO_PARCIAL_FATOR = 10
+
+# Journal de checkpoint: linhas concluídas são puladas se o lote for rodado de novo
+USAR_CHECKPOINT = True
+CHECKPOINT_DIR = LOGS_DIR
+
 ARQUIVO_ENTRADA = "dados_postagem.xlsx"
 ABA_PRINCIPAL = 0
+# Lê a planilha linha a linha (openpyxl read-only) em vez de carregar tudo com pandas
+LEITURA_STREAMING = True
+TAMANHO_LOTE_VALIDACAO = 5000  # linhas validadas de uma vez (vetorizado) durante a leitura em streaming
+
+# Índice local de CEP (python indice_cep.py construir faixas.csv). Sem os arquivos, tudo segue sem ele.
+USAR_INDICE_CEP = True
+ARQUIVO_INDICE_CEP = DADOS_DIR / "indice_cep.npy"
+ARQUIVO_LOCALIDADES_CEP = DADOS_DIR / "indice_cep_localidades.json"
 
 # Colunas esperadas na planilha de entrada (mapeamento da Pasta3.xlsx)
 COLUNAS_POSTAGEM = {
@@ -72,6 +208,7 @@ COLUNAS_COLETA = {
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-# Sistema de retry porque o site dos Correios às vezes dá pau do nada
-MAX_TENTATIVAS = 3
-TEMPO_ENTRE_TENTATIVAS = 5
+# Sistema de retry porque o site dos Correios às vezes dá pau do nada (ver retentativas.py)
+MAX_TENTATIVAS = 3  # tentativas no total pra falha transitória (timeout, 5xx, conexão)
+TEMPO_ENTRE_TENTATIVAS = 5  # espera antes da 2ª tentativa, dobra a cada uma (com jitter)
+TEMPO_MAXIMO_ENTRE_TENTATIVAS = 60
@@ -6,9 +6,11 @@ então tem que ter seletores múltiplos pra cada elemento e bastante screenshot
 """
 import logging
 import time
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
@@ -16,18 +18,195 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 import config
+from esperas import Esperas, CAMPOS_AUTOFILL_CEP
+from cache_seletores import CacheSeletores
+from capturas import GerenciadorCapturas
+from agenda_destinatarios import AgendaDestinatarios, chave_destinatario
+from metricas import MedidorTempos
+from rede import EscutaRespostas, habilitar_log_rede
+from indice_cep import carregar_indice_cep
+from etiquetas import extrair_codigos, validar_codigo_objeto
 
 logger = logging.getLogger(__name__)
 
+# Número vazio/sem número vira 'S/N' no portal (NONE/NAN: célula vazia que virou texto em algum lugar)
+SEM_NUMERO = ['S/Nº', 'S/N', 'SN', '', 'NAN', 'NONE']
+
+
+def _texto_celula(valor) -> str:
+    """Célula da planilha como texto limpo: None (leitura em streaming) e NaN (pandas) viram ''"""
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return ''
+    return str(valor).strip()
+
+
+class AcaoManualNecessaria(Exception):
+    """Fluxo travou num ponto que precisa de clique humano, mas a execução é não interativa"""
+
+
+class SessaoExpirada(Exception):
+    """Portal mandou o navegador pro login no meio do lote - o registro não tem culpa, volta pra fila"""
+
+
+# Campos do modal de destinatário que o portal preenche sozinho pela busca do CEP
+CAMPOS_ENDERECO_DESTINATARIO = ['logradouroDestinatario', 'bairroDestinatario', 'cidadeDestinatario', 'ufDestinatario']
+
+# Preenche o modal inteiro numa chamada só. Usa o setter nativo de value + eventos input/change/blur
+# porque o framework do portal só enxerga o valor se receber os eventos (atribuir .value não basta).
+# cidade/UF vêm com disabled="true" no HTML, então são habilitados antes.
+# Com somenteVazios=true só mexe no que está vazio (repasse depois da busca do CEP).
+SCRIPT_PREENCHER_DESTINATARIO = """
+var valores = arguments[0], somenteVazios = arguments[1], ordem = arguments[2];
+var setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+var localizar = function (id) {
+    return document.getElementById(id) || document.querySelector('[name="' + id + '"]');
+};
+var resultado = {};
+ordem.forEach(function (id) {
+    var campo = localizar(id);
+    if (!campo) { resultado[id] = null; return; }
+    if (valores.hasOwnProperty(id) && !(somenteVazios && campo.value.trim())) {
+        campo.removeAttribute('disabled');
+        campo.disabled = false;
+        campo.focus();
+        setter.call(campo, valores[id]);
+        ['input', 'change', 'keyup', 'blur'].forEach(function (tipo) {
+            campo.dispatchEvent(new Event(tipo, {bubbles: true}));
+        });
+    }
+    resultado[id] = campo.value;
+});
+return resultado;
+"""
+
+# Botão "Nova pré-postagem" (painel de registrados e, no modo continuação, tela de confirmação)
+SELETORES_NOVA_PRE_POSTAGEM = [
+    # Texto no botão
+    (By.XPATH, "//button[contains(text(), 'Nova pré-postagem')]"),
+    (By.XPATH, "//button[contains(., 'Nova')]"),
+    (By.XPATH, "//a[contains(text(), 'Nova pré-postagem')]"),
+    (By.XPATH, "//a[contains(., 'Nova')]"),
+    # Span ou div dentro de botão
+    (By.XPATH, "//button//span[contains(text(), 'Nova')]"),
+    (By.XPATH, "//button//div[contains(text(), 'Nova')]"),
+    # Classes comuns
+    (By.CSS_SELECTOR, "button[class*='nova']"),
+    (By.CSS_SELECTOR, "button[class*='novo']"),
+    (By.CSS_SELECTOR, "a[class*='nova']"),
+    (By.CSS_SELECTOR, "[class*='btn-nova']"),
+    # Ícone de adicionar/plus
+    (By.XPATH, "//button[contains(@class, 'add') or contains(@class, 'plus')]"),
+    (By.XPATH, "//button[@title='Nova pré-postagem' or @aria-label='Nova pré-postagem']"),
+]
+
+# Botão "Novo Destinatário" do formulário (também serve pra reconhecer o formulário aberto na continuação)
+SELETORES_NOVO_DESTINATARIO = [
+    # Texto no botão/link
+    (By.XPATH, "//button[contains(text(), 'Novo Destinatário')]"),
+    (By.XPATH, "//a[contains(text(), 'Novo Destinatário')]"),
+    (By.XPATH, "//button[contains(., 'Novo Destinatário')]"),
+    (By.XPATH, "//a[contains(., 'Novo Destinatário')]"),
+    # Variações do texto
+    (By.XPATH, "//button[contains(text(), 'Novo destinatário')]"),
+    (By.XPATH, "//a[contains(text(), 'Novo destinatário')]"),
+    # Classes comuns
+    (By.CSS_SELECTOR, "button[class*='novo-destinatario']"),
+    (By.CSS_SELECTOR, "a[class*='novo-destinatario']"),
+    # Por título/aria-label
+    (By.XPATH, "//button[@title='Novo Destinatário' or @aria-label='Novo Destinatário']"),
+    (By.XPATH, "//a[@title='Novo Destinatário' or @aria-label='Novo Destinatário']"),
+]
+
+# Onde o código de rastreamento costuma aparecer na tela de confirmação (ordem = prioridade)
+SELETORES_CODIGO = [
+    (By.CLASS_NAME, "codigo-rastreamento"),
+    (By.CLASS_NAME, "codigo-objeto"),
+    (By.CLASS_NAME, "tracking-code"),
+    (By.XPATH, "//span[contains(@class, 'codigo')]"),
+    (By.XPATH, "//div[contains(text(), 'Código')]//following-sibling::div"),
+    (By.XPATH, "//label[contains(text(), 'Código')]//following-sibling::*"),
+    (By.XPATH, "//span[contains(text(), 'Código')]//parent::div//following-sibling::*"),
+    (By.XPATH, "//*[contains(text(), 'Rastreamento')]//following-sibling::*"),
+    (By.CSS_SELECTOR, "[class*='tracking'], [class*='rastreamento'], [class*='codigo']"),
+    (By.XPATH, "//input[@readonly and contains(@value, 'AN')]"),
+    (By.XPATH, "//td[contains(text(), 'AN') or contains(text(), 'BR')]"),
+    (By.XPATH, "//strong[contains(text(), 'AN') or contains(text(), 'BR')]"),
+    (By.XPATH, "//p[contains(text(), 'AN') or contains(text(), 'BR')]"),
+]
+
+# Texto (ou value) de tudo que bate com os SELETORES_CODIGO, na ordem, e por último o texto da página
+SCRIPT_CANDIDATOS_CODIGO = """
+var seletores = arguments[0], textos = [], vistos = new Set();
+function guardar(el) {
+    if (vistos.has(el)) { return; }
+    vistos.add(el);
+    var texto = ((el.innerText || '').trim() || el.value || '').slice(0, 300);
+    if (texto) { textos.push(texto); }
+}
+seletores.forEach(function (par) {
+    var tipo = par[0], valor = par[1];
+    try {
+        if (tipo === 'xpath') {
+            var r = document.evaluate(valor, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < r.snapshotLength; i++) { guardar(r.snapshotItem(i)); }
+        } else {
+            var css = tipo === 'class name' ? '.' + valor : valor;
+            document.querySelectorAll(css).forEach(guardar);
+        }
+    } catch (e) { /* seletor que o navegador não entende: só pula */ }
+});
+if (document.body) { textos.push(document.body.innerText || ''); }
+return textos;
+"""
+
 
 class CorreiosAutomator:
     
-    def __init__(self, headless: bool = None):
-        """Inicializa o automatizador"""
+    def __init__(self, headless: bool = None, cache_seletores: CacheSeletores = None, interativo: bool = True,
+                 nivel_screenshot: str = None, agenda: AgendaDestinatarios = None, medidor: MedidorTempos = None,
+                 perfil_persistente: bool = None):
+        """
+        Inicializa o automatizador
+        
+        Args:
+            headless: Roda o Chrome sem janela (padrão: config.HEADLESS_MODE)
+            cache_seletores: Cache compartilhado (pool paralelo); se None, cria um próprio
+            interativo: False = nunca chama input(); ação manual vira AcaoManualNecessaria
+            nivel_screenshot: 'desligado', 'erros', 'passos' ou 'todos' (padrão: config.NIVEL_SCREENSHOT)
+            agenda: Agenda de destinatários compartilhada (pool paralelo); se None, cria uma própria
+            medidor: Medidor de tempos compartilhado (pool paralelo); se None, cria um próprio
+            perfil_persistente: Usa o perfil do Chrome em config.PERFIL_CHROME_DIR (padrão: config.USAR_PERFIL_PERSISTENTE)
+        """
         self.headless = headless if headless is not None else config.HEADLESS_MODE
+        self.interativo = interativo
+        # No pool de navegadores vira "workerN_": sem isso os Chromes sobrescrevem os screenshots uns dos outros
+        self.prefixo_capturas = ''
+        self.perfil_persistente = perfil_persistente if perfil_persistente is not None else config.USAR_PERFIL_PERSISTENTE
         self.driver = None
         self.wait = None
+        self.esperas = None
         self.logado = False
+        self.cache_seletores = cache_seletores or CacheSeletores()
+        self.capturas = GerenciadorCapturas(nivel_screenshot)
+        self.indice_cep = carregar_indice_cep()
+        if agenda is None and config.USAR_AGENDA_DESTINATARIOS:
+            agenda = AgendaDestinatarios()
+        self.agenda = agenda
+        self.medidor = medidor or MedidorTempos()
+        # Modo continuação: registro anterior terminou na confirmação e a próxima pode abrir dali
+        self._continuacao_pronta = False
+        self._nova_pela_tela_atual = True
+        # Continuações seguidas que não deram certo - em config.MAX_FALHAS_CONTINUACAO desliga o modo
+        self._falhas_continuacao = 0
+        # Confirmar já clicado no registro atual (falha depois disso não pode ser refeita às cegas)
+        self._confirmacao_enviada = False
+        # Registro atual parou esperando o ENTER do usuário (duração não diz nada sobre o portal)
+        self._espera_manual = False
+        # Portal sem campo de busca de destinatários salvos: depois da primeira sondagem nem procura mais
+        self._busca_destinatario_indisponivel = False
+        # Respostas de rede do portal (código de rastreamento direto do JSON da confirmação)
+        self.escuta: Optional[EscutaRespostas] = None
+        self._codigo_rede: Optional[str] = None
         
     def iniciar_navegador(self):
         """Inicializa o navegador Chrome"""
@@ -35,8 +214,19 @@ class CorreiosAutomator:
             logger.info("Inicializando navegador...")
             
             chrome_options = Options()
+            enxuto = config.PERFIL_NAVEGADOR == "enxuto"
             if self.headless:
-                chrome_options.add_argument("--headless")
+                chrome_options.add_argument("--headless=new" if enxuto else "--headless")
+            if enxuto:
+                # Selenium devolve o controle no DOMContentLoaded - quem precisa da página pronta
+                # já espera pelas Esperas (readyState + rede/DOM quietos)
+                chrome_options.page_load_strategy = 'eager'
+                for argumento in ("--disable-background-networking", "--disable-component-update",
+                                  "--disable-default-apps", "--disable-sync", "--no-first-run", "--mute-audio"):
+                    chrome_options.add_argument(argumento)
+                if self.headless:
+                    # Ninguém olha a tela do headless: imagem nem é baixada nem decodificada
+                    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
             
             # Essas flags são necessárias pra evitar que o site detecte que é automação
             chrome_options.add_argument("--no-sandbox")
@@ -70,15 +260,56 @@ class CorreiosAutomator:
             chrome_options.add_argument("--disable-infobars")
             chrome_options.add_argument("--disable-extensions")
             
-            self.driver = webdriver.Chrome(options=chrome_options)
+            if config.CAPTURA_CODIGO_REDE:
+                habilitar_log_rede(chrome_options)
+            
+            # Perfil persistente: cookies da sessão do portal ficam em disco de uma execução pra outra
+            argumento_perfil = f"--user-data-dir={config.PERFIL_CHROME_DIR.resolve()}"
+            if self.perfil_persistente:
+                config.PERFIL_CHROME_DIR.mkdir(parents=True, exist_ok=True)
+                chrome_options.add_argument(argumento_perfil)
+            
+            try:
+                self.driver = webdriver.Chrome(options=chrome_options)
+            except Exception as e:
+                if not self.perfil_persistente:
+                    raise
+                # Perfil preso por outro Chrome (execução anterior ainda aberta?) - segue com perfil temporário
+                logger.warning(f"Perfil do Chrome em uso/ilegível, abrindo sem ele (login manual): {str(e)[:120]}")
+                chrome_options.arguments.remove(argumento_perfil)
+                self.perfil_persistente = False
+                self.driver = webdriver.Chrome(options=chrome_options)
             self.wait = WebDriverWait(self.driver, config.TEMPO_ESPERA_ELEMENTO)
+            self.esperas = Esperas(self.driver)
+            self.esperas.instalar_monitor()
+            self.aplicar_bloqueios(imagens=False)
+            if config.CAPTURA_CODIGO_REDE:
+                self.escuta = EscutaRespostas(self.driver)
             
-            logger.info("Navegador iniciado com sucesso")
+            logger.info(f"Navegador iniciado com sucesso (perfil {config.PERFIL_NAVEGADOR})")
             
         except Exception as e:
             logger.error(f"Erro ao iniciar navegador: {str(e)}")
             raise
     
+    def aplicar_bloqueios(self, imagens: bool):
+        """
+        Perfil enxuto: bloqueia analytics, fontes e mídia (config.URLS_BLOQUEADAS) via CDP
+        
+        Args:
+            imagens: Bloqueia também as imagens (config.URLS_IMAGENS) - só depois do login
+        """
+        if config.PERFIL_NAVEGADOR != "enxuto":
+            return
+        padroes = list(config.URLS_BLOQUEADAS) + (list(config.URLS_IMAGENS) if imagens else [])
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": padroes})
+            logger.debug(f"{len(padroes)} padrões de URL bloqueados")
+        except Exception as e:
+            # Sem CDP o navegador só fica mais pesado, a automação segue igual
+            logger.debug(f"Bloqueio de URLs via CDP indisponível: {str(e)[:80]}")
+    
     def fechar_navegador(self):
         """Fecha o navegador"""
         if self.driver:
@@ -86,6 +317,59 @@ class CorreiosAutomator:
             self.driver.quit()
             self.driver = None
             self.logado = False
+        self.capturas.encerrar()
+        self.cache_seletores.salvar()
+        if self.agenda is not None:
+            self.agenda.salvar()
+    
+    def _localizar(self, chave: str, seletores: list, condicao: Callable = EC.presence_of_element_located,
+                   timeout: float = 5, aceitar: Callable = None, checar_sessao: bool = True,
+                   acao: Callable = None):
+        """
+        Percorre os seletores de um elemento lógico, começando pelo último que funcionou
+        
+        Args:
+            chave: Nome lógico do elemento no cache (ex: 'botao_salvar')
+            seletores: Lista de (By, seletor) na ordem de preferência do código
+            condicao: Expected condition do Selenium usada em cada tentativa
+            timeout: Espera máxima por seletor
+            aceitar: Filtro opcional - se devolver False o seletor conta como falha
+            checar_sessao: Confere a sessão a cada falha (False pra sondagem de elemento opcional)
+            acao: O que fazer com o elemento (clicar, digitar). Se der erro, passa pro próximo seletor
+                  como antes - elemento achado mas que não aceita o clique não é acerto
+            
+        Returns:
+            Tupla (elemento, idx da tentativa) ou (None, None) se nenhum serviu
+        """
+        for idx, (by, selector) in enumerate(self.cache_seletores.ordenar(chave, seletores), 1):
+            inicio = time.perf_counter()
+            try:
+                logger.debug(f"Tentativa {idx} para '{chave}': {by} = {selector[:80]}")
+                elemento = WebDriverWait(self.driver, timeout).until(condicao((by, selector)))
+                if aceitar and not aceitar(elemento):
+                    raise Exception("elemento encontrado mas rejeitado pelo filtro")
+                if acao:
+                    acao(elemento)
+                self.medidor.registrar('seletor', f"{chave}: acerto", time.perf_counter() - inicio)
+                self.cache_seletores.registrar_sucesso(chave, by, selector)
+                return elemento, idx
+            except Exception as e:
+                logger.debug(f"Tentativa {idx} falhou para '{chave}': {str(e)[:80]}")
+                # Seletor não achou nada: se a página virou o login, para aqui em vez de gastar o timeout
+                # de todos os outros seletores (e sem punir o seletor no cache)
+                if checar_sessao:
+                    self.verificar_sessao()
+                self.medidor.registrar('seletor', f"{chave}: falha", time.perf_counter() - inicio)
+                self.cache_seletores.registrar_falha(chave, by, selector)
+        return None, None
+    
+    def _clicar(self, elemento):
+        """Rola até o elemento e clica (clique via JS se o normal for interceptado)"""
+        self.driver.execute_script("arguments[0].scrollIntoView(true);", elemento)
+        try:
+            elemento.click()
+        except:
+            self.driver.execute_script("arguments[0].click();", elemento)
     
     def aguardar_elemento(self, by: By, valor: str, timeout: int = None, descricao: str = "") -> object:
         """Aguarda um elemento aparecer na página com mensagem de debug"""
@@ -104,17 +388,115 @@ class CorreiosAutomator:
             self.tirar_screenshot(f"erro_timeout_{descricao or 'elemento'}.png")
             raise Exception(f"Elemento não encontrado: {msg}")
     
+    def _solicitar_acao_manual(self, motivo: str, instrucoes: list, prompt: str):
+        """
+        Pede pro usuário fazer o passo no navegador e apertar ENTER
+        
+        Em modo não interativo não tem ninguém pra apertar ENTER: levanta AcaoManualNecessaria
+        e o registro volta pra fila (ou vira erro) em vez de travar o lote inteiro.
+        """
+        if not self.interativo:
+            raise AcaoManualNecessaria(f"Ação manual necessária: {motivo}")
+        
+        print("\n" + "="*80)
+        print("⚠️  AÇÃO MANUAL NECESSÁRIA")
+        print("="*80)
+        print()
+        for linha in instrucoes:
+            print(linha)
+        print(f"\n⏸️  {prompt}")
+        print("="*80 + "\n")
+        self._espera_manual = True
+        input()
+    
+    @staticmethod
+    def _na_pre_postagem(url: str) -> bool:
+        """URL é do portal de pré-postagem configurado (o real ou o simulado)"""
+        return urlparse(config.CORREIOS_PRE_POSTAGEM_URL).netloc.lower() in url.lower()
+    
+    @staticmethod
+    def _pagina_de_login(url: str, pre_postagem: bool = True) -> bool:
+        """
+        URL é a tela de login
+        
+        No fluxo da pré-postagem, cair no domínio do CORREIOS_LOGIN_URL (empresas.correios.com.br)
+        também é sessão perdida; a coleta roda nesse domínio, então lá só vale o caminho de login.
+        """
+        url = url.lower()
+        if "login" in url:
+            return True
+        return pre_postagem and urlparse(config.CORREIOS_LOGIN_URL).netloc.lower() in url
+    
+    def verificar_sessao(self, pre_postagem: bool = True):
+        """
+        Levanta SessaoExpirada se o portal redirecionou o navegador pro login
+        
+        Só lê a URL atual (uma chamada ao driver), então dá pra rodar entre registros, depois de
+        cada navegação do fluxo e a cada seletor que falha.
+        """
+        if self.driver is None or not self.logado:
+            return
+        try:
+            url = self.driver.current_url
+        except Exception:
+            return
+        if self._pagina_de_login(url, pre_postagem):
+            self.logado = False
+            logger.warning(f"Sessão do portal expirou - navegador redirecionado para {url[:100]}")
+            raise SessaoExpirada(f"Sessão do portal expirou (redirecionado para {url[:100]})")
+    
+    def _aguardar_login_sem_interacao(self) -> bool:
+        """
+        Modo não interativo: espera (sem input) o navegador chegar logado na pré-postagem
+        
+        Serve pra deixar rodando e fazer o login quando der; desiste depois de config.TEMPO_MAXIMO_LOGIN.
+        """
+        logger.info(f"Aguardando login no navegador (até {config.TEMPO_MAXIMO_LOGIN}s)...")
+        print(f"⏳ Faça o login no navegador - aguardando até {config.TEMPO_MAXIMO_LOGIN}s...")
+        limite = time.time() + config.TEMPO_MAXIMO_LOGIN
+        while time.time() < limite:
+            if self._sessao_autenticada():
+                return True
+            time.sleep(2)
+        return False
+    
+    def _sessao_autenticada(self) -> bool:
+        """
+        Navegador está logado dentro da pré-postagem (só olha a tela atual, não navega)
+        
+        Sessão expirada redireciona pro login (URL) ou mostra o formulário de senha na própria
+        página (DOM) - qualquer um dos dois conta como deslogado.
+        """
+        try:
+            url = self.driver.current_url.lower()
+            if not self._na_pre_postagem(url) or "login" in url:
+                return False
+            return not self.driver.find_elements(By.CSS_SELECTOR, "input[type='password']")
+        except Exception:
+            return False
+    
     def fazer_login(self, usuario: str = None, senha: str = None, cartao: str = None) -> bool:
         """
         Abre a página de pré-postagem (que redireciona para login) e aguarda o usuário fazer login manualmente
         
+        Com o perfil persistente a sessão da última execução costuma continuar valendo: se a página
+        abrir logada, retorna na hora sem pedir nada.
+        
         IMPORTANTE: Mudei pra abrir direto em prepostagem.correios.com.br porque tava perdendo
         a sessão quando navegava de empresas.correios.com.br pra lá - problema de cookie entre domínios
         """
         try:
             logger.info("Acessando sistema de pré-postagem dos Correios...")
             self.driver.get(config.CORREIOS_PRE_POSTAGEM_URL)
-            time.sleep(3)
+            self.esperas.pagina_estavel()
+            
+            # Perfil persistente com a sessão da execução anterior ainda valendo: nem pede login
+            if self._sessao_autenticada():
+                logger.info("Sessão do portal ainda ativa - login manual dispensado")
+                print("✓ Sessão anterior dos Correios ainda ativa - login dispensado\n")
+                self.logado = True
+                self.aplicar_bloqueios(imagens=True)
+                return True
             
             self.driver.maximize_window()
             
@@ -129,19 +511,23 @@ class CorreiosAutomator:
             print("\n💡 IMPORTANTE: NÃO navegue para outras páginas!")
             print("   Fique na página de pré-postagem após fazer login.")
             print("\n" + "="*80)
-            print("⏸️  Quando estiver LOGADO e na tela de pré-postagem, pressione ENTER...")
-            print("="*80 + "\n")
             
-            input()
+            if self.interativo:
+                print("⏸️  Quando estiver LOGADO e na tela de pré-postagem, pressione ENTER...")
+                print("="*80 + "\n")
+                input()
+            elif not self._aguardar_login_sem_interacao():
+                raise Exception("Login não concluído dentro do tempo limite")
             
             logger.info("Usuário confirmou login manual - continuando automação")
             print("✓ Login confirmado! Iniciando processamento...\n")
             
-            # Pausa maior aqui porque o site às vezes demora pra carregar depois do login
+            # O site às vezes demora pra carregar depois do login - espera até parar de mexer
             logger.info("Aguardando página estabilizar...")
-            time.sleep(5)
+            self.esperas.pagina_estavel("login")
             
             self.logado = True
+            self.aplicar_bloqueios(imagens=True)
             return True
                 
         except Exception as e:
@@ -149,19 +535,68 @@ class CorreiosAutomator:
             print(f"\n✗ Erro: {str(e)}")
             return False
     
+    def exportar_cookies(self) -> list:
+        """Cookies da sessão logada, pra reaproveitar em outros navegadores (pool paralelo)"""
+        return self.driver.get_cookies()
+    
+    def importar_cookies(self, cookies: list):
+        """
+        Injeta cookies exportados de outro navegador e marca como logado
+        
+        O Selenium só aceita cookie do domínio da página aberta, então visita cada domínio antes.
+        A pré-postagem fica por último pra o navegador terminar nela.
+        """
+        por_dominio = {}
+        for cookie in cookies:
+            por_dominio.setdefault(cookie.get('domain', '').lstrip('.'), []).append(cookie)
+        
+        portal = urlparse(config.CORREIOS_PRE_POSTAGEM_URL)
+        for dominio in sorted(por_dominio, key=lambda d: d == portal.hostname):
+            if not dominio:
+                continue
+            # Portal simulado roda em http com porta - os outros domínios são sempre https
+            self.driver.get(f"{portal.scheme}://{portal.netloc}/" if dominio == portal.hostname else f"https://{dominio}/")
+            for cookie in por_dominio[dominio]:
+                cookie = {k: v for k, v in cookie.items() if k in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'expiry')}
+                try:
+                    self.driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"Cookie '{cookie.get('name')}' recusado em {dominio}: {str(e)[:80]}")
+        
+        self.driver.get(config.CORREIOS_PRE_POSTAGEM_URL)
+        self.esperas.pagina_estavel()
+        self.logado = True
+    
+    def _endereco_conhecido(self, dados: Dict) -> Optional[Dict[str, str]]:
+        """
+        Cidade/UF/bairro do CEP pelo índice local, se o CEP existe e bate com a planilha
+        
+        Com isso dá pra preencher cidade/UF na hora, sem esperar a busca de CEP do portal.
+        """
+        if self.indice_cep is None:
+            return None
+        endereco = self.indice_cep.consultar(dados.get('CEP'))
+        if endereco is None:
+            return None
+        uf = str(dados.get('UF.1') or '').strip().upper()
+        if uf and uf != endereco['uf']:
+            return None
+        return endereco
+    
     def _verificar_campo_preenchido(self, seletores: list) -> bool:
         """
         Verifica se um campo já está preenchido (útil após preenchimento automático do CEP)
         Retorna True se o campo tem valor, False caso contrário
+        
+        Não espera nada: quem chama já aguardou o autopreenchimento com esperas.campo_preenchido,
+        então aqui é só uma leitura (antes eram até 2s de WebDriverWait por seletor).
         """
         for by, selector in seletores:
             try:
-                campo = WebDriverWait(self.driver, 2).until(
-                    EC.presence_of_element_located((by, selector))
-                )
-                valor = campo.get_attribute('value') or ''
-                if valor.strip():
-                    return True
+                for campo in self.driver.find_elements(by, selector):
+                    valor = campo.get_attribute('value') or ''
+                    if valor.strip():
+                        return True
             except:
                 continue
         return False
@@ -179,39 +614,19 @@ class CorreiosAutomator:
             
         logger.info(f"Preenchendo campo '{label}' com valor: {valor}")
         
-        for idx, (by, selector) in enumerate(seletores, 1):
-            try:
-                # Timeout reduzido para 5 segundos (suficiente para modal já aberto)
-                campo = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located((by, selector))
-                )
-                
-                # Aguarda o campo estar visível e interativo
-                WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((by, selector))
-                )
-
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", campo)
-                time.sleep(0.1)
-                
-                # Tenta clicar no campo primeiro para garantir foco
-                try:
-                    campo.click()
-                except:
-                    self.driver.execute_script("arguments[0].click();", campo)
-                
-                time.sleep(0.1)
-                
-                campo.clear()
-                time.sleep(0.1)
-                campo.send_keys(str(valor))
-                
-                logger.info(f"✓ Campo '{label}' preenchido com sucesso (tentativa {idx})")
-                return True
-                
-            except Exception as e:
-                logger.debug(f"Tentativa {idx} falhou para '{label}': {str(e)[:80]}")
-                continue
+        # Timeout de 5 segundos por seletor (suficiente para modal já aberto), esperando o campo
+        # estar visível e interativo
+        def digitar(campo):
+            # Clica no campo primeiro para garantir foco
+            self._clicar(campo)
+            campo.clear()
+            campo.send_keys(str(valor))
+        
+        campo, idx = self._localizar(f"campo_{label}", seletores, EC.element_to_be_clickable, timeout=5,
+                                     acao=digitar)
+        if campo is not None:
+            logger.info(f"✓ Campo '{label}' preenchido com sucesso (tentativa {idx})")
+            return True
         
         logger.warning(f"⚠ Não foi possível preencher campo '{label}'")
         self.tirar_screenshot(f"erro_campo_{label.replace('/', '_')}.png")
@@ -240,7 +655,6 @@ class CorreiosAutomator:
         ]
         logger.info(f"Preenchendo Destinatário com: {dados.get('COORDENADOR MUNICIPAL')}")
         self._tentar_preencher_campo("Destinatário/Nome", dados.get('COORDENADOR MUNICIPAL'), seletores_nome)
-        time.sleep(0.3)
         
         seletores_cpf = [
             # ID exato do site
@@ -253,7 +667,6 @@ class CorreiosAutomator:
         ]
         logger.info(f"Preenchendo CPF com: {dados.get('CPF')}")
         self._tentar_preencher_campo("CPF", dados.get('CPF'), seletores_cpf)
-        time.sleep(0.3)
         
         seletores_cep = [
             # ID exato do site - IMPORTANTE: é type="number"
@@ -264,12 +677,20 @@ class CorreiosAutomator:
             (By.XPATH, "//form[@id='formDestinatario']//input[@id='cepDestinatario']"),
             (By.XPATH, "//div[contains(@class, 'modal')]//input[@name='cepDestinatario']"),
         ]
-        cep = str(dados.get('CEP', '')).replace('-', '').replace('.', '').strip()
+        cep = _texto_celula(dados.get('CEP')).replace('-', '').replace('.', '')
         logger.info(f"Preenchendo CEP com: {cep}")
-        if self._tentar_preencher_campo("CEP", cep, seletores_cep):
-            # Delay de 3s aqui porque o site faz busca automática do CEP e preenche endereço/bairro/cidade
-            logger.info("Aguardando busca automática de CEP (3s)...")
-            time.sleep(3)
+        conhecido = self._endereco_conhecido(dados)
+        if conhecido:
+            # Índice local já sabe cidade/UF/bairro - não precisa esperar a busca do portal
+            logger.info(f"✓ CEP no índice local: {conhecido['cidade']}/{conhecido['uf']} - sem esperar a busca do portal")
+            dados = {**dados, 'CIDADE': conhecido['cidade'], 'UF.1': conhecido['uf']}
+            if conhecido['bairro'] and not str(dados.get('BAIRRO') or '').strip():
+                dados['BAIRRO'] = conhecido['bairro']
+        if self._tentar_preencher_campo("CEP", cep, seletores_cep) and not conhecido:
+            # O site faz busca automática do CEP e preenche endereço/bairro/cidade - espera isso
+            # acontecer (ou a busca terminar sem preencher) em vez dos 3s fixos de antes
+            logger.info("Aguardando busca automática de CEP...")
+            self.esperas.campo_preenchido(CAMPOS_AUTOFILL_CEP)
         
         # Endereço/Logradouro (Planilha: LOGRADOURO)
         seletores_endereco = [
@@ -289,7 +710,6 @@ class CorreiosAutomator:
         else:
             logger.info(f"Preenchendo Endereço com: {dados.get('LOGRADOURO')}")
             self._tentar_preencher_campo("Endereço", dados.get('LOGRADOURO'), seletores_endereco)
-        time.sleep(0.3)
         
         seletores_numero = [
             # ID exato do site
@@ -300,12 +720,11 @@ class CorreiosAutomator:
             (By.XPATH, "//form[@id='formDestinatario']//input[@id='numeroDestinatario']"),
             (By.XPATH, "//div[contains(@class, 'modal')]//input[@name='numeroDestinatario']"),
         ]
-        numero = str(dados.get('NÚMERO', '')).strip().upper()
-        if numero in ['S/Nº', 'S/N', 'SN', '']:
+        numero = _texto_celula(dados.get('NÚMERO')).upper()
+        if numero in SEM_NUMERO:
             numero = 'S/N'
         logger.info(f"Preenchendo Número com: {numero}")
         self._tentar_preencher_campo("Número", numero, seletores_numero)
-        time.sleep(0.3)
         
         seletores_complemento = [
             # ID exato do site
@@ -319,7 +738,6 @@ class CorreiosAutomator:
         if dados.get('COMPLEMENTO'):
             logger.info(f"Preenchendo Complemento com: {dados.get('COMPLEMENTO')}")
         self._tentar_preencher_campo("Complemento", dados.get('COMPLEMENTO'), seletores_complemento)
-        time.sleep(0.3)
         
         seletores_bairro = [
             # ID exato do site
@@ -338,7 +756,6 @@ class CorreiosAutomator:
         else:
             logger.info(f"Preenchendo Bairro com: {dados.get('BAIRRO')}")
             self._tentar_preencher_campo("Bairro", dados.get('BAIRRO'), seletores_bairro)
-        time.sleep(0.3)
         
         seletores_cidade = [
             # ID exato do site - IMPORTANTE: disabled="true" por padrão!
@@ -362,12 +779,10 @@ class CorreiosAutomator:
                 try:
                     campo_cidade = self.driver.find_element(By.ID, "cidadeDestinatario")
                     self.driver.execute_script("arguments[0].removeAttribute('disabled')", campo_cidade)
-                    time.sleep(0.3)
                 except:
                     logger.debug("Não foi possível remover disabled do campo Cidade")
             
             self._tentar_preencher_campo("Cidade", dados.get('CIDADE'), seletores_cidade)
-        time.sleep(0.3)
         
         seletores_estado = [
             # ID exato do site - IMPORTANTE: disabled="true" e é INPUT, não SELECT!
@@ -385,20 +800,18 @@ class CorreiosAutomator:
             logger.info("✓ UF foi preenchida automaticamente pelo CEP")
         else:
             # Estado - É INPUT (não SELECT) e está DISABLED - precisa habilitar com JavaScript
-            estado = str(dados.get('UF.1', '')).strip().upper()
+            estado = _texto_celula(dados.get('UF.1')).upper()
             if estado:
                 logger.info(f"Preenchendo Estado/UF com: {estado}")
                 # Tenta habilitar o campo primeiro (ele está disabled no HTML)
                 try:
                     campo_uf = self.driver.find_element(By.ID, "ufDestinatario")
                     self.driver.execute_script("arguments[0].removeAttribute('disabled')", campo_uf)
-                    time.sleep(0.3)
                 except:
                     logger.debug("Não foi possível remover disabled do campo UF")
                 
                 # Agora tenta preencher
                 self._tentar_preencher_campo("UF", estado, seletores_estado)
-        time.sleep(0.3)
         
         # Telefone (Planilha: TELEFONE) - ID é telefoneDes (não telefoneDestinatario!)
         seletores_telefone = [
@@ -412,7 +825,6 @@ class CorreiosAutomator:
         ]
         logger.info(f"Preenchendo Telefone com: {dados.get('TELEFONE')}")
         self._tentar_preencher_campo("Telefone", dados.get('TELEFONE'), seletores_telefone)
-        time.sleep(0.3)
         
         seletores_email = [
             # ID exato do site - type="email"
@@ -426,12 +838,87 @@ class CorreiosAutomator:
         logger.info(f"Preenchendo Email com: {dados.get('EMAIL')}")
         self._tentar_preencher_campo("Email", dados.get('EMAIL'), seletores_email)
     
-    def _salvar_destinatario_modal(self):
+    def _valores_destinatario(self, dados: Dict) -> Dict[str, str]:
+        """
+        Monta {id do campo no modal: valor} com as mesmas normalizações do preenchimento campo a campo
+        
+        Campos sem valor na planilha ficam de fora (não sobrescrevem nada no modal).
+        """
+        numero = _texto_celula(dados.get('NÚMERO')).upper()
+        if numero in SEM_NUMERO:
+            numero = 'S/N'
+        
+        brutos = {
+            'nomeDestinatario': dados.get('COORDENADOR MUNICIPAL'),
+            'cpfCnpjDestinatario': dados.get('CPF'),
+            'cepDestinatario': _texto_celula(dados.get('CEP')).replace('-', '').replace('.', ''),
+            'logradouroDestinatario': dados.get('LOGRADOURO'),
+            'numeroDestinatario': numero,
+            'complementoDestinatario': dados.get('COMPLEMENTO'),
+            'bairroDestinatario': dados.get('BAIRRO'),
+            'cidadeDestinatario': dados.get('CIDADE'),
+            'ufDestinatario': _texto_celula(dados.get('UF.1')).upper(),
+            'telefoneDes': dados.get('TELEFONE'),
+            'emailDestinatario': dados.get('EMAIL'),
+        }
+        return {
+            campo: str(valor).strip() for campo, valor in brutos.items()
+            if valor is not None and str(valor).strip() not in ['', 'nan', 'None', 'N/A', 'NAN', 'NONE']
+        }
+    
+    def _preencher_destinatario_js(self, dados: Dict) -> bool:
+        """
+        Preenche o modal de destinatário via JavaScript em uma única ida ao navegador
+        
+        O caminho campo a campo custa ~10 round-trips do WebDriver por campo; aqui é um execute_script
+        pra preencher tudo, uma espera pela busca do CEP e um repasse só nos campos que ficaram vazios.
+        Endereço preenchido pelo portal tem prioridade, igual no caminho antigo.
+        
+        Returns:
+            True se todos os campos com valor terminaram preenchidos; False manda pro fallback campo a campo
+        """
+        valores = self._valores_destinatario(dados)
+        conhecido = self._endereco_conhecido(dados)
+        if conhecido:
+            # Grafia do índice (a mesma que a busca do portal colocaria)
+            valores['cidadeDestinatario'] = conhecido['cidade']
+            valores['ufDestinatario'] = conhecido['uf']
+            if conhecido['bairro']:
+                valores.setdefault('bairroDestinatario', conhecido['bairro'])
+        # CEP primeiro pra disparar a busca do portal o quanto antes
+        ordem = ['cepDestinatario'] + [c for c in valores if c != 'cepDestinatario']
+        ordem += [c for c in CAMPOS_ENDERECO_DESTINATARIO if c not in ordem]
+        
+        try:
+            resultado = self.driver.execute_script(SCRIPT_PREENCHER_DESTINATARIO, valores, False, ordem)
+            
+            # A busca do CEP pode sobrescrever/limpar o endereço - espera terminar e repassa os vazios.
+            # Endereço confirmado pelo índice local: a busca só repetiria o que já foi preenchido.
+            if not conhecido:
+                self.esperas.rede_ociosa("autofill_cep")
+            resultado = self.driver.execute_script(SCRIPT_PREENCHER_DESTINATARIO, valores, True, ordem)
+        except Exception as e:
+            logger.warning(f"Preenchimento via JavaScript falhou: {str(e)[:100]}")
+            return False
+        
+        logger.info(f"Valores no modal após preenchimento JS: {resultado}")
+        faltando = [campo for campo in valores if not (resultado.get(campo) or '').strip()]
+        if faltando:
+            logger.warning(f"⚠ Preenchimento JS deixou campos vazios/ausentes: {', '.join(faltando)}")
+            return False
+        
+        logger.info(f"✓ {len(valores)} campos do destinatário preenchidos via JavaScript")
+        return True
+    
+    def _salvar_destinatario_modal(self) -> bool:
         """
         Clica no botão Salvar dentro do modal de destinatário
         
         A parte crítica aqui: depois de preencher os campos no modal popup,
         precisa salvar e fechar o modal antes de confirmar a pré-postagem.
+        
+        Returns:
+            True se o modal fechou (portal aceitou o destinatário)
         """
         
         logger.info("Procurando botão 'Salvar' dentro do modal...")
@@ -458,41 +945,25 @@ class CorreiosAutomator:
         ]
         
         botao_encontrado = False
-        for idx, (by, selector) in enumerate(seletores_salvar, 1):
-            try:
-                logger.debug(f"Tentativa {idx}: Procurando 'Salvar' com {by}...")
-                botao = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((by, selector))
-                )
-                
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
-                time.sleep(0.5)
-                
-                try:
-                    botao.click()
-                except:
-                    self.driver.execute_script("arguments[0].click();", botao)
-                
-                logger.info(f"✓ Botão 'Salvar' clicado com sucesso (tentativa {idx})")
-                botao_encontrado = True
-                time.sleep(2)
-                break
-            except:
-                continue
+        botao, idx = self._localizar("botao_salvar_modal", seletores_salvar, EC.element_to_be_clickable, timeout=3,
+                                     acao=self._clicar)
+        if botao is not None:
+            logger.info(f"✓ Botão 'Salvar' clicado com sucesso (tentativa {idx})")
+            botao_encontrado = True
         
         if not botao_encontrado:
             self.tirar_screenshot("erro_botao_salvar_modal.png")
             logger.error("Botão 'Salvar' não encontrado - solicitando ajuda manual")
-            print("\n" + "="*80)
-            print("⚠️  AÇÃO MANUAL NECESSÁRIA")
-            print("="*80)
-            print("\n➤ Não foi possível clicar no botão 'Salvar' automaticamente.")
-            print("➤ Por favor, CLIQUE no botão SALVAR no popup/modal.")
-            print("➤ Aguarde o modal fechar e volte aqui.")
-            print("\n⏸️  Pressione ENTER após salvar e o modal fechar...")
-            print("="*80 + "\n")
-            input()
-            time.sleep(2)
+            self._solicitar_acao_manual(
+                "botão 'Salvar' do modal não encontrado",
+                ["➤ Não foi possível clicar no botão 'Salvar' automaticamente.",
+                 "➤ Por favor, CLIQUE no botão SALVAR no popup/modal.",
+                 "➤ Aguarde o modal fechar e volte aqui."],
+                "Pressione ENTER após salvar e o modal fechar..."
+            )
+        
+        # Modal fechado = campo de nome sumiu; antes eram 2s fixos
+        return self.esperas.invisivel((By.ID, "nomeDestinatario")) is not None
     
     def _confirmar_postagem(self, dados: Dict):
         """
@@ -516,452 +987,522 @@ class CorreiosAutomator:
         ]
         
         botao_encontrado = False
-        for by, selector in seletores_confirmar:
+        self._codigo_rede = None
+        botao, _ = self._localizar("botao_confirmar", seletores_confirmar, EC.element_to_be_clickable, timeout=3)
+        if botao is not None:
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
+            # Só interessa o que o portal responder a partir do clique
+            if self.escuta is not None:
+                self.escuta.descartar()
+            
             try:
-                botao = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((by, selector))
-                )
-                self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
-                time.sleep(0.5)
-                
-                try:
-                    botao.click()
-                except:
-                    self.driver.execute_script("arguments[0].click();", botao)
-                
-                logger.info("✓ Botão de confirmação clicado")
-                botao_encontrado = True
-                break
+                botao.click()
             except:
-                continue
+                self.driver.execute_script("arguments[0].click();", botao)
+            
+            logger.info("✓ Botão de confirmação clicado")
+            botao_encontrado = True
+            self._confirmacao_enviada = True
+            if self.escuta is not None:
+                self._codigo_rede = self.escuta.aguardar_codigo()
         
         if not botao_encontrado:
             self.tirar_screenshot("erro_botao_confirmar.png")
             logger.error("Botão confirmar não encontrado - solicitando ajuda manual")
-            print("\n" + "="*80)
-            print("⚠️  AÇÃO MANUAL NECESSÁRIA")
-            print("="*80)
-            print("\n➤ Não foi possível clicar no botão de confirmação automaticamente")
-            print("➤ Por favor, CLIQUE no botão CONFIRMAR/FINALIZAR no navegador.")
-            print("➤ Após clicar e ver a tela de sucesso, volte aqui.")
-            print("\n⏸️  Pressione ENTER após confirmar e ver tela de sucesso...")
-            print("="*80 + "\n")
-            input()
-        
-        # Aguarda uns segundos pro site processar
+            self._solicitar_acao_manual(
+                "botão de confirmação não encontrado",
+                ["➤ Não foi possível clicar no botão de confirmação automaticamente",
+                 "➤ Por favor, CLIQUE no botão CONFIRMAR/FINALIZAR no navegador.",
+                 "➤ Após clicar e ver a tela de sucesso, volte aqui."],
+                "Pressione ENTER após confirmar e ver tela de sucesso..."
+            )
+            self._confirmacao_enviada = True
+        
+        # Aguarda o site processar: requisição de confirmação terminar e tela parar de mexer
         logger.info("Aguardando processamento...")
-        time.sleep(5)
+        self.esperas.pagina_estavel("confirmacao")
+        self.verificar_sessao()
         
-        self.tirar_screenshot(f"sucesso_linha_{dados.get('_linha')}.png")
+        self.tirar_screenshot(f"sucesso_linha_{dados.get('_linha')}.png", categoria='passo')
     
-    def processar_postagem(self, dados: Dict) -> Dict:
+    def _selecionar_destinatario_salvo(self, dados: Dict) -> bool:
         """
-        Processa uma postagem seguindo o fluxo do sistema Correios
+        Seleciona o destinatário na lista de destinatários salvos do portal, se a agenda diz que ele está lá
         
-        FLUXO COMPLETO:
-        1. Navegar pra pré-postagem
-        2. Clicar em "Pré-postagem a faturar de objetos registrados"
-        3. Clicar em "Nova pré-postagem"
-        4. Selecionar remetente "CEBRASPE"
-        5. Clicar em "Novo Destinatário" (abre modal)
-        6. Preencher formulário dentro do modal
-        7. Clicar em "Salvar" (fecha modal)
-        8. Confirmar pré-postagem na tela principal
-        9. Capturar código de rastreamento
+        Uma busca pelo CPF + um clique no lugar de abrir o modal e digitar os 10 campos.
         
-        Os seletores (By.NAME, By.XPATH, etc) foram descobertos na base da tentativa e erro
-        com F12 no Chrome. Sempre que o site muda, precisa voltar aqui e ajustar.
+        Returns:
+            True se o destinatário foi selecionado; False manda pro cadastro pelo modal
         """
-        codigo_rastreamento = None
+        if self.agenda is None or self._busca_destinatario_indisponivel:
+            return False
+        entrada = self.agenda.consultar(dados, self._valores_destinatario(dados))
+        if entrada is None:
+            return False
+        
+        cpf, cep = chave_destinatario(dados).split(':')
+        logger.info(f"Passo 4.5: Destinatário já salvo no portal, buscando CPF {cpf}...")
+        self.medidor.marcar("4.5 destinatário salvo")
+        
+        seletores_busca_destinatario = [
+            (By.ID, "buscaDestinatario"),
+            (By.ID, "pesquisaDestinatario"),
+            (By.XPATH, "//input[contains(@placeholder, 'estinatário')]"),
+            (By.XPATH, "//input[contains(@name, 'buscaDestinatario') or contains(@name, 'pesquisaDestinatario')]"),
+            (By.XPATH, "//label[contains(., 'Destinatário')]/following::input[1]"),
+            (By.CSS_SELECTOR, "input[class*='busca-destinatario']"),
+        ]
+        
+        # Sondagem de elemento opcional: sem checar sessão a cada seletor (a sessão é conferida no fluxo)
+        campo, _ = self._localizar("campo_busca_destinatario", seletores_busca_destinatario,
+                                   EC.element_to_be_clickable, timeout=2, checar_sessao=False)
+        if campo is None:
+            # 6 seletores x 2s a cada destinatário repetido sairia mais caro que o modal - desliga de vez
+            self._busca_destinatario_indisponivel = True
+            logger.info("Busca de destinatários salvos não encontrada - cadastrando pelo modal "
+                        "(e não procura mais nesta execução)")
+            return False
         
         try:
-            logger.info(f"Processando postagem linha {dados.get('_linha', 'N/A')}")
-            logger.info(f"Destinatário: {dados.get('COORDENADOR MUNICIPAL', 'N/A')}")
-            
-            if not self.logado:
-                raise Exception("Não está logado no sistema")
-            
-            # PASSO 1: Garantir que tá na página certa
-            logger.info("Passo 1: Verificando se está na página de pré-postagem...")
-            url_atual = self.driver.current_url
-            logger.info(f"URL atual: {url_atual}")
-            
-            if "prepostagem.correios.com.br" not in url_atual:
-                logger.info("Não está na pré-postagem, navegando...")
-                self.driver.get(config.CORREIOS_PRE_POSTAGEM_URL)
-                time.sleep(3)
-            else:
-                logger.info("Já está na página de pré-postagem")
-                # Volta pra página inicial da pré-postagem pra garantir que tá tudo limpo
-                self.driver.get(config.CORREIOS_PRE_POSTAGEM_URL)
-                time.sleep(3)
-            
-            # Aguarda página carregar completamente
-            logger.info("Aguardando página carregar completamente...")
-            time.sleep(2)
-            
-            self.tirar_screenshot("passo1_pagina_inicial.png")
-            
-            # PASSO 2: Clica em "Pré-postagem a faturar de objetos registrados"
-            logger.info("Passo 2: Procurando link 'Pré-postagem a faturar de objetos registrados'...")
-            
-            self.tirar_screenshot("passo2_antes_clicar.png")
-            
-            # 10 seletores pra esse botão porque ele muda de lugar/classe dependendo do layout
-            seletores_registrados = [
-                # Texto completo ou parcial no link
-                (By.XPATH, "//a[contains(text(), 'objetos registrados')]"),
-                (By.XPATH, "//a[contains(text(), 'Pré-postagem a faturar')]"),
-                (By.XPATH, "//a[contains(., 'registrados')]"),
-                # Por href
-                (By.XPATH, "//a[contains(@href, 'registrados')]"),
-                (By.XPATH, "//a[contains(@href, 'faturar')]"),
-                # Div ou span clicável
-                (By.XPATH, "//div[contains(text(), 'objetos registrados')]"),
-                (By.XPATH, "//span[contains(text(), 'objetos registrados')]"),
-                # Botão
-                (By.XPATH, "//button[contains(text(), 'objetos registrados')]"),
-                # Classe ou ID
-                (By.CSS_SELECTOR, "[class*='registrados']"),
-                (By.CSS_SELECTOR, "[id*='registrados']"),
+            campo.clear()
+            campo.send_keys(cpf)
+            campo.send_keys(Keys.ENTER)
+            self.esperas.rede_ociosa("busca_destinatario")
+            
+            # O portal pode mostrar CPF/CEP formatados (123.456.789-01, 01310-100) - compara só os dígitos.
+            # CPF e CEP na mesma linha: o mesmo CPF pode estar salvo com outro endereço. E só a linha mais
+            # interna que bate - senão o container da lista inteira também "contém" os dois
+            linha = "*[self::tr or self::li or self::div[contains(@class, 'item')]]"
+            digitos = "translate(normalize-space(.), '.-/ ', '')"
+            predicado = f"contains({digitos}, '{cpf}') and contains({digitos}, '{cep}')"
+            xpath_opcao = f"//{linha}[{predicado}][not(descendant::{linha}[{predicado}])]"
+            opcao = WebDriverWait(self.driver, self.esperas.orcamento("busca_destinatario")).until(
+                EC.element_to_be_clickable((By.XPATH, xpath_opcao))
+            )
+            if len(self.driver.find_elements(By.XPATH, xpath_opcao)) > 1:
+                # Mais de uma linha com o mesmo CPF+CEP (complemento diferente?) - não dá pra saber qual é
+                logger.info(f"Busca por {cpf} trouxe mais de um destinatário com o CEP {cep} - cadastrando pelo modal")
+                return False
+            try:
+                opcao.click()
+            except:
+                self.driver.execute_script("arguments[0].click();", opcao)
+            self.esperas.pagina_estavel("busca_destinatario")
+        except Exception as e:
+            # Busca pode ter falhado porque a sessão caiu - aí o destinatário continua salvo no portal
+            self.verificar_sessao()
+            # Some do portal (apagado/expirado): esquece e cadastra de novo
+            logger.info(f"Destinatário {cpf} não apareceu na busca ({str(e)[:60]}) - cadastrando pelo modal")
+            self.tirar_screenshot(f"destinatario_salvo_nao_encontrado_linha_{dados.get('_linha')}.png", categoria='detalhe')
+            self.agenda.remover(dados)
+            return False
+        
+        self.agenda.registrar_uso(dados)
+        logger.info(f"✓ Destinatário salvo selecionado ({entrada.get('nome', cpf)}) - modal dispensado")
+        self.tirar_screenshot(f"destinatario_selecionado_linha_{dados.get('_linha')}.png", categoria='passo')
+        return True
+    
+    def _cadastrar_novo_destinatario(self, dados: Dict):
+        """Passos 4.5 a 5.5: abre o modal de Novo Destinatário, preenche, salva e registra na agenda"""
+        # PASSO 4.5: IMPORTANTE - Clicar em "Novo Destinatário" pra abrir o modal
+        logger.info("Passo 4.5: Clicando em 'Novo Destinatário'...")
+        self.medidor.marcar("4.5 novo destinatário")
+        
+        botao_novo_dest_clicado = False
+        botao, idx = self._localizar("botao_novo_destinatario", SELETORES_NOVO_DESTINATARIO, EC.element_to_be_clickable,
+                                     acao=self._clicar)
+        if botao is not None:
+            logger.info(f"✓ Botão 'Novo Destinatário' clicado com sucesso (tentativa {idx})")
+            botao_novo_dest_clicado = True
+        
+        if not botao_novo_dest_clicado:
+            logger.error("Botão 'Novo Destinatário' não encontrado")
+            self.tirar_screenshot("erro_botao_novo_destinatario.png")
+            
+            self._solicitar_acao_manual(
+                "botão 'Novo Destinatário' não encontrado",
+                ["➤ O sistema não conseguiu clicar em 'Novo Destinatário'.",
+                 "➤ Por favor, CLIQUE MANUALMENTE no botão 'Novo Destinatário'.",
+                 "➤ Aguarde o popup/modal abrir e volte aqui."],
+                "Pressione ENTER quando o formulário aparecer..."
+            )
+        
+        # IMPORTANTE: Aguardar o modal/popup aparecer (detecção rápida)
+        logger.info("Aguardando modal de destinatário abrir...")
+        
+        # Detecta pelo campo de nome que é o primeiro campo do modal
+        modal_apareceu = False
+        # Aguarda o campo de nome ficar visível (indicador direto de que o modal está aberto)
+        if self.esperas.visivel((By.ID, "nomeDestinatario")):
+            logger.info("✓ Modal aberto e pronto para preenchimento")
+            modal_apareceu = True
+        else:
+            # Fallback: tenta outros seletores
+            logger.debug("Campo nomeDestinatario não encontrado, tentando seletores alternativos...")
+            seletores_modal_fallback = [
+                (By.XPATH, "//div[contains(@class, 'modal')]//input[@name='nomeDestinatario']"),
+                (By.XPATH, "//input[@id='cpfCnpjDestinatario']"),
+                (By.XPATH, "//div[contains(@class, 'modal') and contains(@style, 'display: block')]"),
             ]
             
-            elemento_encontrado = False
-            for idx, (by, selector) in enumerate(seletores_registrados, 1):
+            for by, selector in seletores_modal_fallback:
                 try:
-                    logger.info(f"Tentativa {idx}: Procurando elemento com {by}...")
-                    elemento = WebDriverWait(self.driver, 5).until(
+                    WebDriverWait(self.driver, 1).until(
                         EC.presence_of_element_located((by, selector))
                     )
-                    
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", elemento)
-                    time.sleep(1)
-                    
-                    try:
-                        elemento.click()
-                    except:
-                        self.driver.execute_script("arguments[0].click();", elemento)
-                    
-                    logger.info(f"✓ Clique realizado com sucesso usando tentativa {idx}")
-                    elemento_encontrado = True
-                    time.sleep(3)
+                    logger.info("✓ Modal detectado por seletor alternativo")
+                    modal_apareceu = True
                     break
-                    
-                except Exception as e:
-                    logger.debug(f"Tentativa {idx} falhou: {str(e)[:100]}")
+                except:
                     continue
-            
-            if not elemento_encontrado:
-                # Última cartada: navegação direta pela URL
-                logger.warning("Nenhum seletor funcionou. Tentando navegação direta...")
-                self.driver.get("https://prepostagem.correios.com.br/prepostagem/painels/faturar/registrados")
-                time.sleep(3)
-                self.tirar_screenshot("passo2_navegacao_direta.png")
-                logger.info("Navegação direta realizada")
-                
-                # Verifica se deu certo
-                if "registrados" not in self.driver.current_url.lower():
-                    # Só pede ajuda manual se realmente não conseguiu
-                    print("\n" + "="*80)
-                    print("⚠️  AÇÃO MANUAL NECESSÁRIA")
-                    print("="*80)
-                    print("\n➤ O sistema não conseguiu clicar automaticamente em:")
-                    print("   'Pré-postagem a faturar de objetos registrados'")
-                    print("\n➤ Por favor, CLIQUE MANUALMENTE nessa opção no navegador.")
-                    print("➤ Após clicar e a página carregar, volte aqui.")
-                    print("\n⏸️  Pressione ENTER quando estiver na tela de objetos registrados...")
-                    print("="*80 + "\n")
-                    input()
-                    time.sleep(2)
-            
-            # PASSO 3: Botão "Nova pré postagem"
-            logger.info("Passo 3: Procurando botão 'Nova pré-postagem'...")
-            
-            self.tirar_screenshot("passo3_antes_clicar.png")
-            
-            seletores_nova_postagem = [
-                # Texto no botão
-                (By.XPATH, "//button[contains(text(), 'Nova pré-postagem')]"),
-                (By.XPATH, "//button[contains(., 'Nova')]"),
-                (By.XPATH, "//a[contains(text(), 'Nova pré-postagem')]"),
-                (By.XPATH, "//a[contains(., 'Nova')]"),
-                # Span ou div dentro de botão
-                (By.XPATH, "//button//span[contains(text(), 'Nova')]"),
-                (By.XPATH, "//button//div[contains(text(), 'Nova')]"),
-                # Classes comuns
-                (By.CSS_SELECTOR, "button[class*='nova']"),
-                (By.CSS_SELECTOR, "button[class*='novo']"),
-                (By.CSS_SELECTOR, "a[class*='nova']"),
-                (By.CSS_SELECTOR, "[class*='btn-nova']"),
-                # Ícone de adicionar/plus
-                (By.XPATH, "//button[contains(@class, 'add') or contains(@class, 'plus')]"),
-                (By.XPATH, "//button[@title='Nova pré-postagem' or @aria-label='Nova pré-postagem']"),
+        
+        if not modal_apareceu:
+            logger.warning("⚠ Modal não detectado automaticamente, aguardando DOM estabilizar...")
+            self.esperas.dom_estavel("modal_abrir")
+        
+        # PASSO 5: Preenche o formulário do destinatário dentro do modal
+        logger.info("Passo 5: Preenchendo formulário do destinatário no modal...")
+        self.medidor.marcar("5 preenchimento")
+        
+        # Tira screenshot do formulário vazio
+        self.tirar_screenshot(f"formulario_antes_preencher_linha_{dados.get('_linha')}.png", categoria='detalhe')
+        
+        # Caminho rápido (um execute_script); se não confirmar todos os campos, vai campo a campo
+        if not (config.PREENCHIMENTO_JS and self._preencher_destinatario_js(dados)):
+            if config.PREENCHIMENTO_JS:
+                logger.info("Usando preenchimento campo a campo como fallback...")
+            self._preencher_campo_destinatario(dados)
+        
+        logger.info("Formulário preenchido com sucesso")
+        
+        self.tirar_screenshot(f"formulario_preenchido_linha_{dados.get('_linha')}.png", categoria='passo')
+        
+        # PASSO 5.5: Salva e fecha o modal
+        logger.info("Passo 5.5: Salvando destinatário e fechando modal...")
+        self.medidor.marcar("5.5 salvar destinatário")
+        if not self._salvar_destinatario_modal():
+            # Modal continua aberto (validação do portal?): não dá pra dizer que o destinatário foi salvo
+            logger.warning("Modal de destinatário não fechou depois do Salvar - destinatário fica fora da agenda")
+            return
+        
+        logger.info("Destinatário salvo! Modal fechado. Continuando com confirmação da pré-postagem...")
+        
+        if self.agenda is not None:
+            self.agenda.registrar(dados, self._valores_destinatario(dados))
+    
+    def _remetente_preenchido(self) -> bool:
+        """Formulário de pré-postagem aberto com o remetente CEBRASPE já selecionado"""
+        preenchido = False
+        try:
+            # Tenta encontrar "Cebraspe" ou "CEBRASPE" já exibido na página como remetente
+            seletores_verificacao = [
+                # Texto "Cebraspe" próximo ao label "Remetente:"
+                (By.XPATH, "//*[contains(text(), 'Cebraspe') and not(self::button) and not(self::a) and not(self::input)]"),
+                (By.XPATH, "//*[contains(text(), 'CEBRASPE') and not(self::button) and not(self::a) and not(self::input)]"),
+                # Dentro de divs ou spans com classe relacionada
+                (By.XPATH, "//div[contains(text(), 'Cebraspe')]"),
+                (By.XPATH, "//span[contains(text(), 'Cebraspe')]"),
+                (By.XPATH, "//p[contains(text(), 'Cebraspe')]"),
+                # CPF específico do Cebraspe (18.284.407/0001-53)
+                (By.XPATH, "//*[contains(text(), '18.284.407')]"),
+                (By.XPATH, "//*[contains(text(), '18284407')]"),
             ]
             
-            botao_encontrado = False
-            for idx, (by, selector) in enumerate(seletores_nova_postagem, 1):
+            for by, selector in seletores_verificacao:
                 try:
-                    logger.info(f"Tentativa {idx}: Procurando botão com {by}...")
-                    botao = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((by, selector))
-                    )
-                    
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
-                    time.sleep(0.3)
-                    
-                    try:
-                        botao.click()
-                    except:
-                        self.driver.execute_script("arguments[0].click();", botao)
-                    
-                    logger.info(f"✓ Clique no botão realizado com sucesso usando tentativa {idx}")
-                    botao_encontrado = True
-                    time.sleep(1)
-                    break
-                    
-                except Exception as e:
-                    logger.debug(f"Tentativa {idx} falhou: {str(e)[:100]}")
+                    elemento = self.driver.find_element(by, selector)
+                    if elemento and elemento.is_displayed():
+                        texto = elemento.text.strip()
+                        if texto and ('cebraspe' in texto.lower() or '18.284.407' in texto or '18284407' in texto):
+                            preenchido = True
+                            logger.info(f"✓ Remetente CEBRASPE já está preenchido automaticamente (detectado: '{texto[:50]}')")
+                            break
+                except:
                     continue
+        except:
+            pass
+        return preenchido
+    
+    def _continuar_da_tela_atual(self) -> bool:
+        """
+        Modo continuação: abre a próxima pré-postagem de onde a anterior terminou
+        
+        Depois do Confirmar o navegador já está logado dentro da pré-postagem, então não precisa
+        recarregar o bem-vindo, achar o link de registrados e conferir o remetente de novo (passos 1-4).
+        Clica em "Nova pré-postagem" na própria tela de confirmação ou, se ela não tiver o botão,
+        vai direto pela URL do painel de registrados.
+        
+        Returns:
+            True se o formulário novo abriu com o remetente certo; False = segue o fluxo completo
+        """
+        if not (config.MODO_CONTINUACAO and self._continuacao_pronta):
+            return False
+        self._continuacao_pronta = False
+        if self._falhas_continuacao >= config.MAX_FALHAS_CONTINUACAO:
+            return False
+        self.medidor.marcar("1-4 continuação")
+        
+        if self._abrir_pela_tela_atual():
+            self._falhas_continuacao = 0
+            logger.info("✓ Continuação: nova pré-postagem aberta direto (passos 1-4 pulados)")
+            return True
+        
+        self._falhas_continuacao += 1
+        if self._falhas_continuacao >= config.MAX_FALHAS_CONTINUACAO:
+            # Portal que nunca bate só gastaria a tentativa em todo registro antes do fluxo completo
+            logger.warning(f"Continuação falhou {self._falhas_continuacao}x seguidas - "
+                           "desligada, daqui pra frente só o fluxo completo")
+        return False
+    
+    def _abrir_pela_tela_atual(self) -> bool:
+        """Tentativa da continuação em si (False = formulário não abriu como esperado)"""
+        try:
+            self.verificar_sessao()
+            url_atual = self.driver.current_url
+            if not self._na_pre_postagem(url_atual):
+                logger.info(f"Continuação: navegador saiu da pré-postagem ({url_atual}), fluxo completo")
+                return False
+            
+            botao = None
+            if self._nova_pela_tela_atual:
+                # Tela de confirmação já está estável (esperada no _confirmar_postagem), então espera curta
+                botao, _ = self._localizar("botao_nova_pre_postagem_continuacao", SELETORES_NOVA_PRE_POSTAGEM,
+                                           EC.element_to_be_clickable, timeout=0.5)
+                if botao is None:
+                    # Confirmação desse portal não tem o botão - próximos registros vão direto pelo painel
+                    logger.info("Continuação: confirmação sem 'Nova pré-postagem', usando o painel de registrados")
+                    self._nova_pela_tela_atual = False
+            
+            if botao is None:
+                self.driver.get(config.CORREIOS_PRE_POSTAGEM_REGISTRADOS_URL)
+                self.esperas.pagina_estavel("navegacao")
+                self.verificar_sessao()
+                if "registrados" not in self.driver.current_url.lower():
+                    logger.info(f"Continuação: painel de registrados não abriu ({self.driver.current_url}), fluxo completo")
+                    return False
+                botao, _ = self._localizar("botao_nova_pre_postagem", SELETORES_NOVA_PRE_POSTAGEM,
+                                           EC.element_to_be_clickable, timeout=2)
+                if botao is None:
+                    return False
             
-            if not botao_encontrado:
-                logger.error("Botão 'Nova pré postagem' não encontrado")
-                self.tirar_screenshot("erro_passo3_botao_nova_postagem.png")
-                
-                print("\n" + "="*80)
-                print("⚠️  AÇÃO MANUAL NECESSÁRIA")
-                print("="*80)
-                print("\n➤ O sistema não conseguiu clicar automaticamente em:")
-                print("   Botão 'Nova pré-postagem'")
-                print("\n➤ Por favor, CLIQUE MANUALMENTE nesse botão no navegador.")
-                print("➤ Após clicar e o formulário abrir, volte aqui.")
-                print("\n⏸️  Pressione ENTER quando o formulário de nova pré-postagem abrir...")
-                print("="*80 + "\n")
-                input()
-                time.sleep(2)
-            
-            # PASSO 4: Verifica se remetente já está preenchido, senão preenche com "Cebraspe"
-            logger.info("Passo 4: Verificando remetente...")
-            
-            # Aguarda a página carregar um pouco
-            time.sleep(1)
-            
-            # Verifica se o remetente já está preenchido/selecionado
-            remetente_ja_preenchido = False
             try:
-                # Tenta encontrar "Cebraspe" ou "CEBRASPE" já exibido na página como remetente
-                seletores_verificacao = [
-                    # Texto "Cebraspe" próximo ao label "Remetente:"
-                    (By.XPATH, "//*[contains(text(), 'Cebraspe') and not(self::button) and not(self::a) and not(self::input)]"),
-                    (By.XPATH, "//*[contains(text(), 'CEBRASPE') and not(self::button) and not(self::a) and not(self::input)]"),
-                    # Dentro de divs ou spans com classe relacionada
-                    (By.XPATH, "//div[contains(text(), 'Cebraspe')]"),
-                    (By.XPATH, "//span[contains(text(), 'Cebraspe')]"),
-                    (By.XPATH, "//p[contains(text(), 'Cebraspe')]"),
-                    # CPF específico do Cebraspe (18.284.407/0001-53)
-                    (By.XPATH, "//*[contains(text(), '18.284.407')]"),
-                    (By.XPATH, "//*[contains(text(), '18284407')]"),
-                ]
-                
-                for by, selector in seletores_verificacao:
-                    try:
-                        elemento = self.driver.find_element(by, selector)
-                        if elemento and elemento.is_displayed():
-                            texto = elemento.text.strip()
-                            if texto and ('cebraspe' in texto.lower() or '18.284.407' in texto or '18284407' in texto):
-                                remetente_ja_preenchido = True
-                                logger.info(f"✓ Remetente CEBRASPE já está preenchido automaticamente (detectado: '{texto[:50]}')")
-                                break
-                    except:
-                        continue
+                botao.click()
             except:
-                pass
-            
-            # Se não estiver preenchido, preenche manualmente
-            if not remetente_ja_preenchido:
-                logger.info("Preenchendo remetente 'Cebraspe'...")
-                try:
-                    campo_remetente = self.wait.until(
-                        EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Busca de objetos pré-postados pelo código do objeto' or contains(@name, 'remetente') or @id='remetente']"))
-                    )
-                    campo_remetente.clear()
-                    campo_remetente.send_keys("Cebraspe")
-                    time.sleep(1)
-                    
-                    botao_lupa = self.driver.find_element(By.XPATH, "//button[@type='submit' or contains(@class, 'busca') or contains(., 'Buscar')]")
-                    botao_lupa.click()
-                    time.sleep(2)
-                    
-                    opcao_cebraspe = self.wait.until(
-                        EC.element_to_be_clickable((By.XPATH, "//td[text()='CEBRASPE' or text()='Cebraspe']//parent::tr | //div[contains(text(), 'CEBRASPE')]"))
-                    )
-                    opcao_cebraspe.click()
-                    time.sleep(2)
-                    logger.info("✓ Remetente 'Cebraspe' selecionado com sucesso")
-                except Exception as e:
-                    logger.warning(f"Não foi possível selecionar remetente automaticamente: {str(e)}")
-                    self.tirar_screenshot("passo4_erro_selecionar_remetente.png")
-                    # Continua mesmo assim - pode ser que já esteja selecionado
-                    logger.info("Continuando o processamento...")
-            else:
-                # Pequeno delay para estabilizar
-                time.sleep(1)
-            
-            # PASSO 4.5: IMPORTANTE - Clicar em "Novo Destinatário" pra abrir o modal
-            logger.info("Passo 4.5: Clicando em 'Novo Destinatário'...")
-            
-            seletores_novo_destinatario = [
-                # Texto no botão/link
-                (By.XPATH, "//button[contains(text(), 'Novo Destinatário')]"),
-                (By.XPATH, "//a[contains(text(), 'Novo Destinatário')]"),
-                (By.XPATH, "//button[contains(., 'Novo Destinatário')]"),
-                (By.XPATH, "//a[contains(., 'Novo Destinatário')]"),
-                # Variações do texto
-                (By.XPATH, "//button[contains(text(), 'Novo destinatário')]"),
-                (By.XPATH, "//a[contains(text(), 'Novo destinatário')]"),
-                # Classes comuns
-                (By.CSS_SELECTOR, "button[class*='novo-destinatario']"),
-                (By.CSS_SELECTOR, "a[class*='novo-destinatario']"),
-                # Por título/aria-label
-                (By.XPATH, "//button[@title='Novo Destinatário' or @aria-label='Novo Destinatário']"),
-                (By.XPATH, "//a[@title='Novo Destinatário' or @aria-label='Novo Destinatário']"),
-            ]
-            
-            botao_novo_dest_clicado = False
-            for idx, (by, selector) in enumerate(seletores_novo_destinatario, 1):
-                try:
-                    logger.info(f"Tentativa {idx}: Procurando 'Novo Destinatário' com {by}...")
-                    botao = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((by, selector))
-                    )
-                    
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", botao)
-                    time.sleep(0.2)
-                    
-                    try:
-                        botao.click()
-                    except:
-                        self.driver.execute_script("arguments[0].click();", botao)
-                    
-                    logger.info(f"✓ Botão 'Novo Destinatário' clicado com sucesso (tentativa {idx})")
-                    botao_novo_dest_clicado = True
-                    break  # Sai do loop após clicar com sucesso
-                except Exception as e:
-                    logger.debug(f"Tentativa {idx} falhou: {str(e)[:100]}")
-                    continue
-            
-            if not botao_novo_dest_clicado:
-                logger.error("Botão 'Novo Destinatário' não encontrado")
-                self.tirar_screenshot("erro_botao_novo_destinatario.png")
-                
-                print("\n" + "="*80)
-                print("⚠️  AÇÃO MANUAL NECESSÁRIA")
-                print("="*80)
-                print("\n➤ O sistema não conseguiu clicar em 'Novo Destinatário'.")
-                print("➤ Por favor, CLIQUE MANUALMENTE no botão 'Novo Destinatário'.")
-                print("➤ Aguarde o popup/modal abrir e volte aqui.")
-                print("\n⏸️  Pressione ENTER quando o formulário aparecer...")
-                print("="*80 + "\n")
-                input()
-                time.sleep(2)
-            
-            # IMPORTANTE: Aguardar o modal/popup aparecer (detecção rápida)
-            logger.info("Aguardando modal de destinatário abrir...")
-            
-            # Detecta pelo campo de nome que é o primeiro campo do modal
-            modal_apareceu = False
+                self.driver.execute_script("arguments[0].click();", botao)
+            self.esperas.pagina_estavel("nova_pre_postagem")
+            
+            # Remetente sozinho não basta (a confirmação também mostra CEBRASPE): tem que ter o destinatário.
+            # Mesmos seletores do passo 4.5, o que já funcionou primeiro
+            formulario = self.driver.find_elements(By.ID, "buscaDestinatario") or any(
+                self.driver.find_elements(by, seletor)
+                for by, seletor in self.cache_seletores.ordenar("botao_novo_destinatario", SELETORES_NOVO_DESTINATARIO)
+            )
+            if not formulario or not self._remetente_preenchido():
+                logger.info("Continuação: formulário não abriu como esperado, fluxo completo")
+                return False
+        except SessaoExpirada:
+            raise
+        except Exception as e:
+            logger.info(f"Continuação falhou ({str(e)[:100]}), fluxo completo")
+            return False
+        return True
+    
+    def _abrir_nova_pre_postagem(self):
+        """
+        Fluxo completo até o formulário novo: bem-vindo → objetos registrados → Nova pré-postagem → remetente
+        
+        É o caminho do primeiro registro e o fallback quando o modo continuação não reconhece a tela.
+        """
+        # PASSO 1: Garantir que tá na página certa
+        logger.info("Passo 1: Verificando se está na página de pré-postagem...")
+        self.medidor.marcar("1 navegação")
+        url_atual = self.driver.current_url
+        logger.info(f"URL atual: {url_atual}")
+        
+        if not self._na_pre_postagem(url_atual):
+            logger.info("Não está na pré-postagem, navegando...")
+            self.driver.get(config.CORREIOS_PRE_POSTAGEM_URL)
+        else:
+            logger.info("Já está na página de pré-postagem")
+            # Volta pra página inicial da pré-postagem pra garantir que tá tudo limpo
+            self.driver.get(config.CORREIOS_PRE_POSTAGEM_URL)
+        
+        # Aguarda página carregar completamente (antes: 3s + 2s fixos)
+        logger.info("Aguardando página carregar completamente...")
+        self.esperas.pagina_estavel()
+        self.verificar_sessao()
+        
+        self.tirar_screenshot("passo1_pagina_inicial.png")
+        
+        # PASSO 2: Clica em "Pré-postagem a faturar de objetos registrados"
+        logger.info("Passo 2: Procurando link 'Pré-postagem a faturar de objetos registrados'...")
+        self.medidor.marcar("2 objetos registrados")
+        
+        self.tirar_screenshot("passo2_antes_clicar.png")
+        
+        # 10 seletores pra esse botão porque ele muda de lugar/classe dependendo do layout
+        seletores_registrados = [
+            # Texto completo ou parcial no link
+            (By.XPATH, "//a[contains(text(), 'objetos registrados')]"),
+            (By.XPATH, "//a[contains(text(), 'Pré-postagem a faturar')]"),
+            (By.XPATH, "//a[contains(., 'registrados')]"),
+            # Por href
+            (By.XPATH, "//a[contains(@href, 'registrados')]"),
+            (By.XPATH, "//a[contains(@href, 'faturar')]"),
+            # Div ou span clicável
+            (By.XPATH, "//div[contains(text(), 'objetos registrados')]"),
+            (By.XPATH, "//span[contains(text(), 'objetos registrados')]"),
+            # Botão
+            (By.XPATH, "//button[contains(text(), 'objetos registrados')]"),
+            # Classe ou ID
+            (By.CSS_SELECTOR, "[class*='registrados']"),
+            (By.CSS_SELECTOR, "[id*='registrados']"),
+        ]
+        
+        elemento_encontrado = False
+        url_antes = self.driver.current_url
+        elemento, idx = self._localizar("link_registrados", seletores_registrados, acao=self._clicar)
+        if elemento is not None:
+            logger.info(f"✓ Clique realizado com sucesso usando tentativa {idx}")
+            elemento_encontrado = True
+            # Espera a troca de painel (URL nova ou link fora do DOM) e o painel assentar
+            self.esperas.troca_de_tela(elemento, url_antes)
+            self.esperas.pagina_estavel("navegacao")
+        
+        if not elemento_encontrado:
+            # Última cartada: navegação direta pela URL
+            logger.warning("Nenhum seletor funcionou. Tentando navegação direta...")
+            self.driver.get(config.CORREIOS_PRE_POSTAGEM_REGISTRADOS_URL)
+            self.esperas.pagina_estavel()
+            self.verificar_sessao()
+            self.tirar_screenshot("passo2_navegacao_direta.png", categoria='detalhe')
+            logger.info("Navegação direta realizada")
+            
+            # Verifica se deu certo
+            if "registrados" not in self.driver.current_url.lower():
+                # Só pede ajuda manual se realmente não conseguiu
+                self._solicitar_acao_manual(
+                    "link 'objetos registrados' não encontrado",
+                    ["➤ O sistema não conseguiu clicar automaticamente em:",
+                     "   'Pré-postagem a faturar de objetos registrados'",
+                     "\n➤ Por favor, CLIQUE MANUALMENTE nessa opção no navegador.",
+                     "➤ Após clicar e a página carregar, volte aqui."],
+                    "Pressione ENTER quando estiver na tela de objetos registrados..."
+                )
+                self.esperas.pagina_estavel("navegacao")
+        
+        # PASSO 3: Botão "Nova pré postagem"
+        logger.info("Passo 3: Procurando botão 'Nova pré-postagem'...")
+        self.medidor.marcar("3 nova pré-postagem")
+        
+        self.tirar_screenshot("passo3_antes_clicar.png")
+        
+        
+        botao_encontrado = False
+        botao, idx = self._localizar("botao_nova_pre_postagem", SELETORES_NOVA_PRE_POSTAGEM, EC.element_to_be_clickable,
+                                     acao=self._clicar)
+        if botao is not None:
+            logger.info(f"✓ Clique no botão realizado com sucesso usando tentativa {idx}")
+            botao_encontrado = True
+            self.esperas.pagina_estavel("nova_pre_postagem")
+        
+        if not botao_encontrado:
+            logger.error("Botão 'Nova pré postagem' não encontrado")
+            self.tirar_screenshot("erro_passo3_botao_nova_postagem.png")
+            
+            self._solicitar_acao_manual(
+                "botão 'Nova pré-postagem' não encontrado",
+                ["➤ O sistema não conseguiu clicar automaticamente em:",
+                 "   Botão 'Nova pré-postagem'",
+                 "\n➤ Por favor, CLIQUE MANUALMENTE nesse botão no navegador.",
+                 "➤ Após clicar e o formulário abrir, volte aqui."],
+                "Pressione ENTER quando o formulário de nova pré-postagem abrir..."
+            )
+            self.esperas.pagina_estavel("nova_pre_postagem")
+        
+        # PASSO 4: Verifica se remetente já está preenchido, senão preenche com "Cebraspe"
+        # (o formulário já está estável aqui, não precisa mais do sleep de 1s)
+        logger.info("Passo 4: Verificando remetente...")
+        self.medidor.marcar("4 remetente")
+        
+        # Se não estiver preenchido, preenche manualmente
+        if not self._remetente_preenchido():
+            logger.info("Preenchendo remetente 'Cebraspe'...")
             try:
-                # Aguarda o campo de nome aparecer (indicador direto de que o modal está aberto)
-                WebDriverWait(self.driver, 2).until(
-                    EC.presence_of_element_located((By.ID, "nomeDestinatario"))
+                campo_remetente = self.wait.until(
+                    EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Busca de objetos pré-postados pelo código do objeto' or contains(@name, 'remetente') or @id='remetente']"))
                 )
-                logger.info("✓ Modal aberto e pronto para preenchimento")
-                modal_apareceu = True
-                time.sleep(0.1)  # Pausa mínima para estabilizar
-            except:
-                # Fallback: tenta outros seletores
-                logger.debug("Campo nomeDestinatario não encontrado, tentando seletores alternativos...")
-                seletores_modal_fallback = [
-                    (By.XPATH, "//div[contains(@class, 'modal')]//input[@name='nomeDestinatario']"),
-                    (By.XPATH, "//input[@id='cpfCnpjDestinatario']"),
-                    (By.XPATH, "//div[contains(@class, 'modal') and contains(@style, 'display: block')]"),
-                ]
+                campo_remetente.clear()
+                campo_remetente.send_keys("Cebraspe")
                 
-                for by, selector in seletores_modal_fallback:
-                    try:
-                        WebDriverWait(self.driver, 1).until(
-                            EC.presence_of_element_located((by, selector))
-                        )
-                        logger.info("✓ Modal detectado por seletor alternativo")
-                        modal_apareceu = True
-                        time.sleep(0.1)
-                        break
-                    except:
-                        continue
-            
-            if not modal_apareceu:
-                logger.warning("⚠ Modal não detectado automaticamente, aguardando 1s...")
-                time.sleep(1)
-            
-            # PASSO 5: Preenche o formulário do destinatário dentro do modal
-            logger.info("Passo 5: Preenchendo formulário do destinatário no modal...")
-            
-            # Tira screenshot do formulário vazio
-            self.tirar_screenshot(f"formulario_antes_preencher_linha_{dados.get('_linha')}.png")
-            
-            self._preencher_campo_destinatario(dados)
-            
-            logger.info("Formulário preenchido com sucesso")
-            time.sleep(0.3)
+                botao_lupa = self.driver.find_element(By.XPATH, "//button[@type='submit' or contains(@class, 'busca') or contains(., 'Buscar')]")
+                botao_lupa.click()
+                self.esperas.rede_ociosa("remetente")
+                
+                opcao_cebraspe = self.wait.until(
+                    EC.element_to_be_clickable((By.XPATH, "//td[text()='CEBRASPE' or text()='Cebraspe']//parent::tr | //div[contains(text(), 'CEBRASPE')]"))
+                )
+                opcao_cebraspe.click()
+                self.esperas.pagina_estavel("remetente")
+                logger.info("✓ Remetente 'Cebraspe' selecionado com sucesso")
+            except Exception as e:
+                logger.warning(f"Não foi possível selecionar remetente automaticamente: {str(e)}")
+                self.tirar_screenshot("passo4_erro_selecionar_remetente.png", categoria='erro')
+                # Continua mesmo assim - pode ser que já esteja selecionado
+                logger.info("Continuando o processamento...")
+    
+    def processar_postagem(self, dados: Dict) -> Dict:
+        """
+        Processa uma postagem seguindo o fluxo do sistema Correios
+        
+        FLUXO COMPLETO:
+        1. Navegar pra pré-postagem
+        2. Clicar em "Pré-postagem a faturar de objetos registrados"
+        3. Clicar em "Nova pré-postagem"
+        4. Selecionar remetente "CEBRASPE"
+        (Modo continuação: depois do primeiro registro os passos 1-4 viram um clique em
+        "Nova pré-postagem" a partir da confirmação anterior; se a tela não bater, faz o fluxo completo)
+        5. Destinatário já salvo no portal (agenda local)? Busca e seleciona, pula 6 e 7.
+           Senão clica em "Novo Destinatário" (abre modal)
+        6. Preencher formulário dentro do modal
+        7. Clicar em "Salvar" (fecha modal) e registrar na agenda
+        8. Confirmar pré-postagem na tela principal
+        9. Capturar código de rastreamento (do JSON que o portal devolve na confirmação; a tela é plano B)
+        
+        Os seletores (By.NAME, By.XPATH, etc) foram descobertos na base da tentativa e erro
+        com F12 no Chrome. Sempre que o site muda, precisa voltar aqui e ajustar.
+        """
+        codigo_rastreamento = None
+        
+        try:
+            logger.info(f"Processando postagem linha {dados.get('_linha', 'N/A')}")
+            self.capturas.iniciar_registro()
+            self.medidor.iniciar_registro()
+            self._confirmacao_enviada = False
+            self._espera_manual = False
+            logger.info(f"Destinatário: {dados.get('COORDENADOR MUNICIPAL', 'N/A')}")
             
-            self.tirar_screenshot(f"formulario_preenchido_linha_{dados.get('_linha')}.png")
+            if not self.logado:
+                raise Exception("Não está logado no sistema")
+            # Checagem barata entre registros: sessão que caiu durante a pausa nem começa o fluxo
+            self.verificar_sessao()
             
-            # PASSO 5.5: Salva e fecha o modal
-            logger.info("Passo 5.5: Salvando destinatário e fechando modal...")
-            self._salvar_destinatario_modal()
+            if not self._continuar_da_tela_atual():
+                self._abrir_nova_pre_postagem()
             
-            logger.info("Destinatário salvo! Modal fechado. Continuando com confirmação da pré-postagem...")
-            time.sleep(1)
+            # PASSO 4.5: Destinatário que já está salvo no portal só precisa ser selecionado;
+            # senão abre o modal de Novo Destinatário e preenche tudo
+            if not self._selecionar_destinatario_salvo(dados):
+                self._cadastrar_novo_destinatario(dados)
             
             # PASSO 6: Confirmar a pré-postagem (botão final)
             logger.info("Passo 6: Confirmando pré-postagem...")
+            self.medidor.marcar("6 confirmação")
             self._confirmar_postagem(dados)
             
-            # CAPTURA DO CÓDIGO - tenta com 13 seletores diferentes
-            logger.info("Tentando capturar código de rastreamento automaticamente...")
-            time.sleep(1)
-            
-            # Tenta múltiplos seletores possíveis
-            seletores_codigo = [
-                (By.CLASS_NAME, "codigo-rastreamento"),
-                (By.CLASS_NAME, "codigo-objeto"),
-                (By.CLASS_NAME, "tracking-code"),
-                (By.XPATH, "//span[contains(@class, 'codigo')]"),
-                (By.XPATH, "//div[contains(text(), 'Código')]//following-sibling::div"),
-                (By.XPATH, "//label[contains(text(), 'Código')]//following-sibling::*"),
-                (By.XPATH, "//span[contains(text(), 'Código')]//parent::div//following-sibling::*"),
-                (By.XPATH, "//*[contains(text(), 'Rastreamento')]//following-sibling::*"),
-                (By.CSS_SELECTOR, "[class*='tracking'], [class*='rastreamento'], [class*='codigo']"),
-                (By.XPATH, "//input[@readonly and contains(@value, 'AN')]"),
-                (By.XPATH, "//td[contains(text(), 'AN') or contains(text(), 'BR')]"),
-                (By.XPATH, "//strong[contains(text(), 'AN') or contains(text(), 'BR')]"),
-                (By.XPATH, "//p[contains(text(), 'AN') or contains(text(), 'BR')]"),
-            ]
-            
-            codigo_rastreamento = None
-            for by, selector in seletores_codigo:
-                try:
-                    elemento = WebDriverWait(self.driver, 2).until(
-                        EC.presence_of_element_located((by, selector))
-                    )
-                    if elemento:
-                        # Tenta text ou value
-                        codigo = elemento.text.strip() or elemento.get_attribute('value') or ''
-                        if codigo and len(codigo) >= 10:
-                            codigo_rastreamento = codigo
-                            logger.info(f"✓ Código capturado automaticamente: {codigo_rastreamento}")
-                            break
-                except:
-                    continue
+            # CAPTURA DO CÓDIGO - veio na resposta da confirmação? Senão procura na tela (e confere com ela)
+            self.medidor.marcar("7 captura do código")
+            codigo_rastreamento, origem_codigo, alerta_codigo = self._capturar_codigo()
             
             # Se não capturou, registra pra conferir depois no screenshot
             if not codigo_rastreamento:
@@ -969,24 +1510,109 @@ class CorreiosAutomator:
                 codigo_rastreamento = f"NÃO CAPTURADO - VERIFICAR SCREENSHOT sucesso_linha_{dados.get('_linha')}.png"
                 print(f"⚠️  Código não capturado - verifique o screenshot depois: sucesso_linha_{dados.get('_linha')}.png")
             
+            duracao = self.medidor.finalizar_registro('sucesso')
+            self._continuacao_pronta = True
             return {
                 'linha': dados.get('_linha'),
                 'destinatario': dados.get('COORDENADOR MUNICIPAL'),
                 'codigo_rastreamento': codigo_rastreamento,
+                'origem_codigo': origem_codigo,
+                'alerta_codigo': alerta_codigo,
                 'status': 'sucesso',
+                'duracao_s': round(duracao, 1),
+                'espera_manual': self._espera_manual,
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
             
         except Exception as e:
             logger.error(f"Erro ao processar postagem: {str(e)}")
+            duracao = self.medidor.finalizar_registro('erro')
+            # Registro falhou: agora sim os passos guardados em memória valem o disco
+            self.capturas.descarregar_buffer(f"falha_linha_{dados.get('_linha')}")
             return {
                 'linha': dados.get('_linha'),
                 'destinatario': dados.get('COORDENADOR MUNICIPAL'),
                 'erro': str(e),
+                'tipo_erro': type(e).__name__,
                 'status': 'erro',
+                'acao_manual': isinstance(e, AcaoManualNecessaria),
+                'sessao_expirada': isinstance(e, SessaoExpirada),
+                'confirmacao_enviada': self._confirmacao_enviada,
+                'duracao_s': round(duracao, 1),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
     
+    def _capturar_codigo(self) -> tuple:
+        """
+        Código de rastreamento do registro que acabou de ser confirmado
+        
+        Com o código da resposta de rede, a tela só é lida uma vez pra conferir; sem ele, a tela
+        é a fonte e pode esperar até config.TEMPO_CAPTURA_CODIGO_TELA. Divergência (rede x tela,
+        mais de um código válido, código com DV errado) não derruba o registro: vira alerta no relatório.
+        
+        Returns:
+            (código ou None, origem 'rede'/'tela'/None, alerta ou None)
+        """
+        codigo_rede = self._codigo_rede
+        validos, invalidos = self._codigos_na_tela(0 if codigo_rede else config.TEMPO_CAPTURA_CODIGO_TELA)
+        alerta = None
+        
+        if codigo_rede:
+            logger.info(f"✓ Código capturado da resposta do portal: {codigo_rede}")
+            if validos and codigo_rede not in validos:
+                alerta = f"resposta do portal trouxe {codigo_rede}, tela mostra {', '.join(validos)}"
+            return codigo_rede, 'rede', self._avisar_alerta(alerta)
+        
+        if not validos:
+            if invalidos:
+                alerta = f"código(s) com dígito verificador errado na tela: {', '.join(invalidos)}"
+            return None, None, self._avisar_alerta(alerta)
+        
+        codigo = validos[0]
+        if len(validos) > 1:
+            alerta = f"mais de um código válido na tela ({', '.join(validos)}), usado o primeiro"
+        logger.info(f"✓ Código capturado na tela: {codigo}")
+        return codigo, 'tela', self._avisar_alerta(alerta)
+    
+    @staticmethod
+    def _avisar_alerta(alerta: Optional[str]) -> Optional[str]:
+        if alerta:
+            logger.warning(f"⚠ Conferir código de rastreamento: {alerta}")
+        return alerta
+    
+    def _codigos_na_tela(self, timeout: float) -> tuple:
+        """
+        Códigos S10 na tela de confirmação: todos os candidatos numa passada só (um execute_script)
+
+        Os 13 seletores de antes continuam sendo os lugares onde procurar, mas em vez de aceitar
+        o primeiro texto com 10+ caracteres, cada candidato passa pelo validador (formato + DV).
+        Repete a passada até achar um válido ou estourar `timeout` (tela ainda renderizando).
+
+        Returns:
+            (válidos, inválidos) - listas sem repetição, na ordem de prioridade dos seletores;
+            inválido = formato S10 com DV errado
+        """
+        prazo = time.monotonic() + timeout
+        while True:
+            try:
+                textos = self.driver.execute_script(SCRIPT_CANDIDATOS_CODIGO, SELETORES_CODIGO) or []
+            except Exception as e:
+                logger.debug(f"Leitura dos candidatos a código falhou: {str(e)[:80]}")
+                textos = []
+            validos, invalidos = [], []
+            # Último texto é a página inteira: só conta se nenhum seletor trouxe código
+            # (senão lista de pré-postagens anteriores na tela vira "mais de um código")
+            for indice, texto in enumerate(textos):
+                if indice == len(textos) - 1 and (validos or invalidos):
+                    break
+                for codigo in extrair_codigos(texto):
+                    destino = validos if validar_codigo_objeto(codigo) else invalidos
+                    if codigo not in destino:
+                        destino.append(codigo)
+            if validos or time.monotonic() >= prazo:
+                return validos, invalidos
+            time.sleep(config.INTERVALO_CONSULTA_ESPERA)
+    
     def processar_coleta(self, dados: Dict) -> Dict:
         """
         Processa uma solicitação de coleta
@@ -998,12 +1624,15 @@ class CorreiosAutomator:
         
         try:
             logger.info(f"Processando coleta linha {dados.get('_linha', 'N/A')}")
+            self._continuacao_pronta = False
+            self._confirmacao_enviada = False
             
             if not self.logado:
                 raise Exception("Não está logado no sistema")
             
             self.driver.get(config.CORREIOS_COLETA_URL)
-            time.sleep(2)
+            self.esperas.pagina_estavel()
+            self.verificar_sessao(pre_postagem=False)
             
             # Os seletores abaixo são chutes educados - precisam ser validados com o site real
             campo_tipo = self.wait.until(
@@ -1036,8 +1665,9 @@ class CorreiosAutomator:
             
             botao_confirmar = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Solicitar') or contains(text(), 'Confirmar')]")
             botao_confirmar.click()
+            self._confirmacao_enviada = True
             
-            time.sleep(3)
+            self.esperas.pagina_estavel("confirmacao")
             
             try:
                 elemento_codigo = self.wait.until(
@@ -1063,17 +1693,25 @@ class CorreiosAutomator:
                 'linha': dados.get('_linha'),
                 'tipo_objeto': dados.get('Tipo de Objeto', 'N/A'),
                 'erro': str(e),
+                'tipo_erro': type(e).__name__,
                 'status': 'erro',
+                'sessao_expirada': isinstance(e, SessaoExpirada),
+                'confirmacao_enviada': self._confirmacao_enviada,
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
     
-    def tirar_screenshot(self, nome_arquivo: str = "screenshot.png"):
-        """Tira screenshot da tela atual - salva-vidas ao debugar"""
+    def tirar_screenshot(self, nome_arquivo: str = "screenshot.png", categoria: str = None):
+        """
+        Tira screenshot da tela atual - salva-vidas ao debugar
+        
+        Quem decide se vai pro disco é a política de captura (config.NIVEL_SCREENSHOT); a gravação
+        em si é em segundo plano. Categoria: 'erro', 'passo' ou 'detalhe' (sem informar, arquivo
+        começando com 'erro' conta como erro e o resto como passo).
+        """
+        if categoria is None:
+            categoria = 'erro' if nome_arquivo.startswith('erro') else 'passo'
         try:
-            caminho = config.LOGS_DIR / nome_arquivo
-            self.driver.save_screenshot(str(caminho))
-            logger.info(f"Screenshot salvo: {caminho}")
-            return caminho
+            return self.capturas.capturar(self.driver, f"{self.prefixo_capturas}{nome_arquivo}", categoria)
         except Exception as e:
             logger.error(f"Erro ao tirar screenshot: {str(e)}")
             return None
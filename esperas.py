@@ -0,0 +1,220 @@
+"""
+Motor de esperas por condição
+
+Troquei os time.sleep fixos por esperas que terminam assim que o portal responde.
+Cada etapa tem um orçamento de tempo (config.ORCAMENTO_ESPERAS): se a condição
+acontecer antes, segue na hora; se estourar, loga e segue igual ao sleep antigo.
+"""
+import logging
+import time
+from typing import Callable, Optional
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException, StaleElementReferenceException
+import config
+
+logger = logging.getLogger(__name__)
+
+
+# Monitor injetado em toda página: conta XHR/fetch pendentes e marca a última mutação do DOM.
+# Vai via CDP (addScriptToEvaluateOnNewDocument) e também é reinjetado sob demanda se sumir.
+SCRIPT_MONITOR = """
+(function () {
+    if (window.__automacaoMonitor) { return; }
+    var m = window.__automacaoMonitor = {pendentes: 0, ultimaRede: Date.now(), ultimaMutacao: Date.now()};
+    var marcarRede = function () { m.ultimaRede = Date.now(); };
+
+    // Contador só volta pra baixo no fim da requisição - se a chamada estourar na hora (send em XHR
+    // não aberto, fetch com argumento inválido), devolve aqui senão toda espera de rede ociosa estoura
+    var terminar = function () { m.pendentes = Math.max(0, m.pendentes - 1); marcarRede(); };
+
+    var fetchOriginal = window.fetch;
+    if (fetchOriginal) {
+        window.fetch = function () {
+            m.pendentes++; marcarRede();
+            var promessa;
+            try {
+                promessa = fetchOriginal.apply(this, arguments);
+            } catch (erro) {
+                terminar();
+                throw erro;
+            }
+            return promessa.finally(terminar);
+        };
+    }
+
+    var enviarOriginal = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        m.pendentes++; marcarRede();
+        this.addEventListener('loadend', terminar);
+        try {
+            return enviarOriginal.apply(this, arguments);
+        } catch (erro) {
+            // send que lança não dispara loadend
+            this.removeEventListener('loadend', terminar);
+            terminar();
+            throw erro;
+        }
+    };
+
+    var observar = function () {
+        new MutationObserver(function () { m.ultimaMutacao = Date.now(); }).observe(
+            document.documentElement,
+            {childList: true, subtree: true, attributes: true, characterData: true}
+        );
+    };
+    if (document.documentElement) { observar(); } else { document.addEventListener('DOMContentLoaded', observar); }
+})();
+"""
+
+SCRIPT_ESTADO = SCRIPT_MONITOR + """
+var m = window.__automacaoMonitor;
+return {
+    prontidao: document.readyState,
+    pendentes: m.pendentes,
+    desdeRede: Date.now() - m.ultimaRede,
+    desdeMutacao: Date.now() - m.ultimaMutacao
+};
+"""
+
+
+# Localizadores de campos que o portal preenche sozinho depois da busca de CEP
+CAMPOS_AUTOFILL_CEP = [
+    (By.ID, "logradouroDestinatario"),
+    (By.ID, "bairroDestinatario"),
+    (By.ID, "cidadeDestinatario"),
+    (By.ID, "ufDestinatario"),
+]
+
+
+class Esperas:
+    """Esperas orientadas a condição com orçamento de latência por etapa"""
+
+    def __init__(self, driver, orcamentos: Optional[dict] = None):
+        self.driver = driver
+        self.orcamentos = dict(config.ORCAMENTO_ESPERAS)
+        if orcamentos:
+            self.orcamentos.update(orcamentos)
+
+    def instalar_monitor(self):
+        """Registra o monitor de rede/DOM para rodar em todo documento novo (só Chrome)"""
+        try:
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": SCRIPT_MONITOR})
+        except Exception as e:
+            # Sem CDP o monitor é injetado na primeira consulta de estado, perde só as requisições iniciais
+            logger.debug(f"Monitor via CDP indisponível: {str(e)[:80]}")
+
+    def orcamento(self, etapa: str) -> float:
+        """Tempo máximo (s) que a etapa pode esperar"""
+        return self.orcamentos.get(etapa, config.TEMPO_ESPERA_ELEMENTO)
+
+    def ate(self, condicao: Callable, etapa: str, descricao: str = ""):
+        """
+        Espera a condição ficar verdadeira dentro do orçamento da etapa
+
+        Returns:
+            O valor retornado pela condição, ou None se o orçamento estourou
+        """
+        limite = self.orcamento(etapa)
+        inicio = time.perf_counter()
+        try:
+            resultado = WebDriverWait(
+                self.driver, limite,
+                poll_frequency=config.INTERVALO_CONSULTA_ESPERA,
+                ignored_exceptions=(StaleElementReferenceException,)
+            ).until(condicao)
+            logger.debug(f"Espera '{etapa}' {descricao} ok em {time.perf_counter() - inicio:.2f}s")
+            return resultado
+        except TimeoutException:
+            logger.info(f"Espera '{etapa}' {descricao} estourou o orçamento de {limite}s - seguindo")
+            return None
+
+    def _estado(self) -> dict:
+        try:
+            return self.driver.execute_script(SCRIPT_ESTADO) or {}
+        except WebDriverException:
+            # Página trocando no meio da consulta - trata como "ainda não estável"
+            return {}
+
+    def _quieto(self, quietude: float, rede: bool = True, dom: bool = True) -> Callable:
+        quietude_ms = quietude * 1000
+
+        def condicao(driver):
+            estado = self._estado()
+            if estado.get('prontidao') != 'complete':
+                return False
+            if rede and (estado.get('pendentes', 1) > 0 or estado.get('desdeRede', 0) < quietude_ms):
+                return False
+            if dom and estado.get('desdeMutacao', 0) < quietude_ms:
+                return False
+            return True
+
+        return condicao
+
+    def pagina_estavel(self, etapa: str = "pagina_estavel", quietude: float = None):
+        """Página carregada, sem XHR pendente e sem mutação no DOM há `quietude` segundos"""
+        quietude = quietude if quietude is not None else config.QUIETUDE_ESPERA
+        return self.ate(self._quieto(quietude), etapa, "(página estável)")
+
+    def rede_ociosa(self, etapa: str = "rede_ociosa", quietude: float = None):
+        """Nenhuma requisição XHR/fetch em andamento há `quietude` segundos"""
+        quietude = quietude if quietude is not None else config.QUIETUDE_ESPERA
+        return self.ate(self._quieto(quietude, dom=False), etapa, "(rede ociosa)")
+
+    def dom_estavel(self, etapa: str = "dom_estavel", quietude: float = None):
+        """DOM sem mutações há `quietude` segundos"""
+        quietude = quietude if quietude is not None else config.QUIETUDE_ESPERA
+        return self.ate(self._quieto(quietude, rede=False), etapa, "(DOM estável)")
+
+    def visivel(self, localizador: tuple, etapa: str = "modal_abrir"):
+        """Elemento presente e visível"""
+        return self.ate(EC.visibility_of_element_located(localizador), etapa, f"(visível {localizador[1]})")
+
+    def invisivel(self, localizador: tuple, etapa: str = "modal_fechar"):
+        """Elemento (ex: campo do modal) sumiu ou ficou invisível"""
+        return self.ate(EC.invisibility_of_element_located(localizador), etapa, f"(invisível {localizador[1]})")
+
+    def obsoleto(self, elemento, etapa: str = "navegacao"):
+        """Elemento saiu do DOM - sinal de que a página/painel foi trocado"""
+        return self.ate(EC.staleness_of(elemento), etapa, "(elemento obsoleto)")
+
+    def campo_preenchido(self, localizadores: list, etapa: str = "autofill_cep", quietude: float = None):
+        """
+        Algum dos campos ganhou valor (autopreenchimento do CEP) ou a rede ficou ociosa sem preencher nada
+
+        A segunda saída é o que evita pagar o orçamento inteiro quando o CEP não existe na base do portal.
+        """
+        quietude = quietude if quietude is not None else config.QUIETUDE_ESPERA
+        rede_quieta = self._quieto(quietude, dom=False)
+        # A busca do CEP pode ter debounce - só aceita "rede ociosa" depois de dar tempo dela começar
+        aceita_ociosa_em = time.perf_counter() + 2 * quietude
+
+        def condicao(driver):
+            for by, selector in localizadores:
+                for campo in driver.find_elements(by, selector):
+                    if (campo.get_attribute('value') or '').strip():
+                        return 'preenchido'
+            if time.perf_counter() < aceita_ociosa_em:
+                return False
+            return 'rede_ociosa' if rede_quieta(driver) else False
+
+        return self.ate(condicao, etapa, "(autopreenchimento)")
+
+    def url_mudou(self, url_anterior: str, etapa: str = "navegacao"):
+        """URL diferente da anterior (navegação de SPA sem reload)"""
+        return self.ate(lambda driver: driver.current_url != url_anterior, etapa, "(troca de URL)")
+
+    def troca_de_tela(self, elemento, url_anterior: str, etapa: str = "navegacao"):
+        """
+        O elemento clicado saiu do DOM ou a URL mudou - o que vier primeiro
+
+        Link de menu costuma continuar na tela depois da navegação do SPA,
+        então só staleness faria a espera estourar o orçamento toda vez.
+        """
+        obsoleto = EC.staleness_of(elemento)
+
+        def condicao(driver):
+            return driver.current_url != url_anterior or obsoleto(driver)
+
+        return self.ate(condicao, etapa, "(troca de tela)")
@@ -0,0 +1,154 @@
+"""
+Pool de etiquetas (códigos de rastreamento) reservadas em lote
+
+Antes cada registro custava uma ida ao web service pra reservar 1 etiqueta e outra pra pedir
+o dígito verificador. Agora uma chamada só reserva uma faixa inteira pro contrato/serviço,
+o DV é calculado aqui mesmo (módulo 11, o mesmo algoritmo do SIGEP) e as etiquetas ficam
+num arquivo JSON. Pegar o código de um registro vira uma operação local.
+
+Cada etiqueta entregue é gravada no disco antes de ser usada - se o processo morrer,
+ela não é entregue de novo (código duplicado é pior que etiqueta desperdiçada).
+"""
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+PESOS_DV = [8, 6, 4, 2, 3, 5, 9, 7]
+# Formato S10: 2 letras + 8 dígitos + DV + 2 letras. Na tela às vezes vem com espaço entre as partes
+PADRAO_S10 = re.compile(r"(?<![A-Z0-9])([A-Z]{2}) ?(\d{8}) ?(\d) ?([A-Z]{2})(?![A-Z0-9])", re.IGNORECASE)
+
+
+def calcular_digito_verificador(numero: str) -> int:
+    """
+    DV módulo 11 dos objetos dos Correios
+
+    Args:
+        numero: Os 8 dígitos da etiqueta (ex: '76023727' de 'DL76023727 BR')
+    """
+    if len(numero) != 8 or not numero.isdigit():
+        raise ValueError(f"Número de etiqueta inválido: {numero}")
+    resto = sum(int(d) * p for d, p in zip(numero, PESOS_DV)) % 11
+    if resto == 0:
+        return 5
+    if resto == 1:
+        return 0
+    return 11 - resto
+
+
+def montar_codigo(prefixo: str, numero: int, sufixo: str) -> str:
+    """Código completo: prefixo + 8 dígitos + DV + sufixo (ex: DL760237272BR)"""
+    digitos = f"{numero:08d}"
+    return f"{prefixo}{digitos}{calcular_digito_verificador(digitos)}{sufixo}"
+
+
+def validar_codigo_objeto(codigo: str) -> bool:
+    """Código no formato S10 com o DV conferindo (ex: 'DL760237272BR' ou 'dl 76023727 2 br')"""
+    encontrado = PADRAO_S10.fullmatch((codigo or "").strip())
+    if not encontrado:
+        return False
+    return int(encontrado.group(3)) == calcular_digito_verificador(encontrado.group(2))
+
+
+def extrair_codigos(texto: str) -> List[str]:
+    """
+    Tudo que tem cara de código S10 no texto, normalizado (maiúsculo, sem espaço) e sem repetição
+
+    Não confere o DV - quem chama separa com validar_codigo_objeto (o inválido também interessa:
+    código com DV errado na tela é sinal de captura errada e vai pro relatório)
+    """
+    codigos = []
+    for encontrado in PADRAO_S10.finditer(texto or ""):
+        codigo = "".join(encontrado.groups()).upper()
+        if codigo not in codigos:
+            codigos.append(codigo)
+    return codigos
+
+
+class PoolEtiquetas:
+
+    def __init__(self, cliente=None, caminho: Optional[Path] = None, tamanho_reserva: int = None,
+                 contrato: str = None, codigo_servico: str = None):
+        """
+        Args:
+            cliente: CorreiosApiClient usado pra reservar faixas novas quando o pool esvazia
+            caminho: Arquivo JSON do pool (padrão: config.ARQUIVO_POOL_ETIQUETAS)
+            tamanho_reserva: Quantas etiquetas pedir por chamada (padrão: config.ETIQUETAS_RESERVA_LOTE)
+            contrato/codigo_servico: Chave do pool (padrão: config.API_CONTRATO/API_CODIGO_SERVICO)
+        """
+        self.cliente = cliente
+        self.caminho = Path(caminho or config.ARQUIVO_POOL_ETIQUETAS)
+        self.tamanho_reserva = tamanho_reserva or config.ETIQUETAS_RESERVA_LOTE
+        self.chave = f"{contrato or config.API_CONTRATO}:{codigo_servico or config.API_CODIGO_SERVICO}"
+        self._lock = threading.RLock()
+        self._pools = self._carregar()
+        # Cada faixa: [prefixo, próximo número, último número, sufixo]
+        self.faixas: List[list] = self._pools.setdefault(self.chave, [])
+
+    def _carregar(self) -> dict:
+        if not self.caminho.exists():
+            return {}
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                pools = json.load(f)
+            logger.info(f"Pool de etiquetas carregado: {sum(f[2] - f[1] + 1 for f in pools.get(self.chave, []))} disponíveis")
+            return pools
+        except Exception as e:
+            # Arquivo ilegível: perde as etiquetas reservadas (sobram no SIGEP), mas não repete código
+            logger.warning(f"Pool de etiquetas ilegível, começando vazio: {str(e)}")
+            return {}
+
+    def _salvar(self):
+        """Escrita atômica - chamada com o lock segurado"""
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self._pools, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+
+    def disponiveis(self) -> int:
+        with self._lock:
+            return sum(fim - proximo + 1 for _, proximo, fim, _ in self.faixas)
+
+    def adicionar_faixa(self, prefixo: str, inicio: int, fim: int, sufixo: str):
+        """Guarda uma faixa reservada no SIGEP (ex: DL76023727 BR até DL76023826 BR)"""
+        with self._lock:
+            self.faixas.append([prefixo, inicio, fim, sufixo])
+            self._salvar()
+        logger.info(f"Pool de etiquetas: faixa {prefixo}{inicio:08d}{sufixo}-{prefixo}{fim:08d}{sufixo} reservada")
+
+    def reservar(self, quantidade: int = None):
+        """Reserva uma faixa nova no web service (uma chamada só, sem pedir DV)"""
+        if self.cliente is None:
+            raise RuntimeError("Pool de etiquetas vazio e sem cliente da API pra reservar mais")
+        prefixo, inicio, fim, sufixo = self.cliente.solicitar_faixa(quantidade or self.tamanho_reserva)
+        self.adicionar_faixa(prefixo, inicio, fim, sufixo)
+
+    def proximo(self) -> str:
+        """Entrega o próximo código (com DV) e já tira ele do pool no disco"""
+        with self._lock:
+            if not self.faixas:
+                # Reserva segurando o lock: as outras threads esperam a faixa nova em vez de reservar também
+                self.reservar()
+            faixa = self.faixas[0]
+            prefixo, numero, fim, sufixo = faixa
+            if numero >= fim:
+                self.faixas.pop(0)
+            else:
+                faixa[1] = numero + 1
+            self._salvar()
+        return montar_codigo(prefixo, numero, sufixo)
+
+
+if __name__ == "__main__":
+    # Exemplo do manual do SIGEP: DL76023727 BR -> DV 2
+    print(montar_codigo("DL", 76023727, "BR"))
+    print(validar_codigo_objeto("DL 76023727 2 BR"), validar_codigo_objeto("DL760237273BR"))
@@ -3,15 +3,25 @@ Módulo para manipulação de planilhas Excel
 
 Lidar com Excel em Python é sempre uma dor de cabeça, mas pandas + openpyxl resolvem bem.
 """
+import numpy as np
 import pandas as pd
 import logging
+from itertools import compress
+from operator import methodcaller
+from openpyxl import load_workbook
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime
 import config
+from indice_cep import carregar_indice_cep, cep_para_inteiro
 
 logger = logging.getLogger(__name__)
 
+# Esses campos são obrigatórios - aprendi isso testando com dados reais da Pasta3.xlsx
+CAMPOS_OBRIGATORIOS = ['COORDENADOR MUNICIPAL', 'CEP', 'LOGRADOURO', 'CIDADE', 'UF.1']
+# Tem gente que coloca "S/Nº", "SN", ou deixa vazio
+NUMEROS_SEM_NUMERO = ['S/Nº', 'S/N', 'SN', '']
+
 
 class ExcelHandler:
     
@@ -24,6 +34,7 @@ class ExcelHandler:
         """
         self.arquivo_entrada = arquivo_entrada or config.ARQUIVO_ENTRADA
         self.caminho_entrada = config.DADOS_DIR / self.arquivo_entrada
+        self.indice_cep = carregar_indice_cep()
         
     def ler_dados_postagem(self) -> List[Dict]:
         """
@@ -51,6 +62,129 @@ class ExcelHandler:
             logger.error(f"Erro ao ler planilha: {str(e)}")
             raise
     
+    def iterar_dados_postagem(self) -> Iterator[Dict]:
+        """
+        Lê a planilha linha a linha (openpyxl read-only), sem carregar tudo em memória
+        
+        Com 100k linhas o pd.read_excel + to_dict chegava a ter 3 cópias da planilha na memória
+        e nada começava antes da última linha ser lida. Aqui cada registro sai assim que é lido.
+        Os nomes das colunas seguem o pandas (coluna repetida vira 'UF.1'), então o resto do
+        sistema não percebe diferença.
+        
+        Yields:
+            Dicionário de cada linha não vazia
+        """
+        if not self.caminho_entrada.exists():
+            logger.error(f"Arquivo não encontrado: {self.caminho_entrada}")
+            raise FileNotFoundError(f"Arquivo {self.caminho_entrada} não encontrado")
+        
+        logger.info(f"Lendo arquivo (streaming): {self.caminho_entrada}")
+        wb = load_workbook(self.caminho_entrada, read_only=True, data_only=True)
+        try:
+            aba = config.ABA_PRINCIPAL
+            ws = wb.worksheets[aba] if isinstance(aba, int) else wb[aba]
+            linhas = ws.iter_rows(values_only=True)
+            
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                return
+            colunas = self._nomes_colunas(cabecalho)
+            
+            total = 0
+            for valores in linhas:
+                if all(v is None or (isinstance(v, str) and not v.strip()) for v in valores):
+                    continue
+                registro = dict.fromkeys(colunas)
+                registro.update(zip(colunas, valores))
+                total += 1
+                yield registro
+            
+            logger.info(f"Total de {total} registros lidos")
+        finally:
+            wb.close()
+    
+    @staticmethod
+    def _nomes_colunas(cabecalho: tuple) -> List[str]:
+        """Mesmos nomes que o pandas daria (repetida ganha .1, .2; vazia vira 'Unnamed: N')"""
+        cabecalho = list(cabecalho)
+        while cabecalho and cabecalho[-1] is None:
+            cabecalho.pop()
+        
+        colunas = []
+        contagem = {}
+        for i, nome in enumerate(cabecalho):
+            nome = f"Unnamed: {i}" if nome is None else nome
+            if nome in contagem:
+                base = nome
+                while True:
+                    contagem[base] += 1
+                    nome = f"{base}.{contagem[base]}"
+                    if nome not in contagem:
+                        break
+            contagem[nome] = 0
+            colunas.append(nome)
+        return colunas
+    
+    def iterar_registros_validados(self) -> Iterator[Dict]:
+        """
+        Lê e valida em streaming
+        
+        Yields:
+            Cada registro já com '_linha' (mesma numeração do validar_dados) e '_erros' se for inválido
+        """
+        # Valida em blocos pra usar o caminho vetorizado sem segurar a planilha inteira
+        lote = []
+        linha_inicial = 2
+        for registro in self.iterar_dados_postagem():
+            lote.append(registro)
+            if len(lote) >= config.TAMANHO_LOTE_VALIDACAO:
+                self._validar_lote(lote, linha_inicial)
+                yield from lote
+                linha_inicial += len(lote)
+                lote = []
+        self._validar_lote(lote, linha_inicial)
+        yield from lote
+    
+    def _validar_registro(self, registro: Dict) -> List[str]:
+        """Lista de erros de um registro (vazia = válido) - referência das regras do _validar_lote"""
+        erros = []
+        cep_no_indice = False
+        
+        for campo in CAMPOS_OBRIGATORIOS:
+            if campo not in registro or pd.isna(registro[campo]) or str(registro[campo]).strip() == '':
+                erros.append(f"Campo obrigatório '{campo}' está vazio")
+        
+        if 'CEP' in registro and not pd.isna(registro['CEP']):
+            cep = str(registro['CEP']).replace('-', '').replace('.', '').strip()
+            if not cep.isdigit() or len(cep) != 8:
+                erros.append(f"CEP inválido: {registro['CEP']}")
+            elif self.indice_cep is not None:
+                cep_no_indice = True
+        
+        # Validação flexível para número porque tem gente que coloca "S/Nº", "SN", ou deixa vazio
+        if 'NÚMERO' in registro and not pd.isna(registro['NÚMERO']):
+            numero = str(registro['NÚMERO']).strip().upper()
+            if numero not in NUMEROS_SEM_NUMERO and not numero.replace(' ', '').isdigit():
+                erros.append(f"Número inválido: {registro['NÚMERO']}")
+        
+        if cep_no_indice:
+            erros.extend(self._conferir_no_indice(registro))
+        
+        return erros
+    
+    def _conferir_no_indice(self, registro: Dict) -> List[str]:
+        """CEP existe e bate com UF/CIDADE da planilha? (só chamado com CEP de 8 dígitos)"""
+        numero = cep_para_inteiro(registro['CEP'])
+        id_localidade = -1 if numero is None else int(self.indice_cep.consultar_ids([numero])[0])
+        if id_localidade < 0:
+            return [f"CEP não encontrado: {registro['CEP']}"]
+        return self.indice_cep.conferir(id_localidade, self._valor(registro, 'CIDADE'), self._valor(registro, 'UF.1'))
+    
+    @staticmethod
+    def _valor(registro: Dict, campo: str):
+        valor = registro.get(campo)
+        return None if valor is None or pd.isna(valor) else valor
+    
     def validar_dados(self, dados: List[Dict]) -> tuple:
         """
         Valida os dados lidos da planilha
@@ -61,41 +195,88 @@ class ExcelHandler:
         Returns:
             Tupla (dados_validos, dados_invalidos)
         """
-        dados_validos = []
-        dados_invalidos = []
+        invalido = self._validar_lote(dados)
+        dados_validos = list(compress(dados, ~invalido))
+        dados_invalidos = list(compress(dados, invalido))
         
-        # Esses campos são obrigatórios - aprendi isso testando com dados reais da Pasta3.xlsx
-        campos_obrigatorios = ['COORDENADOR MUNICIPAL', 'CEP', 'LOGRADOURO', 'CIDADE', 'UF.1']
+        logger.info(f"Validação concluída: {len(dados_validos)} válidos, {len(dados_invalidos)} inválidos")
+        return dados_validos, dados_invalidos
+    
+    def _validar_lote(self, dados: List[Dict], linha_inicial: int = 2) -> np.ndarray:
+        """
+        Marca '_linha' (e '_erros' nos inválidos) em cada registro do lote
         
-        for idx, registro in enumerate(dados, start=2):
-            erros = []
-            
-            for campo in campos_obrigatorios:
-                if campo not in registro or pd.isna(registro[campo]) or str(registro[campo]).strip() == '':
-                    erros.append(f"Campo obrigatório '{campo}' está vazio")
-            
-            if 'CEP' in registro and not pd.isna(registro['CEP']):
-                cep = str(registro['CEP']).replace('-', '').replace('.', '').strip()
-                if not cep.isdigit() or len(cep) != 8:
-                    erros.append(f"CEP inválido: {registro['CEP']}")
-            
-            # Validação flexível para número porque tem gente que coloca "S/Nº", "SN", ou deixa vazio
-            if 'NÚMERO' in registro and not pd.isna(registro['NÚMERO']):
-                numero = str(registro['NÚMERO']).strip().upper()
-                if numero not in ['S/Nº', 'S/N', 'SN', ''] and not numero.replace(' ', '').isdigit():
-                    erros.append(f"Número inválido: {registro['NÚMERO']}")
-            
+        Mesmas regras do _validar_registro, só que coluna a coluna: cada regra vira uma máscara
+        booleana (NumPy) calculada numa passada pela coluna, e as máscaras são combinadas de uma vez.
+        Com 100k+ linhas o loop registro a registro (pd.isna escalar campo a campo) segurava tudo
+        antes do navegador abrir. A lista de erros só é montada pras linhas que falharam.
+        
+        Returns:
+            Máscara dos registros inválidos
+        """
+        total = len(dados)
+        if not total:
+            return np.zeros(0, dtype=bool)
+        
+        # Só as colunas que as regras usam, montadas de uma vez pelo pandas (chave ausente vira NaN)
+        tabela = pd.DataFrame(dados, columns=CAMPOS_OBRIGATORIOS + ['NÚMERO'], dtype=object)
+        ausentes = tabela.isna()
+        
+        def vetor(valores):
+            return np.fromiter(valores, dtype=object, count=total)
+        
+        # As operações de texto vão coluna inteira por map() com métodos de str - o loop fica em C,
+        # sem frame Python por célula. str() de quem já é texto devolve o próprio objeto.
+        textos = {campo: vetor(map(str, tabela[campo].tolist())) for campo in tabela.columns}
+        
+        # Cada verificação vira (máscara de falha, valores originais, mensagem) - na ordem do _validar_registro
+        verificacoes = []
+        for campo in CAMPOS_OBRIGATORIOS:
+            vazio = ausentes[campo].to_numpy() | (vetor(map(str.strip, textos[campo])) == '')
+            verificacoes.append((vazio, None, f"Campo obrigatório '{campo}' está vazio"))
+        
+        cep = vetor(map(str.strip, map(methodcaller('replace', '.', ''), map(methodcaller('replace', '-', ''), textos['CEP']))))
+        cep_ok = (np.fromiter(map(len, cep), dtype=np.int64, count=total) == 8) & \
+            np.fromiter(map(str.isdigit, cep), dtype=bool, count=total)
+        verificacoes.append((~ausentes['CEP'].to_numpy() & ~cep_ok, tabela['CEP'].to_numpy(), "CEP inválido: {}"))
+        
+        numero = vetor(map(str.upper, map(str.strip, textos['NÚMERO'])))
+        sem_numero = set(NUMEROS_SEM_NUMERO)
+        numero_ok = np.fromiter(map(sem_numero.__contains__, numero), dtype=bool, count=total) | \
+            np.fromiter(map(str.isdigit, map(methodcaller('replace', ' ', ''), numero)), dtype=bool, count=total)
+        verificacoes.append((~ausentes['NÚMERO'].to_numpy() & ~numero_ok, tabela['NÚMERO'].to_numpy(), "Número inválido: {}"))
+        
+        # Índice de CEP: uma busca binária vetorizada pra todos os CEPs bem formados do lote
+        conferir_indice = np.zeros(total, dtype=bool)
+        if self.indice_cep is not None:
+            cep_bom = ~ausentes['CEP'].to_numpy() & cep_ok
+            ids = np.full(total, -1, dtype=np.int64)
+            ids[cep_bom] = self.indice_cep.consultar_ids(np.array(list(map(int, cep[cep_bom])), dtype=np.int64))
+            verificacoes.append((cep_bom & (ids < 0), tabela['CEP'].to_numpy(), "CEP não encontrado: {}"))
+            # UF/cidade: comparação por texto normalizado, só nos CEPs encontrados
+            conferir_indice = cep_bom & (ids >= 0)
+        
+        invalido = np.logical_or.reduce([falhas for falhas, _, _ in verificacoes])
+        erros_indice = {}
+        for posicao in np.flatnonzero(conferir_indice):
+            registro = dados[posicao]
+            erros = self.indice_cep.conferir(int(ids[posicao]), self._valor(registro, 'CIDADE'), self._valor(registro, 'UF.1'))
             if erros:
-                registro['_linha'] = idx
-                registro['_erros'] = erros
-                dados_invalidos.append(registro)
-                logger.warning(f"Linha {idx} com erros: {', '.join(erros)}")
-            else:
-                registro['_linha'] = idx
-                dados_validos.append(registro)
+                erros_indice[posicao] = erros
+                invalido[posicao] = True
         
-        logger.info(f"Validação concluída: {len(dados_validos)} válidos, {len(dados_invalidos)} inválidos")
-        return dados_validos, dados_invalidos
+        for idx, registro in enumerate(dados, start=linha_inicial):
+            registro['_linha'] = idx
+        for posicao in np.flatnonzero(invalido):
+            erros = [
+                mensagem.format(original[posicao]) if original is not None else mensagem
+                for falhas, original, mensagem in verificacoes if falhas[posicao]
+            ]
+            erros += erros_indice.get(posicao, [])
+            dados[posicao]['_erros'] = erros
+            logger.warning(f"Linha {linha_inicial + posicao} com erros: {', '.join(erros)}")
+        
+        return invalido
     
     def criar_planilha_template(self, tipo: str = "postagem"):
         """Cria uma planilha template para preenchimento"""
@@ -83,7 +83,7 @@ cls
 
 REM Executa o programa principal
 color 0B
-python main.py
+python main.py %*
 
 REM Verifica o resultado da execução
 if errorlevel 1 (
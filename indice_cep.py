@@ -0,0 +1,195 @@
+"""
+Índice local de CEPs (faixas de CEP -> cidade/UF/bairro)
+
+CEP inexistente só aparecia no navegador, depois de digitar e esperar a busca do portal.
+Com o índice local a planilha é conferida antes (CEP desconhecido, UF ou cidade trocada)
+e o preenchimento pode pular a espera do autopreenchimento quando o endereço já é conhecido.
+
+Formato no disco (gerado por `python indice_cep.py construir faixas.csv`):
+  - indice_cep.npy: array (N, 3) uint32 ordenado [cep inicial, cep final, id da localidade],
+    carregado com mmap - o SO só traz pra memória as páginas consultadas
+  - indice_cep_localidades.json: lista [cidade, uf, bairro] indexada pelo id
+
+O CSV de origem (ex: exportado das faixas do DNE) tem cabeçalho cep_inicial;cep_final;cidade;uf;bairro
+(bairro opcional). Faixas de bairro dentro da faixa da cidade são permitidas - a mais específica vence.
+"""
+import csv
+import heapq
+import json
+import logging
+import sys
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import config
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=65536)
+def normalizar_nome(texto) -> str:
+    """'São  João d'Aliança' e 'SAO JOAO D ALIANCA' viram a mesma coisa"""
+    if texto is None:
+        return ''
+    sem_acento = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    limpo = ''.join(c if c.isalnum() else ' ' for c in sem_acento.upper())
+    return ' '.join(limpo.split())
+
+
+def cep_para_inteiro(cep) -> Optional[int]:
+    """'70.000-000', 70000000 ou '70000000' -> 70000000 (None se não tiver 8 dígitos)"""
+    if cep is None or (isinstance(cep, float) and cep != cep):
+        return None
+    if isinstance(cep, float) and cep.is_integer():
+        cep = int(cep)
+    texto = str(cep).replace('-', '').replace('.', '').strip()
+    if len(texto) != 8 or not texto.isdigit():
+        return None
+    return int(texto)
+
+
+class IndiceCEP:
+
+    def __init__(self, caminho_faixas: Path = None, caminho_localidades: Path = None):
+        """
+        Args:
+            caminho_faixas: .npy das faixas (padrão: config.ARQUIVO_INDICE_CEP)
+            caminho_localidades: JSON das localidades (padrão: config.ARQUIVO_LOCALIDADES_CEP)
+        """
+        self.caminho_faixas = Path(caminho_faixas or config.ARQUIVO_INDICE_CEP)
+        self.caminho_localidades = Path(caminho_localidades or config.ARQUIVO_LOCALIDADES_CEP)
+
+        self.faixas = np.load(self.caminho_faixas, mmap_mode='r')
+        self.inicios = self.faixas[:, 0]
+        with open(self.caminho_localidades, 'r', encoding='utf-8') as f:
+            self.localidades: List[List[str]] = json.load(f)
+        # Pra comparar com a planilha sem se preocupar com acento/caixa
+        self._cidades_normalizadas = [normalizar_nome(cidade) for cidade, _, _ in self.localidades]
+        logger.info(f"Índice de CEP carregado: {len(self.faixas)} faixas, {len(self.localidades)} localidades")
+
+    def consultar_ids(self, ceps: np.ndarray) -> np.ndarray:
+        """Id da localidade de cada CEP (busca binária vetorizada), -1 se não estiver em nenhuma faixa"""
+        ceps = np.asarray(ceps, dtype=np.int64)
+        posicoes = np.searchsorted(self.inicios, ceps, side='right') - 1
+        validas = posicoes >= 0
+        posicoes_seguras = np.where(validas, posicoes, 0)
+        dentro = validas & (ceps <= self.faixas[posicoes_seguras, 1])
+        return np.where(dentro, self.faixas[posicoes_seguras, 2].astype(np.int64), -1)
+
+    def consultar(self, cep) -> Optional[Dict[str, str]]:
+        """{'cidade', 'uf', 'bairro'} do CEP, ou None se não existir no índice"""
+        numero = cep_para_inteiro(cep)
+        if numero is None:
+            return None
+        id_localidade = int(self.consultar_ids(np.array([numero]))[0])
+        if id_localidade < 0:
+            return None
+        cidade, uf, bairro = self.localidades[id_localidade]
+        return {'cidade': cidade, 'uf': uf, 'bairro': bairro}
+
+    def conferir(self, id_localidade: int, cidade, uf) -> List[str]:
+        """Erros de UF/cidade da planilha contra a localidade do CEP (vazio = confere)"""
+        erros = []
+        cidade_indice, uf_indice, _ = self.localidades[id_localidade]
+        uf_planilha = str(uf).strip().upper() if uf is not None else ''
+        if uf_planilha and uf_planilha != uf_indice:
+            erros.append(f"UF não confere com o CEP: {uf} (CEP é de {uf_indice})")
+        cidade_planilha = normalizar_nome(cidade)
+        if cidade_planilha and cidade_planilha != self._cidades_normalizadas[id_localidade]:
+            erros.append(f"Cidade não confere com o CEP: {cidade} (CEP é de {cidade_indice})")
+        return erros
+
+
+def _achatar_faixas(faixas: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    Transforma faixas possivelmente aninhadas em faixas disjuntas (a mais curta vence)
+
+    Varredura pelos pontos de início/fim com um heap das faixas ativas ordenado por tamanho.
+    """
+    pontos = sorted({inicio for inicio, _, _ in faixas} | {fim + 1 for _, fim, _ in faixas})
+    por_inicio = sorted(faixas)
+    ativas = []  # (tamanho, fim, id)
+    resultado = []
+    proxima = 0
+    for ponto, seguinte in zip(pontos, pontos[1:]):
+        while proxima < len(por_inicio) and por_inicio[proxima][0] == ponto:
+            inicio, fim, id_localidade = por_inicio[proxima]
+            heapq.heappush(ativas, (fim - inicio, fim, id_localidade))
+            proxima += 1
+        while ativas and ativas[0][1] < ponto:
+            heapq.heappop(ativas)
+        if not ativas:
+            continue
+        id_localidade = ativas[0][2]
+        if resultado and resultado[-1][2] == id_localidade and resultado[-1][1] == ponto - 1:
+            resultado[-1] = (resultado[-1][0], seguinte - 1, id_localidade)
+        else:
+            resultado.append((ponto, seguinte - 1, id_localidade))
+    return resultado
+
+
+def construir_indice(caminho_csv: Path, caminho_faixas: Path = None, caminho_localidades: Path = None) -> int:
+    """
+    Gera os arquivos do índice a partir do CSV de faixas
+
+    Returns:
+        Quantidade de faixas no índice final
+    """
+    caminho_faixas = Path(caminho_faixas or config.ARQUIVO_INDICE_CEP)
+    caminho_localidades = Path(caminho_localidades or config.ARQUIVO_LOCALIDADES_CEP)
+
+    localidades: List[List[str]] = []
+    ids: Dict[Tuple[str, str, str], int] = {}
+    faixas = []
+    with open(caminho_csv, 'r', encoding='utf-8-sig', newline='') as f:
+        amostra = f.read(4096)
+        f.seek(0)
+        leitor = csv.DictReader(f, dialect=csv.Sniffer().sniff(amostra, delimiters=';,\t'))
+        for numero, linha in enumerate(leitor, 2):
+            inicio, fim = cep_para_inteiro(linha.get('cep_inicial')), cep_para_inteiro(linha.get('cep_final'))
+            if inicio is None or fim is None or fim < inicio:
+                logger.warning(f"Índice de CEP: linha {numero} com faixa inválida, ignorando")
+                continue
+            chave = ((linha.get('cidade') or '').strip(), (linha.get('uf') or '').strip().upper(),
+                     (linha.get('bairro') or '').strip())
+            if chave not in ids:
+                ids[chave] = len(localidades)
+                localidades.append(list(chave))
+            faixas.append((inicio, fim, ids[chave]))
+
+    achatadas = _achatar_faixas(faixas)
+    caminho_faixas.parent.mkdir(parents=True, exist_ok=True)
+    np.save(caminho_faixas, np.array(achatadas, dtype=np.uint32).reshape(-1, 3))
+    with open(caminho_localidades, 'w', encoding='utf-8') as f:
+        json.dump(localidades, f, ensure_ascii=False)
+    logger.info(f"Índice de CEP gerado: {len(achatadas)} faixas, {len(localidades)} localidades")
+    return len(achatadas)
+
+
+@lru_cache(maxsize=1)
+def carregar_indice_cep() -> Optional[IndiceCEP]:
+    """Índice compartilhado (um mmap só pro processo todo), ou None se não houver índice gerado"""
+    if not config.USAR_INDICE_CEP:
+        return None
+    if not (Path(config.ARQUIVO_INDICE_CEP).exists() and Path(config.ARQUIVO_LOCALIDADES_CEP).exists()):
+        logger.info("Índice de CEP não encontrado - validação e preenchimento seguem sem ele")
+        return None
+    try:
+        return IndiceCEP()
+    except Exception as e:
+        logger.warning(f"Índice de CEP ilegível, seguindo sem ele: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT)
+    if len(sys.argv) == 3 and sys.argv[1] == "construir":
+        total = construir_indice(Path(sys.argv[2]))
+        print(f"✓ Índice gerado com {total} faixas em {config.ARQUIVO_INDICE_CEP}")
+    elif len(sys.argv) == 3 and sys.argv[1] == "consultar":
+        indice = carregar_indice_cep()
+        print(indice.consultar(sys.argv[2]) if indice else "Índice não encontrado")
+    else:
+        print("Uso: python indice_cep.py construir faixas.csv | consultar 70000000")
@@ -5,15 +5,23 @@ Data: 02/2026
 
 Sistema que automatiza a emissão de códigos de rastreio no site dos Correios.
 """
+import argparse
 import logging
 import sys
+import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import config
+from api_correios import CorreiosApiClient
 from excel import ExcelHandler
+from checkpoint import JournalCheckpoint
 from correios import CorreiosAutomator
-from relatorio import ReportGenerator
+from paralelo import PoolNavegadores
+from relatorio import ReportGenerator, RelatorioIncremental
+from retentativas import PoliticaRetentativas
+from ritmo import ControladorRitmo
 
 # O sistema de log é essencial pra debugar quando o site dos Correios muda alguma coisa
 logging.basicConfig(
@@ -31,7 +39,9 @@ logger = logging.getLogger(__name__)
 class AutomatizadorCorreios:
     """Classe principal do automatizador"""
     
-    def __init__(self, tipo_processo: str = "postagem", usuario: str = None, senha: str = None, caminho_planilha: str = None):
+    def __init__(self, tipo_processo: str = "postagem", usuario: str = None, senha: str = None, caminho_planilha: str = None,
+                 concorrencia: int = None, interativo: bool = True, usar_checkpoint: bool = None,
+                 backend: str = None):
         """
         Inicializa o automatizador
         
@@ -40,8 +50,19 @@ class AutomatizadorCorreios:
             usuario: Usuário dos Correios
             senha: Senha dos Correios
             caminho_planilha: Caminho completo da planilha
+            concorrencia: Quantidade de navegadores em paralelo (padrão: config.NAVEGADORES_PARALELOS)
+            interativo: False = lote sem nenhum input() (pra rodar de madrugada)
+            usar_checkpoint: Pula linhas já concluídas em execução anterior (padrão: config.USAR_CHECKPOINT)
+            backend: 'selenium' (portal) ou 'api' (web service SIGEP) (padrão: config.BACKEND)
         """
         self.tipo_processo = tipo_processo
+        self.backend = backend or config.BACKEND
+        if self.backend == "api" and tipo_processo != "postagem":
+            # O SIGEP não tem solicitação de coleta - coleta continua pelo portal
+            logger.warning("Backend API só faz postagem - usando Selenium para coleta")
+            self.backend = "selenium"
+        self.concorrencia = concorrencia or config.NAVEGADORES_PARALELOS
+        self.interativo = interativo
         self.usuario = usuario
         self.senha = senha
         self.caminho_planilha = caminho_planilha
@@ -54,12 +75,39 @@ class AutomatizadorCorreios:
         else:
             self.excel_handler = ExcelHandler()
         
-        self.automator = CorreiosAutomator()
+        self.automator = CorreiosAutomator(interativo=interativo)
         self.report_generator = ReportGenerator()
+        # Cada resultado vai pro disco assim que termina (relatorios/resultados_<timestamp>.jsonl)
+        self.relatorio = RelatorioIncremental(self.report_generator.timestamp, medidor=self.automator.medidor)
         
-        self.resultados_sucesso = []
-        self.resultados_erro = []
-        self.dados_invalidos = []
+        usar_checkpoint = config.USAR_CHECKPOINT if usar_checkpoint is None else usar_checkpoint
+        self.checkpoint = (
+            JournalCheckpoint(self.excel_handler.caminho_entrada, tipo_processo) if usar_checkpoint else None
+        )
+        
+        self._abertura_navegador = None
+        self._erro_abertura_navegador = None
+        self.retentativas = PoliticaRetentativas()
+        self.ritmo = ControladorRitmo(medidor=self.automator.medidor)
+        
+        # Progresso entre um login e outro (sessão que expira em loop não pode travar o lote)
+        self._concluidos = 0
+        self._concluidos_no_relogin = -1
+        self._relogins_sem_progresso = 0
+        # Próximo Excel parcial (time.monotonic) - ver _registrar_resultado
+        self._proximo_parcial = time.monotonic() + config.RELATORIO_PARCIAL_INTERVALO
+    
+    def _iniciar_navegador_antecipado(self):
+        """Abre o Chrome numa thread enquanto a planilha ainda está sendo lida"""
+        def abrir():
+            try:
+                self.automator.iniciar_navegador()
+            except Exception as e:
+                self._erro_abertura_navegador = e
+        
+        print("🌐 Abrindo navegador Chrome enquanto a planilha é lida...")
+        self._abertura_navegador = threading.Thread(target=abrir, name="abertura-navegador", daemon=True)
+        self._abertura_navegador.start()
     
     def executar(self):
         """Executa o processo completo de automação"""
@@ -68,14 +116,29 @@ class AutomatizadorCorreios:
             print(f"AUTOMATIZADOR DE {self.tipo_processo.upper()} - CORREIOS EMPRESA")
             print("="*80 + "\n")
             
+            # Sem confirmação pra esperar, o Chrome já vai abrindo enquanto a planilha é lida
+            if config.LEITURA_STREAMING and not self.interativo and self.backend == "selenium" \
+                    and self.excel_handler.caminho_entrada.exists():
+                self._iniciar_navegador_antecipado()
+            
             # 1. Ler dados da planilha
             logger.info("=" * 50)
             logger.info("ETAPA 1: Leitura de dados da planilha")
             logger.info("=" * 50)
             
             try:
-                dados = self.excel_handler.ler_dados_postagem()
-                print(f"✓ {len(dados)} registros carregados da planilha")
+                if config.LEITURA_STREAMING:
+                    # Lê e valida na mesma passada - ETAPA 2 já sai pronta daqui
+                    dados_validos = []
+                    for registro in self.excel_handler.iterar_registros_validados():
+                        if '_erros' in registro:
+                            self.relatorio.adicionar_invalido(registro)
+                        else:
+                            dados_validos.append(registro)
+                    print(f"✓ {len(dados_validos) + self.relatorio.totais['invalido']} registros carregados da planilha")
+                else:
+                    dados = self.excel_handler.ler_dados_postagem()
+                    print(f"✓ {len(dados)} registros carregados da planilha")
             except FileNotFoundError:
                 print("\n⚠ Arquivo de entrada não encontrado!")
                 print("Criando template de exemplo...\n")
@@ -89,22 +152,55 @@ class AutomatizadorCorreios:
             logger.info("ETAPA 2: Validação de dados")
             logger.info("=" * 50)
             
-            dados_validos, self.dados_invalidos = self.excel_handler.validar_dados(dados)
+            if not config.LEITURA_STREAMING:
+                dados_validos, dados_invalidos = self.excel_handler.validar_dados(dados)
+                for registro in dados_invalidos:
+                    self.relatorio.adicionar_invalido(registro)
+            else:
+                logger.info(f"Validação concluída: {len(dados_validos)} válidos, {self.relatorio.totais['invalido']} inválidos")
             print(f"✓ Dados válidos: {len(dados_validos)}")
-            if self.dados_invalidos:
-                print(f"⚠ Dados inválidos: {len(self.dados_invalidos)} (não serão processados)")
+            if self.relatorio.totais['invalido']:
+                print(f"⚠ Dados inválidos: {self.relatorio.totais['invalido']} (não serão processados)")
             
             if not dados_validos:
                 print("\n✗ Nenhum dado válido para processar!")
                 self._gerar_relatorios()
                 return
             
+            # Retomada: o que já foi concluído numa execução anterior não vai pro portal de novo
+            if self.checkpoint:
+                dados_validos, retomados = self.checkpoint.separar_pendentes(dados_validos)
+                if retomados:
+                    for resultado in retomados:
+                        self.relatorio.adicionar(resultado)
+                    conferir = sum(r.get('status') != 'sucesso' for r in retomados)
+                    print(f"↺ {len(retomados) - conferir} registros já concluídos em execução anterior (serão pulados)")
+                    if conferir:
+                        print(f"⚠️  {conferir} registros falharam depois de confirmar na execução anterior - não serão "
+                              "repetidos (conferir no portal; --ignorar-checkpoint processa de novo)")
+                    logger.info(f"Checkpoint: {len(retomados)} registros pulados ({conferir} a conferir), "
+                                f"{len(dados_validos)} pendentes")
+                if not dados_validos:
+                    print("\n✓ Todos os registros já foram processados anteriormente!")
+                    self._gerar_relatorios()
+                    return
+            
             # Aprendi da pior forma que é melhor pedir confirmação antes de processar 100 registros
             print(f"\nSerão processados {len(dados_validos)} registros.")
-            resposta = input("Deseja continuar? (S/N): ").strip().upper()
+            if self.interativo:
+                resposta = input("Deseja continuar? (S/N): ").strip().upper()
+                
+                if resposta != 'S':
+                    print("Operação cancelada pelo usuário.")
+                    return
             
-            if resposta != 'S':
-                print("Operação cancelada pelo usuário.")
+            # Backend API: sem navegador nem login manual, vai direto pro web service
+            if self.backend == "api":
+                logger.info("\n" + "=" * 50)
+                logger.info(f"ETAPA 4: Processamento de {self.tipo_processo} via API")
+                logger.info("=" * 50)
+                self._processar_api(dados_validos)
+                print("\n✓ Processamento concluído!")
                 return
             
             # 4. Inicia navegador e faz login
@@ -112,11 +208,15 @@ class AutomatizadorCorreios:
             logger.info("ETAPA 3: Inicialização e Login Manual")
             logger.info("=" * 50)
             
-            print("\n🌐 Abrindo navegador Chrome...")
-            self.automator.iniciar_navegador()
-            time.sleep(1)
+            if self._abertura_navegador:
+                self._abertura_navegador.join()
+                if self._erro_abertura_navegador:
+                    raise self._erro_abertura_navegador
+            else:
+                print("\n🌐 Abrindo navegador Chrome...")
+                self.automator.iniciar_navegador()
             
-            print("🔓 Abrindo sistema de pré-postagem (vai pedir login)...\n")
+            print("🔓 Abrindo sistema de pré-postagem (pede login se a sessão tiver expirado)...\n")
             if not self.automator.fazer_login(usuario=self.usuario, senha=self.senha):
                 print("\n✗ Processo de login cancelado.")
                 logger.error("Processo de login cancelado")
@@ -125,7 +225,6 @@ class AutomatizadorCorreios:
             print("="*80)
             print("✓ Sistema logado e pronto! Iniciando processamento automático...")
             print("="*80 + "\n")
-            time.sleep(1)
             
             # 5. Processar cada registro
             logger.info("\n" + "=" * 50)
@@ -134,50 +233,10 @@ class AutomatizadorCorreios:
             
             print(f"\nIniciando processamento automático de {len(dados_validos)} registros...\n")
             
-            for idx, registro in enumerate(dados_validos, 1):
-                print(f"\n{'='*80}")
-                print(f"[{idx}/{len(dados_validos)}] PROCESSANDO LINHA {registro.get('_linha')} - {registro.get('COORDENADOR MUNICIPAL', 'N/A')}")
-                print(f"{'='*80}\n")
-                
-                try:
-                    if self.tipo_processo == "postagem":
-                        resultado = self.automator.processar_postagem(registro)
-                    else:  # coleta
-                        resultado = self.automator.processar_coleta(registro)
-                    
-                    if resultado.get('status') == 'sucesso':
-                        self.resultados_sucesso.append(resultado)
-                        codigo = resultado.get('codigo_rastreamento', 'N/A')
-                        print(f"\n✓ SUCESSO - Código: {codigo}\n")
-                    else:
-                        self.resultados_erro.append(resultado)
-                        erro = resultado.get('erro', 'Erro desconhecido')
-                        print(f"\n✗ ERRO - {erro}\n")
-                    
-                    # Pausa entre registros pq já vi o sites derrubar a sessão por requisições muito rápidas
-                    if idx < len(dados_validos):
-                        print("\n" + "-"*80)
-                        print(f"Próximo: Linha {dados_validos[idx].get('_linha')} - {dados_validos[idx].get('COORDENADOR MUNICIPAL', 'N/A')}")
-                        print("-"*80)
-                        resposta = input("\nContinuar para o próximo registro? (S/N ou ENTER para continuar): ").strip().upper()
-                        if resposta == 'N':
-                            print("\n⚠️ Processamento interrompido pelo usuário.")
-                            logger.info("Usuário optou por interromper o processamento")
-                            break
-                        time.sleep(1)
-                    
-                except Exception as e:
-                    logger.error(f"Erro inesperado no registro {registro.get('_linha')}: {str(e)}")
-                    self.resultados_erro.append({
-                        'linha': registro.get('_linha'),
-                        'destinatario': registro.get('COORDENADOR MUNICIPAL', 'N/A'),
-                        'erro': f"Erro inesperado: {str(e)}",
-                        'status': 'erro'
-                    })
-                    print(f"\n✗ ERRO INESPERADO: {str(e)}\n")
-                    
-                    # Print salvou minha vida várias vezes quando o sistema falha em produção
-                    self.automator.tirar_screenshot(f"erro_linha_{registro.get('_linha')}.png")
+            if self.concorrencia > 1:
+                self._processar_paralelo(dados_validos)
+            else:
+                self._processar_sequencial(dados_validos)
             
             print("\n✓ Processamento concluído!")
             
@@ -195,10 +254,222 @@ class AutomatizadorCorreios:
             logger.info("=" * 50)
             
             print("\nFechando navegador...")
+            if self._abertura_navegador:
+                self._abertura_navegador.join()
             self.automator.fechar_navegador()
             
             self._gerar_relatorios()
     
+    def _processar_registro(self, automator: CorreiosAutomator, registro: Dict) -> Dict:
+        """Chama o fluxo certo (postagem/coleta) no automator informado"""
+        if self.tipo_processo == "postagem":
+            return automator.processar_postagem(registro)
+        return automator.processar_coleta(registro)
+    
+    def _deve_reenfileirar(self, registro: Dict, resultado: Dict, tentativa: int) -> Optional[float]:
+        """
+        Decide se o registro volta pro fim da fila (falha transitória ou de interface, ver retentativas.py)
+        
+        Returns:
+            Segundos até a retentativa poder começar, ou None se o resultado é final (já sai
+            anotado com tentativas, tipo_falha e histórico pro relatório)
+        """
+        espera = self.retentativas.avaliar(registro, resultado, tentativa)
+        if espera is not None:
+            print(f"↻ Linha {registro.get('_linha')} reenfileirada ({resultado.get('erro')})"
+                  + (f" - nova tentativa em {espera:.0f}s" if espera >= 1 else ""))
+        return espera
+    
+    def _reautenticar(self) -> bool:
+        """
+        Sessão do portal expirou no meio do lote: com a fila parada, refaz o login no navegador principal
+        
+        Se a sessão cair de novo sem nenhum registro concluído desde o último login, desiste
+        (config.MAX_RELOGINS_SEM_PROGRESSO) - os pendentes ficam pro checkpoint da próxima execução.
+        """
+        if self._concluidos == self._concluidos_no_relogin:
+            self._relogins_sem_progresso += 1
+        else:
+            self._relogins_sem_progresso = 1
+        self._concluidos_no_relogin = self._concluidos
+        if self._relogins_sem_progresso > config.MAX_RELOGINS_SEM_PROGRESSO:
+            logger.error("Sessão expirou de novo sem nenhum registro concluído desde o último login - parando o lote")
+            return False
+        
+        print("\n" + "="*80)
+        print("⚠️  SESSÃO DOS CORREIOS EXPIROU - fila pausada até o login ser refeito")
+        print("="*80)
+        logger.warning("Sessão do portal expirada - fila pausada para novo login")
+        if not self.automator.fazer_login(usuario=self.usuario, senha=self.senha):
+            return False
+        print("✓ Sessão restabelecida - retomando a fila\n")
+        return True
+    
+    def _gravar_checkpoint(self, registro: Dict, resultado: Dict):
+        """Resultado final vai pro journal na hora (fsync) - se o processo morrer, já está salvo"""
+        if not self.checkpoint:
+            return
+        try:
+            self.checkpoint.registrar(registro, resultado)
+        except Exception as e:
+            logger.error(f"Erro ao gravar checkpoint da linha {registro.get('_linha')}: {str(e)}")
+    
+    def _registrar_resultado(self, resultado: Dict):
+        """Grava o resultado no relatório incremental e mostra no console"""
+        self.relatorio.adicionar(resultado)
+        if resultado.get('status') == 'sucesso':
+            codigo = resultado.get('codigo_rastreamento', 'N/A')
+            print(f"\n✓ SUCESSO - Código: {codigo}\n")
+        else:
+            erro = resultado.get('erro', 'Erro desconhecido')
+            print(f"\n✗ ERRO - {erro}\n")
+        
+        # Excel parcial de tempos em tempos: dá pra acompanhar lote longo sem esperar o fim.
+        # Por tempo e não por quantidade: cada parcial reescreve tudo, a cada N registros o custo ficava quadrático
+        if config.RELATORIO_PARCIAL_INTERVALO and time.monotonic() >= self._proximo_parcial:
+            inicio = time.monotonic()
+            caminho = self.relatorio.gerar_parcial()
+            duracao = time.monotonic() - inicio
+            self._proximo_parcial = time.monotonic() + max(config.RELATORIO_PARCIAL_INTERVALO,
+                                                           config.RELATORIO_PARCIAL_FATOR * duracao)
+            if caminho:
+                print(f"📄 Relatório parcial atualizado: {caminho}")
+    
+    def _processar_paralelo(self, dados_validos: List[Dict]):
+        """
+        Processa com vários navegadores ao mesmo tempo (sessão copiada do navegador logado)
+        
+        Cada resultado vai pro relatório incremental assim que termina (o relatório final sai
+        ordenado por linha do mesmo jeito, o RelatorioIncremental ordena na leitura).
+        """
+        pool = PoolNavegadores(self.automator, self._processar_registro, self.concorrencia, ritmo=self.ritmo)
+        total = len(dados_validos)
+        concluidos = []
+        
+        def ao_concluir(registro, resultado):
+            self._gravar_checkpoint(registro, resultado)
+            self._concluidos += 1
+            concluidos.append(registro.get('_linha'))
+            status = "✓" if resultado.get('status') == 'sucesso' else "✗"
+            print(f"[{len(concluidos)}/{total}] {status} Linha {registro.get('_linha')} - {registro.get('COORDENADOR MUNICIPAL', 'N/A')}")
+            # Já roda serializado (lock do pool): JSONL e parcial não esperam o lote inteiro
+            self._registrar_resultado(resultado)
+        
+        try:
+            pool.executar(dados_validos, ao_concluir, self._deve_reenfileirar, self._reautenticar)
+        finally:
+            pool.fechar()
+        
+        if len(concluidos) < total:
+            print(f"\n⚠️  {total - len(concluidos)} registros ficaram sem processar (sessão não voltou) - "
+                  "rode de novo que o checkpoint continua de onde parou")
+    
+    def _processar_api(self, dados_validos: List[Dict]):
+        """
+        Processa pelo web service SIGEP (requisições simultâneas numa sessão HTTP keep-alive)
+        
+        Falha passageira (timeout, 5xx, conexão) volta pra fila com a mesma política de retentativas do portal.
+        """
+        cliente = CorreiosApiClient()
+        total = len(dados_validos)
+        concluidos = []
+        
+        def ao_concluir(registro, resultado):
+            self._gravar_checkpoint(registro, resultado)
+            concluidos.append(registro.get('_linha'))
+            status = "✓" if resultado.get('status') == 'sucesso' else "✗"
+            print(f"[{len(concluidos)}/{total}] {status} Linha {registro.get('_linha')} - {registro.get('COORDENADOR MUNICIPAL', 'N/A')}")
+            self._registrar_resultado(resultado)
+        
+        print(f"\nEnviando {total} registros para o web service ({cliente.url})...\n")
+        try:
+            cliente.processar_lote(dados_validos, ao_concluir, self._deve_reenfileirar)
+        finally:
+            cliente.fechar()
+    
+    def _processar_sequencial(self, dados_validos: List[Dict]):
+        """
+        Processa um registro por vez no navegador principal
+        
+        No modo interativo pergunta antes de seguir; no não interativo a pausa é automática.
+        A fila é um deque porque registro reenfileirado vai pro fim.
+        """
+        fila = deque((registro, 1, 0.0) for registro in dados_validos)
+        total = len(dados_validos)
+        idx = 0
+        refazendo = False
+        
+        while fila:
+            registro, tentativa, pronto_em = fila.popleft()
+            espera = pronto_em - time.monotonic()
+            if espera > 0:
+                # Retentativa ainda no backoff: se tem registro pronto na fila ele passa na frente
+                if any(item[2] <= time.monotonic() for item in fila):
+                    fila.append((registro, tentativa, pronto_em))
+                    continue
+                logger.info(f"Aguardando {espera:.1f}s antes da tentativa {tentativa} da linha {registro.get('_linha')}")
+                time.sleep(espera)
+            if tentativa == 1 and not refazendo:
+                idx += 1
+            refazendo = False
+            print(f"\n{'='*80}")
+            print(f"[{idx}/{total}] PROCESSANDO LINHA {registro.get('_linha')} - {registro.get('COORDENADOR MUNICIPAL', 'N/A')}"
+                  + (f" (tentativa {tentativa})" if tentativa > 1 else ""))
+            print(f"{'='*80}\n")
+            
+            try:
+                self.ritmo.aguardar_vez()
+                resultado = self._processar_registro(self.automator, registro)
+                self.ritmo.observar(resultado)
+                sessao_caiu = resultado.get('sessao_expirada')
+                if sessao_caiu and not resultado.get('confirmacao_enviada'):
+                    # Não conta como erro: o registro volta pra frente da fila depois do novo login
+                    fila.appendleft((registro, tentativa, 0.0))
+                    refazendo = True
+                else:
+                    # Sessão que caiu depois do Confirmar vira resultado final: refazer pode duplicar
+                    # a pré-postagem (a política não repete e o checkpoint bloqueia a linha)
+                    espera = self._deve_reenfileirar(registro, resultado, tentativa)
+                    if espera is not None:
+                        fila.append((registro, tentativa + 1, time.monotonic() + espera))
+                    else:
+                        self._gravar_checkpoint(registro, resultado)
+                        self._registrar_resultado(resultado)
+                        self._concluidos += 1
+                if sessao_caiu:
+                    if not self._reautenticar():
+                        print(f"\n⚠️  Sessão não voltou - {len(fila)} registros ficaram sem processar. "
+                              "Rode de novo que o checkpoint continua de onde parou.")
+                        break
+                    continue
+                
+                # Pausa entre registros agora é do ControladorRitmo (aguardar_vez antes de cada registro)
+                if fila:
+                    proximo = fila[0][0]
+                    if self.interativo:
+                        print("\n" + "-"*80)
+                        print(f"Próximo: Linha {proximo.get('_linha')} - {proximo.get('COORDENADOR MUNICIPAL', 'N/A')}")
+                        print("-"*80)
+                        resposta = input("\nContinuar para o próximo registro? (S/N ou ENTER para continuar): ").strip().upper()
+                        if resposta == 'N':
+                            print("\n⚠️ Processamento interrompido pelo usuário.")
+                            logger.info("Usuário optou por interromper o processamento")
+                            break
+                
+            except Exception as e:
+                logger.error(f"Erro inesperado no registro {registro.get('_linha')}: {str(e)}")
+                self.relatorio.adicionar({
+                    'linha': registro.get('_linha'),
+                    'destinatario': registro.get('COORDENADOR MUNICIPAL', 'N/A'),
+                    'erro': f"Erro inesperado: {str(e)}",
+                    'tipo_erro': type(e).__name__,
+                    'status': 'erro'
+                })
+                print(f"\n✗ ERRO INESPERADO: {str(e)}\n")
+                
+                # Print salvou minha vida várias vezes quando o sistema falha em produção
+                self.automator.tirar_screenshot(f"erro_linha_{registro.get('_linha')}.png")
+    
     def _gerar_relatorios(self):
         """Gera os relatórios finais"""
         logger.info("\n" + "=" * 50)
@@ -207,25 +478,14 @@ class AutomatizadorCorreios:
         
         print("\nGerando relatórios...")
         
+        # Montados em streaming a partir do JSONL incremental (ordenados por linha na leitura)
         try:
-            self.report_generator.exibir_resumo_console(
-                self.resultados_sucesso,
-                self.resultados_erro,
-                self.dados_invalidos
-            )
+            self.relatorio.exibir_resumo_console()
             
-            arquivo_excel = self.report_generator.gerar_relatorio_completo(
-                self.resultados_sucesso,
-                self.resultados_erro,
-                self.dados_invalidos
-            )
+            arquivo_excel = self.relatorio.gerar_excel()
             print(f"✓ Relatório Excel: {arquivo_excel}")
             
-            arquivo_txt = self.report_generator.gerar_relatorio_texto(
-                self.resultados_sucesso,
-                self.resultados_erro,
-                self.dados_invalidos
-            )
+            arquivo_txt = self.relatorio.gerar_texto()
             print(f"✓ Relatório TXT: {arquivo_txt}")
             
             print("\n✓ Relatórios gerados com sucesso!")
@@ -234,6 +494,9 @@ class AutomatizadorCorreios:
         except Exception as e:
             logger.error(f"Erro ao gerar relatórios: {str(e)}")
             print(f"✗ Erro ao gerar relatórios: {str(e)}")
+            print(f"   Resultados continuam salvos em: {self.relatorio.caminho}")
+        finally:
+            self.relatorio.fechar()
 
 
 def solicitar_caminho_planilha():
@@ -266,32 +529,106 @@ def solicitar_caminho_planilha():
     return caminho
 
 
-def main():
-    """Função principal"""
-    print("\n" + "="*80)
-    print("AUTOMATIZADOR DE CORREIOS - SISTEMA DE POSTAGEM E COLETA")
-    print("="*80)
+def criar_parser() -> argparse.ArgumentParser:
+    """Argumentos de linha de comando (sem argumentos, roda o menu interativo de sempre)"""
+    parser = argparse.ArgumentParser(
+        description="Automatizador de Postagens e Coletas - Correios Empresa"
+    )
+    parser.add_argument("--planilha",
+                        help="Caminho da planilha (padrão: dados/dados_postagem.xlsx; no modo interativo, sem isso pergunta)")
+    parser.add_argument("--tipo", choices=["postagem", "coleta"], default=None,
+                        help="Tipo de processo (padrão: postagem; no modo interativo, sem isso pergunta no menu)")
+    parser.add_argument("--concorrencia", type=int, default=None,
+                        help=f"Navegadores em paralelo (máx: {config.MAX_NAVEGADORES_PARALELOS})")
+    parser.add_argument("--nao-interativo", action="store_true",
+                        help="Roda o lote sem perguntas: ação manual vira falha reenfileirada e a pausa entre registros é automática")
+    parser.add_argument("--screenshots", choices=["desligado", "erros", "passos", "todos"], default=None,
+                        help=f"Nível de screenshots (padrão: {config.NIVEL_SCREENSHOT})")
+    parser.add_argument("--backend", choices=["selenium", "api"], default=None,
+                        help=f"Portal via navegador ou web service SIGEP (padrão: {config.BACKEND})")
+    parser.add_argument("--ignorar-checkpoint", action="store_true",
+                        help="Processa todas as linhas mesmo que já constem como concluídas no checkpoint")
+    return parser
+
+
+def executar_nao_interativo(args) -> int:
+    """
+    Modo lote (ex: agendado pra rodar de madrugada)
     
-    print("\nSelecione o tipo de processo:")
-    print("1 - Postagem de objetos")
-    print("2 - Solicitação de coleta")
-    print("0 - Sair")
+    Ainda precisa do login no navegador, mas sem ENTER: espera o login acontecer sozinho.
     
-    opcao = input("\nOpção: ").strip()
+    Returns:
+        Código de saída (0 = todos os registros processados com sucesso)
+    """
+    caminho_planilha = args.planilha or str(config.DADOS_DIR / config.ARQUIVO_ENTRADA)
+    caminho_planilha = caminho_planilha.strip('"').strip("'")
+    if not Path(caminho_planilha).exists():
+        print(f"✗ Arquivo não encontrado: {caminho_planilha}")
+        return 2
     
-    if opcao == "0":
-        print("Saindo...")
-        return
-    elif opcao not in ["1", "2"]:
-        print("Opção inválida!")
-        return
+    tipo_processo = args.tipo or "postagem"
+    logger.info(f"Modo não interativo: {tipo_processo} | planilha={caminho_planilha} | concorrência={args.concorrencia or config.NAVEGADORES_PARALELOS}")
+    if args.screenshots:
+        config.NIVEL_SCREENSHOT = args.screenshots
+    
+    automatizador = AutomatizadorCorreios(
+        tipo_processo=tipo_processo,
+        usuario="manual",
+        senha="manual",
+        caminho_planilha=caminho_planilha,
+        concorrencia=args.concorrencia,
+        interativo=False,
+        usar_checkpoint=False if args.ignorar_checkpoint else None,
+        backend=args.backend
+    )
+    automatizador.executar()
+    return 1 if automatizador.relatorio.totais['erro'] else 0
+
+
+def main(args: argparse.Namespace = None):
+    """
+    Função principal (menu interativo)
+    
+    Args:
+        args: Argumentos da linha de comando - o que vier explícito (--tipo, --planilha, --concorrencia,
+            --backend, --screenshots, --ignorar-checkpoint) vale no lugar da pergunta/padrão correspondente
+    """
+    args = args or criar_parser().parse_args([])
+    print("\n" + "="*80)
+    print("AUTOMATIZADOR DE CORREIOS - SISTEMA DE POSTAGEM E COLETA")
+    print("="*80)
     
-    tipo_processo = "postagem" if opcao == "1" else "coleta"
+    if args.tipo:
+        tipo_processo = args.tipo
+    else:
+        print("\nSelecione o tipo de processo:")
+        print("1 - Postagem de objetos")
+        print("2 - Solicitação de coleta")
+        print("0 - Sair")
+        
+        opcao = input("\nOpção: ").strip()
+        
+        if opcao == "0":
+            print("Saindo...")
+            return
+        elif opcao not in ["1", "2"]:
+            print("Opção inválida!")
+            return
+        
+        tipo_processo = "postagem" if opcao == "1" else "coleta"
     
-    caminho_planilha = solicitar_caminho_planilha()
+    if args.planilha:
+        caminho_planilha = args.planilha.strip('"').strip("'")
+        if not Path(caminho_planilha).exists():
+            print(f"\n✗ Arquivo não encontrado: {caminho_planilha}")
+            return
+    else:
+        caminho_planilha = solicitar_caminho_planilha()
     if not caminho_planilha:
         print("\n✗ Caminho da planilha inválido. Encerrando...")
         return
+    if args.screenshots:
+        config.NIVEL_SCREENSHOT = args.screenshots
     
     # Essas instruções são necessárias pq sempre tem um usuário abençoado navegando pro lugar errado após o login
     print("\n" + "="*80)
@@ -301,7 +638,7 @@ def main():
     print(f"Planilha: {caminho_planilha}")
     print("\n➤ Ao pressionar ENTER:")
     print("   1. O navegador Chrome será aberto na página de pré-postagem")
-    print("   2. O site vai pedir login - faça login normalmente")
+    print("   2. Se a sessão anterior expirou, o site pede login - faça login normalmente")
     print("   3. Após login, fique na página de pré-postagem e pressione ENTER")
     print("   4. A automação processará os registros da planilha")
     print("\n💡 NÃO navegue para outras páginas após fazer login!")
@@ -313,14 +650,26 @@ def main():
         tipo_processo=tipo_processo,
         usuario="manual",
         senha="manual",
-        caminho_planilha=caminho_planilha
+        caminho_planilha=caminho_planilha,
+        concorrencia=args.concorrencia,
+        usar_checkpoint=False if args.ignorar_checkpoint else None,
+        backend=args.backend
     )
     automatizador.executar()
 
 
 if __name__ == "__main__":
+    args = criar_parser().parse_args()
+    
+    if args.nao_interativo:
+        try:
+            sys.exit(executar_nao_interativo(args))
+        except Exception as e:
+            logger.error(f"Erro fatal: {str(e)}", exc_info=True)
+            sys.exit(1)
+    
     try:
-        main()
+        main(args)
     except Exception as e:
         logger.error(f"Erro fatal: {str(e)}", exc_info=True)
         print(f"\n✗ Erro fatal: {str(e)}")
@@ -0,0 +1,94 @@
+"""
+Medição de tempo por etapa do processamento
+
+Cada registro leva ~40s no portal e não dava pra saber onde esse tempo ia. Aqui ficam
+as durações de cada passo do processar_postagem (navegação, remetente, destinatário,
+confirmação...) e de cada tentativa de seletor do _localizar, pra o relatório mostrar
+p50/p95/máximo por etapa na aba "Desempenho".
+
+É leve de propósito: um perf_counter por marcação e um append num array de floats.
+O mesmo medidor é compartilhado pelos navegadores do pool (estado do registro é por thread).
+"""
+import logging
+import threading
+import time
+from array import array
+from typing import Dict, List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MedidorTempos:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (categoria, nome) -> durações em segundos, na ordem em que a etapa apareceu pela primeira vez
+        self.amostras: Dict[Tuple[str, str], array] = {}
+        self._local = threading.local()
+
+    def registrar(self, categoria: str, nome: str, duracao: float):
+        """Guarda uma amostra (ex: categoria 'seletor', nome 'botao_salvar_modal: falha')"""
+        chave = (categoria, nome)
+        with self._lock:
+            serie = self.amostras.get(chave)
+            if serie is None:
+                serie = self.amostras[chave] = array('d')
+            serie.append(duracao)
+
+    def iniciar_registro(self):
+        """Zera o cronômetro do registro desta thread"""
+        agora = time.perf_counter()
+        self._local.inicio = agora
+        self._local.fase = None
+        self._local.inicio_fase = agora
+
+    def marcar(self, fase: str):
+        """Fecha a fase anterior (se tiver) e começa `fase` - uma linha em cada PASSO do fluxo"""
+        agora = time.perf_counter()
+        anterior = getattr(self._local, 'fase', None)
+        if anterior is not None:
+            self.registrar('passo', anterior, agora - self._local.inicio_fase)
+        self._local.fase = fase
+        self._local.inicio_fase = agora
+
+    def finalizar_registro(self, status: str) -> float:
+        """
+        Fecha a última fase e registra o tempo total do registro
+
+        Returns:
+            Duração total do registro em segundos (0 se iniciar_registro não foi chamado)
+        """
+        inicio = getattr(self._local, 'inicio', None)
+        if inicio is None:
+            return 0.0
+        self.marcar(None)
+        total = time.perf_counter() - inicio
+        self.registrar('registro', f"total ({status})", total)
+        self._local.inicio = None
+        return total
+
+    def resumo(self) -> List[Dict]:
+        """Uma linha por etapa: amostras, total, média, p50, p95 e máximo (em segundos)"""
+        with self._lock:
+            series = [(chave, np.frombuffer(serie, dtype=np.float64).copy()) for chave, serie in self.amostras.items()]
+        linhas = []
+        for (categoria, nome), valores in series:
+            if not len(valores):
+                continue
+            p50, p95 = np.percentile(valores, [50, 95])
+            linhas.append({
+                'Categoria': categoria,
+                'Etapa': nome,
+                'Amostras': len(valores),
+                'Total (s)': round(float(valores.sum()), 3),
+                'Média (s)': round(float(valores.mean()), 3),
+                'p50 (s)': round(float(p50), 3),
+                'p95 (s)': round(float(p95), 3),
+                'Máx (s)': round(float(valores.max()), 3),
+            })
+        # Total do registro primeiro, passos na ordem do fluxo, seletores do que mais gastou pro que menos gastou
+        ordem = {'registro': 0, 'passo': 1, 'seletor': 2}
+        linhas.sort(key=lambda l: (ordem.get(l['Categoria'], 3),
+                                   -l['Total (s)'] if l['Categoria'] == 'seletor' else 0, l['Etapa']))
+        return linhas
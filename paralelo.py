@@ -0,0 +1,253 @@
+"""
+Pool de navegadores paralelos
+
+Um Chrome processando um registro por vez limita tudo a ~1 registro a cada 40s.
+Aqui o navegador principal (onde o usuário fez login) exporta os cookies da sessão e
+outros N-1 Chromes recebem esses cookies, todos puxando registros da mesma fila.
+Os resultados voltam na ordem das linhas da planilha, não na ordem em que terminaram.
+
+Se a sessão expira no meio, o pool pausa: cada worker termina o registro atual e para, os
+registros que pegaram a sessão caída voltam pra fila, o login é refeito no principal e os
+cookies novos vão pros outros Chromes antes de retomar.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+import config
+from correios import CorreiosAutomator
+from ritmo import ControladorRitmo
+
+logger = logging.getLogger(__name__)
+
+
+class PoolNavegadores:
+
+    def __init__(self, automator_principal: CorreiosAutomator, processar: Callable,
+                 concorrencia: int = None, ritmo: Optional[ControladorRitmo] = None):
+        """
+        Args:
+            automator_principal: Automator já logado (vira o worker 1 e fonte dos cookies)
+            processar: Função (automator, registro) -> resultado, ex: processar_postagem do automator
+            concorrencia: Número de navegadores (limitado por config.MAX_NAVEGADORES_PARALELOS)
+            ritmo: Controlador de ritmo compartilhado pelos workers (None = sem limite de taxa)
+        """
+        self.principal = automator_principal
+        # O principal vira worker 1: enquanto o pool roda com mais de um navegador ele também não é interativo
+        self._interativo_principal = automator_principal.interativo
+        self.processar = processar
+        self.ritmo = ritmo
+        pedido = concorrencia or config.NAVEGADORES_PARALELOS
+        self.concorrencia = max(1, min(pedido, config.MAX_NAVEGADORES_PARALELOS))
+        if self.concorrencia < pedido:
+            logger.warning(f"Concorrência limitada a {self.concorrencia} (pedido: {pedido}) pra não derrubar a sessão")
+
+        self._fila = queue.Queue()
+        self._resultados: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+        self._workers: List[CorreiosAutomator] = []
+        # Setado quando algum worker encontra a sessão expirada: ninguém pega registro novo
+        self._pausa = threading.Event()
+
+    def _criar_worker(self, numero: int, cookies: List[Dict]) -> Optional[CorreiosAutomator]:
+        """Abre um Chrome extra e injeta a sessão do principal"""
+        try:
+            # Worker nunca é interativo: input() vindo de várias threads seria um caos no terminal
+            automator = CorreiosAutomator(
+                headless=config.HEADLESS_WORKERS,
+                cache_seletores=self.principal.cache_seletores,
+                interativo=False,
+                perfil_persistente=False,  # o perfil fica travado pelo Chrome principal
+                agenda=self.principal.agenda,
+                medidor=self.principal.medidor
+            )
+            automator.iniciar_navegador()
+            automator.importar_cookies(cookies)
+            automator.prefixo_capturas = f"worker{numero}_"
+            logger.info(f"Worker {numero}: navegador pronto com sessão importada")
+            return automator
+        except Exception as e:
+            logger.error(f"Worker {numero}: não foi possível iniciar ({str(e)[:100]})")
+            return None
+
+    def _loop_worker(self, numero: int, automator: CorreiosAutomator, ao_concluir: Optional[Callable],
+                     reenfileirar: Optional[Callable]):
+        while not self._pausa.is_set():
+            try:
+                ordem, registro, tentativa, pronto_em = self._fila.get_nowait()
+            except queue.Empty:
+                return
+
+            espera = pronto_em - time.monotonic()
+            if espera > 0:
+                # Retentativa ainda no backoff: devolve pro fim e deixa os outros registros passarem
+                self._fila.put((ordem, registro, tentativa, pronto_em))
+                self._fila.task_done()
+                time.sleep(min(espera, 0.25))
+                continue
+
+            if self.ritmo is not None:
+                self.ritmo.aguardar_vez()
+            try:
+                resultado = self.processar(automator, registro)
+            except Exception as e:
+                logger.error(f"Worker {numero}: erro inesperado na linha {registro.get('_linha')}: {str(e)}")
+                resultado = {
+                    'linha': registro.get('_linha'),
+                    'destinatario': registro.get('COORDENADOR MUNICIPAL', 'N/A'),
+                    'erro': f"Erro inesperado: {str(e)}",
+                    'tipo_erro': type(e).__name__,
+                    'status': 'erro'
+                }
+                automator.tirar_screenshot(f"erro_linha_{registro.get('_linha')}.png")
+            if self.ritmo is not None:
+                self.ritmo.observar(resultado)
+
+            if resultado.get('sessao_expirada'):
+                if not self._pausa.is_set():
+                    logger.warning(f"Worker {numero}: sessão expirada na linha {registro.get('_linha')} - pausando o pool")
+                    self._pausa.set()
+                if not resultado.get('confirmacao_enviada'):
+                    # Não é falha do registro: volta pra fila como estava e refaz depois do novo login
+                    self._fila.put((ordem, registro, tentativa, pronto_em))
+                    self._fila.task_done()
+                    continue
+                # Caiu depois do Confirmar: refazer pode duplicar a pré-postagem - segue como resultado
+                # final (a política de retentativas não repete e o checkpoint bloqueia a linha)
+
+            espera = reenfileirar(registro, resultado, tentativa) if reenfileirar else None
+            if espera is not None:
+                # Volta pro fim da fila - os registros saudáveis na frente seguem sem esperar
+                self._fila.put((ordem, registro, tentativa + 1, time.monotonic() + espera))
+                self._fila.task_done()
+                continue
+
+            with self._lock:
+                self._resultados[ordem] = resultado
+                if ao_concluir:
+                    ao_concluir(registro, resultado)
+            self._fila.task_done()
+
+    def _rodar(self, automators: List[tuple], ao_concluir: Optional[Callable], reenfileirar: Optional[Callable]):
+        """Uma thread por (número, automator) puxando da fila até esvaziar ou pausar"""
+        threads = []
+        for numero, automator in automators:
+            thread = threading.Thread(
+                target=self._loop_worker, args=(numero, automator, ao_concluir, reenfileirar),
+                name=f"worker-{numero}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    def _retomar(self, reautenticar: Optional[Callable]) -> List[tuple]:
+        """
+        Refaz o login no principal e passa os cookies novos pros workers extras
+
+        Returns:
+            (número, automator) que podem continuar - vazio se o login não voltou
+        """
+        # Login de novo é com o pool parado (nenhuma thread rodando): aí o principal pode pedir ENTER
+        interativo = self.principal.interativo
+        self.principal.interativo = self._interativo_principal
+        try:
+            relogado = reautenticar is not None and reautenticar()
+        finally:
+            self.principal.interativo = interativo
+        if not relogado:
+            logger.error(f"Sessão não foi restabelecida - {self._fila.qsize()} registros ficam sem processar")
+            return []
+        cookies = self.principal.exportar_cookies()
+        ativos = [(1, self.principal)]
+        for numero, automator in enumerate(self._workers, 2):
+            try:
+                automator.importar_cookies(cookies)
+                ativos.append((numero, automator))
+            except Exception as e:
+                logger.warning(f"Worker {numero}: não recebeu a sessão nova, fica parado ({str(e)[:100]})")
+        self._pausa.clear()
+        logger.info(f"Sessão restabelecida - retomando com {len(ativos)} navegadores")
+        return ativos
+
+    def executar(self, registros: List[Dict], ao_concluir: Callable = None,
+                 reenfileirar: Callable = None, reautenticar: Callable = None) -> List[tuple]:
+        """
+        Processa os registros em paralelo
+
+        Args:
+            registros: Registros válidos, na ordem da planilha
+            ao_concluir: Callback (registro, resultado) chamado assim que cada um termina (serializado)
+            reenfileirar: Callback (registro, resultado, tentativa) -> segundos até a retentativa pra mandar
+                o registro pro fim da fila, ou None se o resultado é final
+            reautenticar: Callback () -> bool chamado com o pool pausado quando a sessão expira
+                (refaz o login no navegador principal); sem ele o pool para na primeira expiração
+
+        Returns:
+            Lista de (registro, resultado) na mesma ordem de `registros`
+        """
+        for ordem, registro in enumerate(registros):
+            self._fila.put((ordem, registro, 1, 0.0))
+
+        n_workers = min(self.concorrencia, len(registros))
+        logger.info(f"Iniciando pool com {n_workers} navegadores para {len(registros)} registros")
+
+        cookies = self.principal.exportar_cookies() if n_workers > 1 else []
+        if n_workers > 1:
+            # input() no worker 1 com as outras threads rodando trava o lote e embaralha o terminal:
+            # ação manual vira AcaoManualNecessaria e entra na política de retentativas como nos outros
+            self.principal.interativo = False
+            self.principal.prefixo_capturas = "worker1_"
+        try:
+            return self._processar_fila(registros, n_workers, cookies, ao_concluir, reenfileirar, reautenticar)
+        finally:
+            self.principal.interativo = self._interativo_principal
+            self.principal.prefixo_capturas = ''
+
+    def _processar_fila(self, registros: List[Dict], n_workers: int, cookies: List[Dict],
+                        ao_concluir: Optional[Callable], reenfileirar: Optional[Callable],
+                        reautenticar: Optional[Callable]) -> List[tuple]:
+        """Corpo do executar: sobe os workers, espera a fila esvaziar e retoma depois de cada expiração"""
+        threads = [threading.Thread(
+            target=self._loop_worker, args=(1, self.principal, ao_concluir, reenfileirar), name="worker-1", daemon=True
+        )]
+        threads[0].start()
+
+        # Workers extras sobem escalonados - login simultâneo de vários Chromes já derrubou sessão
+        for numero in range(2, n_workers + 1):
+            if self._fila.empty() or self._pausa.is_set():
+                break
+            time.sleep(config.INTERVALO_INICIO_WORKERS)
+            automator = self._criar_worker(numero, cookies)
+            if automator is None:
+                continue
+            self._workers.append(automator)
+            thread = threading.Thread(
+                target=self._loop_worker, args=(numero, automator, ao_concluir, reenfileirar),
+                name=f"worker-{numero}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        # Sessão expirou: todos pararam depois do registro atual e os afetados já voltaram pra fila
+        while self._pausa.is_set() and not self._fila.empty():
+            ativos = self._retomar(reautenticar)
+            if not ativos:
+                break
+            self._rodar(ativos, ao_concluir, reenfileirar)
+
+        return [(registro, self._resultados[ordem]) for ordem, registro in enumerate(registros)
+                if ordem in self._resultados]
+
+    def fechar(self):
+        """Fecha os navegadores extras (o principal fica com quem criou)"""
+        for automator in self._workers:
+            try:
+                automator.fechar_navegador()
+            except Exception as e:
+                logger.debug(f"Erro ao fechar worker: {str(e)}")
+        self._workers = []
@@ -0,0 +1,398 @@
+"""
+Portal de pré-postagem simulado (localhost) pra medir a automação sem o site dos Correios
+
+Reproduz o caminho do processar_postagem com os mesmos textos e IDs do portal real:
+página inicial -> painel de objetos registrados -> "Nova pré-postagem" -> modal de
+Novo Destinatário (nomeDestinatario, cepDestinatario, telefoneDes...) com busca de CEP
+assíncrona -> Confirmar (fetch em /api/prepostagem, que devolve o código no JSON, igual ao portal)
+-> tela de confirmação com o código de rastreamento.
+Também tem a lista de destinatários salvos (busca pelo CPF) usada pela agenda.
+
+Não tem login: o portal simulado já abre "logado". As latências são configuráveis pra
+chegar perto do portal real. Toda página puxa um banner, uma fonte e um script de analytics
+(como o portal de verdade), servidos com latência própria - é o peso que o perfil enxuto corta.
+
+Uso:
+    python portal_simulado.py --porta 8090 --latencia-cep 0.5 --latencia-pagina 0.2
+    set CORREIOS_PORTAL_URL=http://127.0.0.1:8090
+"""
+import argparse
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+import config
+from etiquetas import montar_codigo
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_MODAL = [
+    ('nomeDestinatario', 'Nome'),
+    ('cpfCnpjDestinatario', 'CPF/CNPJ'),
+    ('cepDestinatario', 'CEP'),
+    ('logradouroDestinatario', 'Logradouro'),
+    ('numeroDestinatario', 'Número'),
+    ('complementoDestinatario', 'Complemento'),
+    ('bairroDestinatario', 'Bairro'),
+    ('cidadeDestinatario', 'Cidade'),
+    ('ufDestinatario', 'UF'),
+    ('telefoneDes', 'Telefone'),
+    ('emailDestinatario', 'E-mail'),
+]
+OBRIGATORIOS_MODAL = ['nomeDestinatario', 'cepDestinatario', 'logradouroDestinatario', 'numeroDestinatario',
+                      'bairroDestinatario', 'cidadeDestinatario', 'ufDestinatario']
+
+
+def _pagina(titulo: str, corpo: str, script: str = "") -> bytes:
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>{titulo} - Pré-Postagem (simulado)</title>
+<style>
+@font-face {{ font-family: "Correios"; src: url("/static/fonts/correios.woff2") format("woff2"); }}
+body {{ font-family: "Correios", sans-serif; margin: 2em; }}
+.modal {{ display: none; position: fixed; top: 5%; left: 20%; width: 60%; background: #fff; border: 1px solid #999; padding: 1em; }}
+.modal.aberto {{ display: block; }}
+.modal label {{ display: block; margin-top: .4em; }}
+.erro {{ color: #b00; }}
+</style></head>
+<body><header><img src="/static/img/banner.png" alt="Correios" width="240" height="40"> Correios - Pré-Postagem</header>
+{corpo}
+<script async src="/static/js/analytics.js"></script>
+<script>{script}</script>
+</body></html>""".encode('utf-8')
+
+
+PAGINA_INICIAL = _pagina("Bem-vindo", """
+<h1>Bem-vindo à Pré-Postagem</h1>
+<nav>
+  <a href="/prepostagem/painels/faturar/registrados">Pré-postagem a faturar de objetos registrados</a>
+</nav>
+""")
+
+PAINEL_REGISTRADOS = _pagina("Objetos registrados", """
+<h1>Pré-postagem a faturar - objetos registrados</h1>
+<button type="button" id="btnNovaPrePostagem" onclick="location.href='/prepostagem/nova'">Nova pré-postagem</button>
+""")
+
+# Cidade e UF vêm desabilitados, igual no portal real (só a busca do CEP preenche)
+_DESABILITADOS = {'cidadeDestinatario': ' disabled="true"', 'ufDestinatario': ' disabled="true"'}
+_CAMPOS_HTML = "\n".join(
+    f'  <label for="{campo}">{rotulo}</label>'
+    f'<input type="text" id="{campo}" name="{campo}"{_DESABILITADOS.get(campo, "")}>'
+    for campo, rotulo in CAMPOS_MODAL
+)
+
+SCRIPT_NOVA = """
+var modal = document.getElementById('modalDestinatario');
+var escolhido = document.getElementById('destinatarioEscolhido');
+var ultimoCep = null;
+
+function mostrarEscolhido(dest) {
+    escolhido.value = dest.id;
+    document.getElementById('destinatarioSelecionado').textContent =
+        'Destinatário: ' + dest.nomeDestinatario + ' - CEP ' + dest.cepDestinatario;
+}
+
+document.getElementById('btnNovoDestinatario').addEventListener('click', function () {
+    document.getElementById('erroModal').textContent = '';
+    modal.classList.add('aberto');
+});
+
+// Busca de CEP assíncrona: só preenche o que estiver vazio (cidade/UF vêm desabilitados no HTML)
+function buscarCep() {
+    var cep = document.getElementById('cepDestinatario').value.replace(/\\D/g, '');
+    if (cep.length !== 8 || cep === ultimoCep) { return; }
+    ultimoCep = cep;
+    fetch('/api/cep/' + cep).then(function (r) { return r.json(); }).then(function (endereco) {
+        Object.keys(endereco).forEach(function (id) {
+            var campo = document.getElementById(id);
+            if (campo && !campo.value.trim()) { campo.value = endereco[id]; }
+        });
+    });
+}
+['input', 'change', 'blur'].forEach(function (tipo) {
+    document.getElementById('cepDestinatario').addEventListener(tipo, buscarCep);
+});
+
+document.getElementById('btnSalvar').addEventListener('click', function () {
+    var dados = {}, faltando = [];
+    CAMPOS.forEach(function (id) { dados[id] = document.getElementById(id).value.trim(); });
+    OBRIGATORIOS.forEach(function (id) { if (!dados[id]) { faltando.push(id); } });
+    if (faltando.length) {
+        document.getElementById('erroModal').textContent = 'Campos obrigatórios: ' + faltando.join(', ');
+        return;
+    }
+    fetch('/api/destinatarios', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(dados)})
+        .then(function (r) { return r.json(); })
+        .then(function (dest) { mostrarEscolhido(dest); modal.classList.remove('aberto'); });
+});
+
+// Busca nos destinatários salvos (ENTER no campo) - resultado em linhas de tabela clicáveis
+document.getElementById('buscaDestinatario').addEventListener('keydown', function (evento) {
+    if (evento.key !== 'Enter') { return; }
+    evento.preventDefault();
+    var tabela = document.querySelector('#resultadoDestinatarios tbody');
+    fetch('/api/destinatarios?busca=' + encodeURIComponent(this.value))
+        .then(function (r) { return r.json(); })
+        .then(function (lista) {
+            tabela.innerHTML = '';
+            lista.forEach(function (dest) {
+                var linha = document.createElement('tr');
+                linha.className = 'destinatario-salvo';
+                linha.innerHTML = '<td></td><td></td><td></td>';
+                linha.cells[0].textContent = dest.nomeDestinatario;
+                linha.cells[1].textContent = dest.cpfFormatado;
+                linha.cells[2].textContent = dest.cepDestinatario;
+                linha.addEventListener('click', function () { mostrarEscolhido(dest); tabela.innerHTML = ''; });
+                tabela.appendChild(linha);
+            });
+        });
+});
+
+// Confirmar via fetch (igual ao portal): o código vem no JSON e a confirmação é montada na mesma página
+document.getElementById('formPrePostagem').addEventListener('submit', function (evento) {
+    evento.preventDefault();
+    fetch('/api/prepostagem', {method: 'POST', headers: {'Content-Type': 'application/json'},
+                               body: JSON.stringify({remetente: 'CEBRASPE', destinatario: escolhido.value})})
+        .then(function (r) { return r.json().then(function (corpo) { return {ok: r.ok, corpo: corpo}; }); })
+        .then(function (resposta) {
+            if (!resposta.ok) {
+                document.getElementById('erroConfirmacao').textContent = resposta.corpo.erro;
+                return;
+            }
+            var codigo = resposta.corpo.prePostagem.codigoObjeto;
+            history.replaceState(null, '', '/prepostagem/confirmacao/' + codigo);
+            document.title = 'Pré-postagem confirmada - Pré-Postagem (simulado)';
+            document.getElementById('conteudo').innerHTML = CONFIRMACAO.replace('{codigo}', codigo);
+        });
+});
+"""
+
+_CORPO_CONFIRMACAO = """
+<h1>Pré-postagem realizada com sucesso</h1>
+<p>Código de rastreamento: <span class="codigo-rastreamento">{codigo}</span></p>
+<button type="button" id="btnNovaPrePostagem" onclick="location.href='/prepostagem/nova'">Nova pré-postagem</button>
+<a href="/prepostagem/painels/faturar/registrados">Voltar para objetos registrados</a>
+"""
+
+PAGINA_NOVA = _pagina("Nova pré-postagem", f"""
+<main id="conteudo">
+<h1>Nova pré-postagem</h1>
+<form id="formPrePostagem" method="post" action="/prepostagem/confirmar">
+  <div class="remetente">Remetente: CEBRASPE - 18.284.407/0001-53</div>
+  <input type="hidden" name="remetente" value="CEBRASPE">
+  <label for="buscaDestinatario">Destinatário</label>
+  <input type="text" id="buscaDestinatario" placeholder="Buscar destinatário pelo CPF/CNPJ" autocomplete="off">
+  <table id="resultadoDestinatarios"><tbody></tbody></table>
+  <p id="destinatarioSelecionado"></p>
+  <input type="hidden" name="destinatario" id="destinatarioEscolhido">
+  <button type="button" id="btnNovoDestinatario">Novo Destinatário</button>
+  <button type="submit" id="btnConfirmar" class="btn-primary">Confirmar</button>
+  <p class="erro" id="erroConfirmacao"></p>
+</form>
+<div class="modal" id="modalDestinatario">
+  <h2>Novo Destinatário</h2>
+{_CAMPOS_HTML}
+  <p class="erro" id="erroModal"></p>
+  <button type="button" id="btnSalvar">Salvar</button>
+</div>
+</main>
+""", "var CAMPOS = " + json.dumps([c for c, _ in CAMPOS_MODAL]) + ";\nvar OBRIGATORIOS = "
+   + json.dumps(OBRIGATORIOS_MODAL) + ";\nvar CONFIRMACAO = " + json.dumps(_CORPO_CONFIRMACAO) + ";\n" + SCRIPT_NOVA)
+
+
+def _pagina_confirmacao(codigo: str) -> bytes:
+    return _pagina("Pré-postagem confirmada", _CORPO_CONFIRMACAO.replace("{codigo}", codigo))
+
+
+def _pagina_erro(mensagem: str) -> bytes:
+    return _pagina("Erro", f"""
+<h1>Não foi possível concluir a pré-postagem</h1>
+<p class="erro">{mensagem}</p>
+<a href="/prepostagem/nova">Tentar novamente</a>
+""")
+
+
+# Recursos estáticos: (content-type, corpo). Conteúdo é lixo, só o tamanho e a latência importam.
+RECURSOS_ESTATICOS = {
+    '/static/img/banner.png': ("image/png", b"\x89PNG\r\n\x1a\n" + bytes(150 * 1024)),
+    '/static/fonts/correios.woff2': ("font/woff2", b"wOF2" + bytes(80 * 1024)),
+    '/static/js/analytics.js': ("application/javascript", b"/* analytics */" + b" " * (40 * 1024)),
+}
+
+
+class EstadoPortal:
+    """Dados do portal simulado, compartilhados entre as threads do servidor"""
+
+    def __init__(self, latencia_cep: float = 0.5, latencia_pagina: float = 0.0, latencia_recurso: float = 0.0,
+                 inicio_codigos: int = 10000000):
+        self.latencia_cep = latencia_cep
+        self.latencia_pagina = latencia_pagina
+        self.latencia_recurso = latencia_recurso
+        self.recursos_servidos = 0
+        self._codigos = itertools.count(inicio_codigos)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.destinatarios: Dict[str, Dict] = {}
+        self.pre_postagens = []
+        self.requisicoes = 0
+
+    def salvar_destinatario(self, dados: Dict) -> Dict:
+        cpf = re.sub(r"\D", "", dados.get('cpfCnpjDestinatario', ''))
+        with self._lock:
+            destinatario = dict(dados, id=str(next(self._ids)), cpf=cpf,
+                                cpfFormatado=f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}" if len(cpf) == 11 else cpf)
+            self.destinatarios[destinatario['id']] = destinatario
+        return destinatario
+
+    def buscar_destinatarios(self, busca: str):
+        digitos = re.sub(r"\D", "", busca)
+        with self._lock:
+            return [d for d in self.destinatarios.values()
+                    if (digitos and digitos in d['cpf']) or (busca and busca.lower() in d['nomeDestinatario'].lower())]
+
+    def confirmar(self, id_destinatario: str) -> str:
+        with self._lock:
+            destinatario = self.destinatarios.get(id_destinatario)
+            if destinatario is None:
+                raise ValueError("Destinatário não informado")
+            codigo = montar_codigo("AN", next(self._codigos), "BR")
+            self.pre_postagens.append({'codigo': codigo, 'destinatario': destinatario['id']})
+        return codigo
+
+
+class HandlerPortal(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    estado: EstadoPortal = None
+
+    def log_message(self, formato, *args):
+        logger.debug(formato % args)
+
+    def _responder(self, status: int, corpo: bytes, tipo: str = "text/html; charset=utf-8", extras: Dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("Cache-Control", "no-store")
+        for chave, valor in (extras or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _json(self, dados, status: int = 200):
+        self._responder(status, json.dumps(dados, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8")
+
+    def _html(self, corpo: bytes, status: int = 200):
+        # Latência de página: simula o tempo de resposta/render do portal real
+        if self.estado.latencia_pagina:
+            time.sleep(self.estado.latencia_pagina)
+        self._responder(status, corpo)
+
+    def do_GET(self):
+        with self.estado._lock:
+            self.estado.requisicoes += 1
+        url = urlparse(self.path)
+        caminho = url.path.rstrip('/') or '/'
+
+        if caminho in ('/', '/bem-vindo'):
+            return self._html(PAGINA_INICIAL)
+        if caminho == '/prepostagem/painels/faturar/registrados':
+            return self._html(PAINEL_REGISTRADOS)
+        if caminho == '/prepostagem/nova':
+            return self._html(PAGINA_NOVA)
+        if caminho.startswith('/prepostagem/confirmacao/'):
+            return self._html(_pagina_confirmacao(caminho.rsplit('/', 1)[-1]))
+        if caminho in RECURSOS_ESTATICOS:
+            if self.estado.latencia_recurso:
+                time.sleep(self.estado.latencia_recurso)
+            with self.estado._lock:
+                self.estado.recursos_servidos += 1
+            tipo, corpo = RECURSOS_ESTATICOS[caminho]
+            return self._responder(200, corpo, tipo)
+        if caminho.startswith('/api/cep/'):
+            cep = caminho.rsplit('/', 1)[-1]
+            if self.estado.latencia_cep:
+                time.sleep(self.estado.latencia_cep)
+            return self._json({
+                'logradouroDestinatario': f"Rua Simulada {cep[-3:]}",
+                'bairroDestinatario': "Centro",
+                'cidadeDestinatario': "Brasília",
+                'ufDestinatario': "DF",
+            })
+        if caminho == '/api/destinatarios':
+            busca = parse_qs(url.query).get('busca', [''])[0]
+            return self._json(self.estado.buscar_destinatarios(busca))
+        return self._responder(404, _pagina_erro("Página não encontrada"))
+
+    def do_POST(self):
+        with self.estado._lock:
+            self.estado.requisicoes += 1
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = self.rfile.read(tamanho).decode('utf-8')
+        caminho = urlparse(self.path).path
+
+        if caminho == '/api/destinatarios':
+            try:
+                dados = json.loads(corpo)
+            except json.JSONDecodeError:
+                return self._json({'erro': 'JSON inválido'}, 400)
+            return self._json(self.estado.salvar_destinatario(dados))
+
+        if caminho == '/api/prepostagem':
+            try:
+                dados = json.loads(corpo)
+                codigo = self.estado.confirmar(str(dados.get('destinatario', '')))
+            except json.JSONDecodeError:
+                return self._json({'erro': 'JSON inválido'}, 400)
+            except ValueError as e:
+                return self._json({'erro': str(e)}, 400)
+            if self.estado.latencia_pagina:
+                time.sleep(self.estado.latencia_pagina)
+            return self._json({'prePostagem': {'id': len(self.estado.pre_postagens), 'codigoObjeto': codigo,
+                                               'remetente': dados.get('remetente'), 'situacao': 'PREPOSTADO'}})
+
+        if caminho == '/prepostagem/confirmar':
+            formulario = parse_qs(corpo)
+            try:
+                codigo = self.estado.confirmar(formulario.get('destinatario', [''])[0])
+            except ValueError as e:
+                return self._html(_pagina_erro(str(e)), 400)
+            # POST-redirect-GET igual ao portal: recarregar a confirmação não duplica a pré-postagem
+            return self._responder(303, b"", extras={"Location": f"/prepostagem/confirmacao/{codigo}"})
+
+        return self._responder(404, _pagina_erro("Página não encontrada"))
+
+
+def iniciar_portal(porta: int = 8090, latencia_cep: float = 0.5, latencia_pagina: float = 0.0,
+                   latencia_recurso: float = 0.0) -> ThreadingHTTPServer:
+    """Sobe o portal numa thread (pra benchmark). Porta 0 = qualquer porta livre; o estado fica em servidor.estado."""
+    estado = EstadoPortal(latencia_cep, latencia_pagina, latencia_recurso)
+    handler = type("HandlerPortalSimulado", (HandlerPortal,), {"estado": estado})
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), handler)
+    servidor.daemon_threads = True
+    servidor.estado = estado
+    threading.Thread(target=servidor.serve_forever, name="portal-simulado", daemon=True).start()
+    logger.info(f"Portal simulado em http://127.0.0.1:{servidor.server_address[1]} "
+                f"(CEP {latencia_cep}s, página {latencia_pagina}s, recurso {latencia_recurso}s)")
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Portal de pré-postagem simulado")
+    parser.add_argument("--porta", type=int, default=8090)
+    parser.add_argument("--latencia-cep", type=float, default=0.5, help="Segundos da busca de CEP")
+    parser.add_argument("--latencia-pagina", type=float, default=0.2, help="Segundos de atraso por página HTML")
+    parser.add_argument("--latencia-recurso", type=float, default=0.3, help="Segundos por imagem/fonte/script")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT)
+    servidor = iniciar_portal(args.porta, args.latencia_cep, args.latencia_pagina, args.latencia_recurso)
+    print(f"Portal simulado rodando em http://127.0.0.1:{servidor.server_address[1]} - CTRL+C pra parar")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.shutdown()
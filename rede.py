@@ -0,0 +1,156 @@
+"""
+Captura do código de rastreamento pelas respostas de rede do portal
+
+Depois do Confirmar o código era caçado na tela com 13 seletores de 2s cada - no pior caso
+26s por registro e ainda terminava em "NÃO CAPTURADO". Mas o portal devolve o código no JSON
+da requisição que confirma a pré-postagem. Com o log de performance do Chrome (goog:loggingPrefs)
+dá pra ver essas respostas XHR/fetch e ler o corpo via CDP (Network.getResponseBody): o código
+sai do JSON em milissegundos, sem depender de layout.
+
+Se o log não estiver disponível ou nenhuma resposta trouxer o código, o correios.py volta pra
+busca na tela como antes.
+"""
+import base64
+import json
+import logging
+import time
+from typing import Iterable, Optional
+import config
+from etiquetas import validar_codigo_objeto
+
+logger = logging.getLogger(__name__)
+
+
+def habilitar_log_rede(chrome_options):
+    """Liga o log de performance só com eventos de rede (sem Page/Tracing, que só fazem volume)"""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def _valores(dados, chaves: set) -> Iterable[tuple]:
+    """(é chave de código?, valor) de todas as strings do JSON, em profundidade"""
+    if isinstance(dados, dict):
+        for chave, valor in dados.items():
+            if isinstance(valor, str):
+                yield str(chave).lower() in chaves, valor
+            else:
+                yield from _valores(valor, chaves)
+    elif isinstance(dados, list):
+        for item in dados:
+            yield from _valores(item, chaves)
+
+
+def extrair_codigo_json(corpo: str) -> Optional[str]:
+    """
+    Código do objeto num corpo JSON de resposta do portal
+
+    Só vale código S10 com DV certo. Primeiro os campos conhecidos (config.CHAVES_CODIGO_OBJETO); se nenhum
+    bater, aceita um código válido desde que seja o único do corpo - com mais de um não dá pra saber qual é o nosso.
+    """
+    try:
+        dados = json.loads(corpo)
+    except (TypeError, ValueError):
+        return None
+    chaves = {c.lower() for c in config.CHAVES_CODIGO_OBJETO}
+    soltos = []
+    for chave_conhecida, valor in _valores(dados, chaves):
+        valor = valor.strip().replace(" ", "").upper()
+        if not validar_codigo_objeto(valor):
+            if chave_conhecida and valor:
+                logger.debug(f"Campo de código com valor que não é S10 válido: {valor[:20]}")
+            continue
+        if chave_conhecida:
+            return valor
+        if valor not in soltos:
+            soltos.append(valor)
+    return soltos[0] if len(soltos) == 1 else None
+
+
+class EscutaRespostas:
+
+    def __init__(self, driver):
+        self.driver = driver
+        # Vira False na primeira falha do get_log (Chrome sem goog:loggingPrefs) - daí só a tela
+        self.disponivel = True
+
+    def _eventos(self) -> list:
+        """Eventos de rede acumulados desde a última leitura (o chromedriver esvazia o log a cada get_log)"""
+        if not self.disponivel:
+            return []
+        try:
+            entradas = self.driver.get_log("performance")
+        except Exception as e:
+            self.disponivel = False
+            logger.info(f"Log de performance indisponível, código só pela tela: {str(e)[:80]}")
+            return []
+        eventos = []
+        for entrada in entradas:
+            try:
+                eventos.append(json.loads(entrada["message"])["message"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return eventos
+
+    def descartar(self):
+        """Joga fora o que já foi logado - chamar logo antes de clicar em Confirmar"""
+        self._eventos()
+
+    def _corpo(self, id_requisicao: str) -> Optional[str]:
+        try:
+            resposta = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": id_requisicao})
+        except Exception as e:
+            logger.debug(f"Corpo da resposta {id_requisicao} indisponível: {str(e)[:80]}")
+            return None
+        corpo = resposta.get("body", "")
+        if resposta.get("base64Encoded"):
+            corpo = base64.b64decode(corpo).decode("utf-8", errors="replace")
+        return corpo
+
+    @staticmethod
+    def _url_candidata(url: str) -> bool:
+        """URL que pode ser a da confirmação (config.URLS_RESPOSTA_CODIGO)"""
+        url = url.lower()
+        return any(trecho in url for trecho in config.URLS_RESPOSTA_CODIGO)
+
+    def aguardar_codigo(self, timeout: float = None) -> Optional[str]:
+        """
+        Espera a resposta da confirmação aparecer no log e tira o código do JSON dela
+
+        Termina antes do timeout se a página navegou (resposta de documento) e não sobrou
+        nenhuma requisição candidata em andamento - confirmação por formulário, sem JSON.
+
+        Returns:
+            Código do objeto, ou None (aí é com a busca na tela)
+        """
+        if not self.disponivel:
+            return None
+        prazo = time.monotonic() + (config.TEMPO_CAPTURA_CODIGO_REDE if timeout is None else timeout)
+        pendentes = {}
+        navegou = False
+        while True:
+            for evento in self._eventos():
+                metodo = evento.get("method")
+                parametros = evento.get("params", {})
+                id_requisicao = parametros.get("requestId")
+                if metodo == "Network.requestWillBeSent":
+                    url = parametros.get("request", {}).get("url", "")
+                    if parametros.get("type") in ("XHR", "Fetch") and self._url_candidata(url):
+                        pendentes[id_requisicao] = url
+                elif metodo == "Network.responseReceived":
+                    resposta = parametros.get("response", {})
+                    if parametros.get("type") == "Document":
+                        navegou = True
+                    elif id_requisicao in pendentes and "json" not in resposta.get("mimeType", ""):
+                        pendentes.pop(id_requisicao)
+                elif metodo == "Network.loadingFailed":
+                    pendentes.pop(id_requisicao, None)
+                elif metodo == "Network.loadingFinished" and id_requisicao in pendentes:
+                    url = pendentes.pop(id_requisicao)
+                    # Lê o corpo na hora: navegação completa pode descartar o buffer da página anterior
+                    codigo = extrair_codigo_json(self._corpo(id_requisicao))
+                    if codigo:
+                        logger.debug(f"Código {codigo} na resposta de {url}")
+                        return codigo
+            if not self.disponivel or (navegou and not pendentes) or time.monotonic() >= prazo:
+                return None
+            time.sleep(config.INTERVALO_CONSULTA_ESPERA)
@@ -4,14 +4,198 @@ Módulo para geração de relatórios
 Gerar relatórios em Excel e TXT pq o Excel é melhor de visualizar e eu prefiro TXT pra auditar rápido.
 """
 import pandas as pd
+import json
 import logging
+import os
+import sys
+import threading
+from array import array
 from datetime import datetime
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional
 from pathlib import Path
+import xlsxwriter
 import config
 
 logger = logging.getLogger(__name__)
 
+TIPOS_RESULTADO = ('sucesso', 'erro', 'invalido')
+
+
+def _linhas_resumo(total_sucesso: int, total_erro: int, total_invalido: int) -> List[list]:
+    """Linhas [métrica, valor] da aba Resumo"""
+    total_geral = total_sucesso + total_erro + total_invalido
+    taxa_sucesso = (total_sucesso / total_geral * 100) if total_geral > 0 else 0
+    return [
+        ['Data/Hora do Processamento', datetime.now().strftime("%d/%m/%Y %H:%M:%S")],
+        ['Total de Registros', total_geral],
+        ['Dados Inválidos (não processados)', total_invalido],
+        ['Processados com Sucesso', total_sucesso],
+        ['Processados com Erro', total_erro],
+        ['Taxa de Sucesso (%)', f"{taxa_sucesso:.2f}%"],
+    ]
+
+
+def _valor_celula(valor):
+    """Mesmo tratamento do to_excel do pandas: NaN vira célula vazia, lista/dict vira texto"""
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return None
+    if isinstance(valor, (str, bool, int, float, datetime)):
+        return valor
+    if hasattr(valor, 'item'):
+        # escalar do numpy (int64, float64...)
+        return _valor_celula(valor.item())
+    return str(valor)
+
+
+def escrever_xlsx_streaming(caminho: Path, resumo: List[list], abas: List[tuple]) -> Path:
+    """
+    Grava o workbook linha a linha (xlsxwriter em constant_memory) - memória constante, não importa o tamanho
+
+    Cada linha vai pro arquivo temporário da aba assim que é escrita, então as abas têm que ser
+    escritas uma de cada vez e em ordem (é o que acontece aqui).
+
+    Args:
+        caminho: Arquivo .xlsx de saída
+        resumo: Linhas [métrica, valor] da aba Resumo
+        abas: Lista de (nome da aba, colunas, iterável de dicts); aba sem colunas não é criada
+    """
+    wb = xlsxwriter.Workbook(str(caminho), {
+        'constant_memory': True,
+        # Texto da planilha é texto: '=...' não vira fórmula e e-mail/URL não vira hyperlink
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'default_date_format': 'dd/mm/yyyy hh:mm:ss',
+    })
+    negrito = wb.add_format({'bold': True})
+    try:
+        aba_resumo = wb.add_worksheet('Resumo')
+        aba_resumo.write_row(0, 0, ['Métrica', 'Valor'], negrito)
+        for numero, linha in enumerate(resumo, 1):
+            aba_resumo.write_row(numero, 0, linha)
+
+        for nome, colunas, registros in abas:
+            if not colunas:
+                continue
+            planilha = wb.add_worksheet(nome)
+            planilha.write_row(0, 0, colunas, negrito)
+            escrever = planilha.write_row
+            for numero, registro in enumerate(registros, 1):
+                obter = registro.get
+                escrever(numero, 0, [_valor_celula(obter(coluna)) for coluna in colunas])
+    finally:
+        wb.close()
+    return caminho
+
+
+def _colunas(registros: List[Dict]) -> list:
+    """União das chaves na ordem em que aparecem (a mesma do DataFrame do pandas)"""
+    colunas = {}
+    for registro in registros:
+        colunas.update(dict.fromkeys(registro))
+    return list(colunas)
+
+
+def _escrever_em_blocos(f, registros: Iterable[Dict], formatar, tamanho_bloco: int):
+    """Formata cada registro numa string só e grava de `tamanho_bloco` em `tamanho_bloco`"""
+    bloco = []
+    for idx, registro in enumerate(registros, 1):
+        bloco.append(formatar(idx, registro))
+        if len(bloco) >= tamanho_bloco:
+            f.write(''.join(bloco))
+            bloco.clear()
+    if bloco:
+        f.write(''.join(bloco))
+
+
+def _texto_sucesso(idx: int, resultado: Dict) -> str:
+    texto = (f"{idx}. Linha {resultado.get('linha', 'N/A')}\n"
+             f"   Destinatário: {resultado.get('destinatario', 'N/A')}\n"
+             f"   Código de Rastreamento: {resultado.get('codigo_rastreamento', 'N/A')}\n")
+    if 'codigo_coleta' in resultado:
+        texto += f"   Código de Coleta: {resultado.get('codigo_coleta', 'N/A')}\n"
+    if resultado.get('alerta_codigo'):
+        texto += f"   ⚠ Conferir código: {resultado['alerta_codigo']}\n"
+    return texto + "\n"
+
+
+def _texto_erro(idx: int, resultado: Dict) -> str:
+    texto = (f"{idx}. Linha {resultado.get('linha', 'N/A')}\n"
+             f"   Destinatário: {resultado.get('destinatario', 'N/A')}\n"
+             f"   Erro: {resultado.get('erro', 'Erro desconhecido')}\n")
+    if resultado.get('tipo_falha'):
+        texto += f"   Tipo: {resultado['tipo_falha']} ({resultado.get('tentativas', 1)} tentativa(s))\n"
+    if resultado.get('historico_tentativas'):
+        texto += f"   Histórico: {resultado['historico_tentativas']}\n"
+    return texto + "\n"
+
+
+def _texto_invalido(idx: int, resultado: Dict) -> str:
+    erros = ''.join(f"   - {erro}\n" for erro in resultado.get('_erros', ['Erro de validação']))
+    return (f"{idx}. Linha {resultado.get('_linha', 'N/A')}\n"
+            f"   Destinatário: {resultado.get('Nome Destinatário') or resultado.get('COORDENADOR MUNICIPAL', 'N/A')}\n"
+            f"{erros}\n")
+
+
+def escrever_texto(caminho: Path, total_sucesso: int, total_erro: int, total_invalido: int,
+                   sucessos: Iterable[Dict], erros: Iterable[Dict], invalidos: Iterable[Dict]) -> Path:
+    """
+    Relatório TXT a partir de iteráveis (listas ou leitura em streaming do relatório incremental)
+
+    Cada registro vira uma string e vai pro arquivo em blocos de config.BLOCO_RELATORIO_TEXTO registros
+    (antes eram 4-5 f.write por registro).
+    """
+    total_geral = total_sucesso + total_erro + total_invalido
+    cabecalho = [
+        "="*80 + "\n",
+        "RELATÓRIO DE PROCESSAMENTO - AUTOMATIZADOR CORREIOS\n",
+        "="*80 + "\n\n",
+        f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n",
+        "RESUMO\n",
+        "-"*80 + "\n",
+        f"Total de Registros: {total_geral}\n",
+        f"Dados Inválidos (não processados): {total_invalido}\n",
+        f"Processados com Sucesso: {total_sucesso}\n",
+        f"Processados com Erro: {total_erro}\n",
+    ]
+    if total_geral > 0:
+        taxa = (total_sucesso / total_geral * 100)
+        cabecalho.append(f"Taxa de Sucesso: {taxa:.2f}%\n")
+    cabecalho.append("\n")
+
+    secoes = [
+        (total_sucesso, "PROCESSAMENTOS BEM-SUCEDIDOS", sucessos, _texto_sucesso),
+        (total_erro, "PROCESSAMENTOS COM ERRO", erros, _texto_erro),
+        (total_invalido, "DADOS INVÁLIDOS (NÃO PROCESSADOS)", invalidos, _texto_invalido),
+    ]
+    with open(caminho, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        f.write(''.join(cabecalho))
+        for total, titulo, registros, formatar in secoes:
+            if not total:
+                continue
+            f.write("\n" + "="*80 + "\n" + titulo + "\n" + "="*80 + "\n\n")
+            _escrever_em_blocos(f, registros, formatar, config.BLOCO_RELATORIO_TEXTO)
+    return caminho
+
+
+def exibir_resumo(total_sucesso: int, total_erro: int, total_invalido: int):
+    """Resumo no console"""
+    print("\n" + "="*80)
+    print("RESUMO DO PROCESSAMENTO")
+    print("="*80)
+    
+    total_geral = total_sucesso + total_erro + total_invalido
+    
+    print(f"\nTotal de Registros: {total_geral}")
+    print(f"Dados Inválidos (não processados): {total_invalido}")
+    print(f"✓ Processados com Sucesso: {total_sucesso}")
+    print(f"✗ Processados com Erro: {total_erro}")
+    
+    if total_geral > 0:
+        taxa = (total_sucesso / total_geral * 100)
+        print(f"\nTaxa de Sucesso: {taxa:.2f}%")
+    
+    print("="*80 + "\n")
+
 
 class ReportGenerator:
     
@@ -53,12 +237,22 @@ class ReportGenerator:
         self, 
         resultados_sucesso: List[Dict],
         resultados_erro: List[Dict],
-        dados_invalidos: List[Dict] = None
+        dados_invalidos: List[Dict] = None,
+        desempenho: List[Dict] = None
     ) -> Path:
-        """Gera relatório completo em Excel com abas"""
+        """
+        Gera relatório completo em Excel com abas
+        
+        Args:
+            desempenho: Linhas do MedidorTempos.resumo() (p50/p95/máx por etapa) - vira a aba 'Desempenho'
+        """
         nome_arquivo = f"relatorio_{self.timestamp}.xlsx"
         caminho_relatorio = config.RELATORIOS_DIR / nome_arquivo
         
+        if config.MOTOR_RELATORIO == "rapido":
+            return self._gerar_excel_rapido(caminho_relatorio, resultados_sucesso, resultados_erro,
+                                            dados_invalidos or [], desempenho or [])
+        
         try:
             with pd.ExcelWriter(caminho_relatorio, engine='openpyxl') as writer:
                 self._criar_aba_resumo(
@@ -82,6 +276,9 @@ class ReportGenerator:
                     df_invalidos = pd.DataFrame(dados_invalidos)
                     df_invalidos.to_excel(writer, sheet_name='Dados Inválidos', index=False)
                     logger.info(f"{len(dados_invalidos)} dados inválidos registrados")
+                
+                if desempenho:
+                    pd.DataFrame(desempenho).to_excel(writer, sheet_name='Desempenho', index=False)
             
             logger.info(f"Relatório gerado: {caminho_relatorio}")
             return caminho_relatorio
@@ -90,32 +287,27 @@ class ReportGenerator:
             logger.error(f"Erro ao gerar relatório: {str(e)}")
             raise
     
+    def _gerar_excel_rapido(self, caminho_relatorio: Path, resultados_sucesso: List[Dict],
+                            resultados_erro: List[Dict], dados_invalidos: List[Dict], desempenho: List[Dict]) -> Path:
+        """Mesmo workbook do caminho pandas, sem montar DataFrame: linha a linha em constant_memory"""
+        try:
+            escrever_xlsx_streaming(
+                caminho_relatorio,
+                _linhas_resumo(len(resultados_sucesso), len(resultados_erro), len(dados_invalidos)),
+                [('Sucessos', _colunas(resultados_sucesso), resultados_sucesso),
+                 ('Erros', _colunas(resultados_erro), resultados_erro),
+                 ('Dados Inválidos', _colunas(dados_invalidos), dados_invalidos),
+                 ('Desempenho', _colunas(desempenho), desempenho)]
+            )
+            logger.info(f"Relatório gerado: {caminho_relatorio} ({len(resultados_sucesso)} sucessos, "
+                        f"{len(resultados_erro)} erros, {len(dados_invalidos)} inválidos)")
+            return caminho_relatorio
+        except Exception as e:
+            logger.error(f"Erro ao gerar relatório: {str(e)}")
+            raise
+    
     def _criar_aba_resumo(self, writer, total_sucesso: int, total_erro: int, total_invalido: int):
-        total_processado = total_sucesso + total_erro
-        total_geral = total_processado + total_invalido
-        
-        taxa_sucesso = (total_sucesso / total_geral * 100) if total_geral > 0 else 0
-        
-        resumo_data = {
-            'Métrica': [
-                'Data/Hora do Processamento',
-                'Total de Registros',
-                'Dados Inválidos (não processados)',
-                'Processados com Sucesso',
-                'Processados com Erro',
-                'Taxa de Sucesso (%)'
-            ],
-            'Valor': [
-                datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-                total_geral,
-                total_invalido,
-                total_sucesso,
-                total_erro,
-                f"{taxa_sucesso:.2f}%"
-            ]
-        }
-        
-        df_resumo = pd.DataFrame(resumo_data)
+        df_resumo = pd.DataFrame(_linhas_resumo(total_sucesso, total_erro, total_invalido), columns=['Métrica', 'Valor'])
         df_resumo.to_excel(writer, sheet_name='Resumo', index=False)
     
     def gerar_relatorio_texto(
@@ -129,62 +321,11 @@ class ReportGenerator:
         caminho_relatorio = config.RELATORIOS_DIR / nome_arquivo
         
         try:
-            with open(caminho_relatorio, 'w', encoding='utf-8') as f:
-                f.write("="*80 + "\n")
-                f.write("RELATÓRIO DE PROCESSAMENTO - AUTOMATIZADOR CORREIOS\n")
-                f.write("="*80 + "\n\n")
-                
-                f.write(f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-                
-                total_processado = len(resultados_sucesso) + len(resultados_erro)
-                total_invalido = len(dados_invalidos) if dados_invalidos else 0
-                total_geral = total_processado + total_invalido
-                
-                f.write("RESUMO\n")
-                f.write("-"*80 + "\n")
-                f.write(f"Total de Registros: {total_geral}\n")
-                f.write(f"Dados Inválidos (não processados): {total_invalido}\n")
-                f.write(f"Processados com Sucesso: {len(resultados_sucesso)}\n")
-                f.write(f"Processados com Erro: {len(resultados_erro)}\n")
-                if total_geral > 0:
-                    taxa = (len(resultados_sucesso) / total_geral * 100)
-                    f.write(f"Taxa de Sucesso: {taxa:.2f}%\n")
-                f.write("\n")
-                
-                if resultados_sucesso:
-                    f.write("\n" + "="*80 + "\n")
-                    f.write("PROCESSAMENTOS BEM-SUCEDIDOS\n")
-                    f.write("="*80 + "\n\n")
-                    for idx, resultado in enumerate(resultados_sucesso, 1):
-                        f.write(f"{idx}. Linha {resultado.get('linha', 'N/A')}\n")
-                        f.write(f"   Destinatário: {resultado.get('destinatario', 'N/A')}\n")
-                        f.write(f"   Código de Rastreamento: {resultado.get('codigo_rastreamento', 'N/A')}\n")
-                        if 'codigo_coleta' in resultado:
-                            f.write(f"   Código de Coleta: {resultado.get('codigo_coleta', 'N/A')}\n")
-                        f.write("\n")
-                
-                if resultados_erro:
-                    f.write("\n" + "="*80 + "\n")
-                    f.write("PROCESSAMENTOS COM ERRO\n")
-                    f.write("="*80 + "\n\n")
-                    for idx, resultado in enumerate(resultados_erro, 1):
-                        f.write(f"{idx}. Linha {resultado.get('linha', 'N/A')}\n")
-                        f.write(f"   Destinatário: {resultado.get('destinatario', 'N/A')}\n")
-                        f.write(f"   Erro: {resultado.get('erro', 'Erro desconhecido')}\n")
-                        f.write("\n")
-                
-                if dados_invalidos:
-                    f.write("\n" + "="*80 + "\n")
-                    f.write("DADOS INVÁLIDOS (NÃO PROCESSADOS)\n")
-                    f.write("="*80 + "\n\n")
-                    for idx, resultado in enumerate(dados_invalidos, 1):
-                        f.write(f"{idx}. Linha {resultado.get('_linha', 'N/A')}\n")
-                        f.write(f"   Destinatário: {resultado.get('Nome Destinatário', 'N/A')}\n")
-                        erros = resultado.get('_erros', ['Erro de validação'])
-                        for erro in erros:
-                            f.write(f"   - {erro}\n")
-                        f.write("\n")
-            
+            escrever_texto(
+                caminho_relatorio,
+                len(resultados_sucesso), len(resultados_erro), len(dados_invalidos) if dados_invalidos else 0,
+                resultados_sucesso, resultados_erro, dados_invalidos or []
+            )
             logger.info(f"Relatório texto gerado: {caminho_relatorio}")
             return caminho_relatorio
             
@@ -199,29 +340,179 @@ class ReportGenerator:
         dados_invalidos: List[Dict] = None
     ):
         """Exibe resumo no console"""
-        print("\n" + "="*80)
-        print("RESUMO DO PROCESSAMENTO")
-        print("="*80)
-        
-        total_invalido = len(dados_invalidos) if dados_invalidos else 0
-        total_processado = len(resultados_sucesso) + len(resultados_erro)
-        total_geral = total_processado + total_invalido
-        
-        print(f"\nTotal de Registros: {total_geral}")
-        print(f"Dados Inválidos (não processados): {total_invalido}")
-        print(f"✓ Processados com Sucesso: {len(resultados_sucesso)}")
-        print(f"✗ Processados com Erro: {len(resultados_erro)}")
-        
-        if total_geral > 0:
-            taxa = (len(resultados_sucesso) / total_geral * 100)
-            print(f"\nTaxa de Sucesso: {taxa:.2f}%")
+        exibir_resumo(len(resultados_sucesso), len(resultados_erro), len(dados_invalidos) if dados_invalidos else 0)
+
+
+class RelatorioIncremental:
+    """
+    Relatório gravado conforme os resultados chegam
+    
+    Antes tudo ficava em listas até o `finally` da execução: se o processo morresse antes, não tinha
+    relatório nenhum, e a memória crescia com o lote. Aqui cada resultado vira uma linha JSONL
+    (relatorios/resultados_<timestamp>.jsonl) no momento em que termina. O Excel/TXT final é montado
+    lendo esse arquivo em streaming, e dá pra gerar relatório parcial no meio da execução
+    (ou depois de um crash: `python relatorio.py relatorios/resultados_<timestamp>.jsonl`).
+    
+    Em memória só ficam os totais, as colunas vistas e (linha, posição no arquivo) de cada resultado
+    pra o relatório sair ordenado por linha.
+    """
+    
+    ABAS = (('sucesso', 'Sucessos'), ('erro', 'Erros'), ('invalido', 'Dados Inválidos'))
+    
+    def __init__(self, timestamp: str = None, caminho: Optional[Path] = None, medidor=None):
+        """
+        Args:
+            timestamp: Sufixo dos arquivos (padrão: agora) - o mesmo do ReportGenerator da execução
+            caminho: Arquivo JSONL (se já existir, os resultados dele são carregados e o novo vai no fim)
+            medidor: MedidorTempos da execução - se informado, o Excel ganha a aba 'Desempenho'
+        """
+        self.medidor = medidor
+        if timestamp is None and caminho is not None and Path(caminho).stem.startswith('resultados_'):
+            # Regerando de um JSONL antigo: relatório sai com o timestamp da execução original
+            timestamp = Path(caminho).stem[len('resultados_'):]
+        self.timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.caminho = Path(caminho or config.RELATORIOS_DIR / f"resultados_{self.timestamp}.jsonl")
+        self.totais = dict.fromkeys(TIPOS_RESULTADO, 0)
+        # dict como conjunto ordenado: mesma ordem de colunas que o DataFrame do pandas daria
+        self.colunas: Dict[str, dict] = {tipo: {} for tipo in TIPOS_RESULTADO}
+        self._linhas = {tipo: array('q') for tipo in TIPOS_RESULTADO}
+        self._posicoes = {tipo: array('q') for tipo in TIPOS_RESULTADO}
+        self._lock = threading.Lock()
+        self._arquivo = None
+        if self.caminho.exists():
+            self._carregar()
+    
+    def _indexar(self, tipo: str, dados: Dict, posicao: int):
+        self.totais[tipo] += 1
+        self.colunas[tipo].update(dict.fromkeys(dados))
+        linha = dados.get('_linha' if tipo == 'invalido' else 'linha')
+        self._linhas[tipo].append(linha if isinstance(linha, int) else 0)
+        self._posicoes[tipo].append(posicao)
+    
+    def _carregar(self):
+        with open(self.caminho, 'rb') as f:
+            posicao = 0
+            for numero, linha in enumerate(f, 1):
+                try:
+                    entrada = json.loads(linha)
+                    self._indexar(entrada['tipo'], entrada['dados'], posicao)
+                except (ValueError, KeyError):
+                    # Última linha cortada no meio do crash - ignora
+                    logger.warning(f"Relatório incremental: linha {numero} ilegível em {self.caminho.name}, ignorando")
+                posicao += len(linha)
+        logger.info(f"Relatório incremental carregado: {sum(self.totais.values())} resultados em {self.caminho.name}")
+    
+    def _abrir(self):
+        if self._arquivo is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo = open(self.caminho, 'ab')
+            # Fecha linha cortada de um crash anterior pra próxima entrada não grudar nela
+            if self._arquivo.tell() > 0:
+                with open(self.caminho, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._arquivo.write(b"\n")
+        return self._arquivo
+    
+    def _gravar(self, tipo: str, dados: Dict):
+        linha = json.dumps({'tipo': tipo, 'dados': dados}, ensure_ascii=False,
+                           default=lambda v: v.item() if hasattr(v, 'item') else str(v))
+        with self._lock:
+            arquivo = self._abrir()
+            posicao = arquivo.tell()
+            arquivo.write(linha.encode('utf-8') + b"\n")
+            # flush por resultado: se o processo morrer, o que terminou já está no disco
+            arquivo.flush()
+            self._indexar(tipo, dados, posicao)
+    
+    def adicionar(self, resultado: Dict):
+        """Resultado de processamento (status 'sucesso' ou erro)"""
+        self._gravar('sucesso' if resultado.get('status') == 'sucesso' else 'erro', resultado)
+    
+    def adicionar_invalido(self, registro: Dict):
+        """Registro que não passou na validação da planilha (com '_erros')"""
+        self._gravar('invalido', registro)
+    
+    @property
+    def total_processado(self) -> int:
+        return self.totais['sucesso'] + self.totais['erro']
+    
+    def iterar(self, tipo: str) -> Iterable[Dict]:
+        """Resultados de um tipo, ordenados por linha, lidos do arquivo um por vez"""
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.flush()
+            linhas = self._linhas[tipo]
+            posicoes = array('q', self._posicoes[tipo])
+        if not posicoes:
+            return
+        # sorted é estável: mesma linha (ex: erro e depois sucesso de retentativa) mantém a ordem de chegada
+        ordem = sorted(range(len(posicoes)), key=linhas.__getitem__)
+        with open(self.caminho, 'rb') as f:
+            for i in ordem:
+                f.seek(posicoes[i])
+                yield json.loads(f.readline())['dados']
+    
+    def gerar_excel(self, caminho: Optional[Path] = None) -> Path:
+        """Workbook Resumo/Sucessos/Erros/Dados Inválidos, escrito em streaming a partir do JSONL"""
+        caminho = Path(caminho or config.RELATORIOS_DIR / f"relatorio_{self.timestamp}.xlsx")
+        resumo = _linhas_resumo(self.totais['sucesso'], self.totais['erro'], self.totais['invalido'])
+        abas = [(nome, list(self.colunas[tipo]), self.iterar(tipo)) for tipo, nome in self.ABAS]
+        if self.medidor is not None:
+            desempenho = self.medidor.resumo()
+            abas.append(('Desempenho', _colunas(desempenho), desempenho))
+        escrever_xlsx_streaming(caminho, resumo, abas)
+        logger.info(f"Relatório gerado: {caminho} ({self.totais['sucesso']} sucessos, "
+                    f"{self.totais['erro']} erros, {self.totais['invalido']} inválidos)")
+        return caminho
+    
+    def gerar_texto(self, caminho: Optional[Path] = None) -> Path:
+        caminho = Path(caminho or config.RELATORIOS_DIR / f"relatorio_{self.timestamp}.txt")
+        escrever_texto(
+            caminho, self.totais['sucesso'], self.totais['erro'], self.totais['invalido'],
+            self.iterar('sucesso'), self.iterar('erro'), self.iterar('invalido')
+        )
+        logger.info(f"Relatório texto gerado: {caminho}")
+        return caminho
+    
+    def gerar_parcial(self) -> Optional[Path]:
+        """
+        Excel parcial com o que já terminou (relatorio_<timestamp>_parcial.xlsx, sobrescrito a cada chamada)
         
-        print("="*80 + "\n")
+        Grava num temporário e troca no final: quem abrir o arquivo no meio nunca pega ele pela metade.
+        """
+        caminho = config.RELATORIOS_DIR / f"relatorio_{self.timestamp}_parcial.xlsx"
+        temporario = caminho.with_suffix('.tmp')
+        try:
+            self.gerar_excel(temporario)
+            os.replace(temporario, caminho)
+            return caminho
+        except Exception as e:
+            # Excel aberto no Windows trava o arquivo - tenta de novo no próximo parcial
+            logger.warning(f"Não foi possível gerar relatório parcial: {str(e)}")
+            return None
+    
+    def exibir_resumo_console(self):
+        exibir_resumo(self.totais['sucesso'], self.totais['erro'], self.totais['invalido'])
+    
+    def fechar(self):
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     
+    # Regerar o relatório de uma execução que morreu no meio: python relatorio.py relatorios/resultados_X.jsonl
+    if len(sys.argv) == 2:
+        incremental = RelatorioIncremental(caminho=Path(sys.argv[1]))
+        incremental.exibir_resumo_console()
+        print(f"✓ Relatório Excel: {incremental.gerar_excel()}")
+        print(f"✓ Relatório TXT: {incremental.gerar_texto()}")
+        sys.exit(0)
+    
     generator = ReportGenerator()
     
     sucesso = [
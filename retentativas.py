@@ -0,0 +1,145 @@
+"""
+Retentativas de registros que falharam
+
+Antes qualquer soluço do portal (timeout, 502, elemento que sumiu no meio de um re-render)
+virava erro definitivo e a linha tinha que ser refeita na mão. Aqui cada falha é classificada:
+
+  - transitoria: rede/portal instável (timeout, 5xx, conexão, DOM re-renderizado) - tenta de novo
+    até config.MAX_TENTATIVAS, com espera exponencial (config.TEMPO_ENTRE_TENTATIVAS) e jitter
+  - interface: seletor/botão não encontrado ou ação manual - volta pro fim da fila
+    config.MAX_REENFILEIRAMENTOS_ACAO_MANUAL vezes (muitas vezes é o portal lento naquele momento)
+  - dados: o portal recusou o conteúdo do registro - repetir não adianta
+
+A retentativa vai pro fim da fila com um horário mínimo de início, então os registros saudáveis
+não ficam esperando o backoff. O histórico de cada tentativa vai junto com o resultado final pro relatório.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+TRANSITORIA = "transitoria"
+INTERFACE = "interface"
+DADOS = "dados"
+
+# Exceções do Selenium/rede que costumam passar sozinhas
+TIPOS_TRANSITORIOS = {
+    'TimeoutException', 'StaleElementReferenceException', 'WebDriverException',
+    'ConnectionError', 'ConnectionResetError', 'ConnectionRefusedError', 'ProtocolError',
+    'MaxRetryError', 'ReadTimeoutError', 'RemoteDisconnected',
+    # requests (backend API)
+    'Timeout', 'ReadTimeout', 'ConnectTimeout', 'ChunkedEncodingError',
+}
+TIPOS_INTERFACE = {
+    'AcaoManualNecessaria', 'NoSuchElementException', 'ElementNotInteractableException',
+    'ElementClickInterceptedException', 'InvalidSelectorException',
+}
+TRECHOS_TRANSITORIOS = (
+    'timeout', 'timed out', 'err_connection', 'err_internet', 'err_name_not_resolved', 'err_network',
+    'connection reset', 'connection refused', 'bad gateway', 'service unavailable', 'gateway time',
+    ' 502', ' 503', ' 504', 'stale element',
+)
+# Web service respondeu e recusou (SOAP Fault) - mandar o mesmo XML de novo dá o mesmo Fault
+TIPOS_DADOS = {'ErroApiCorreios'}
+# Mensagens de validação do portal (ou do fluxo) sobre o conteúdo do registro
+TRECHOS_DADOS = ('inválid', 'invalid', 'obrigatóri', 'não informado', 'não confere', 'incorret', 'não permitid')
+
+
+def classificar_falha(resultado: Dict) -> str:
+    """'transitoria', 'interface' ou 'dados' a partir do resultado de erro do processar_*"""
+    if resultado.get('acao_manual'):
+        return INTERFACE
+    mensagem = str(resultado.get('erro', '')).lower()
+    tipo = resultado.get('tipo_erro', '')
+    if any(trecho in mensagem for trecho in TRECHOS_DADOS):
+        return DADOS
+    if tipo in TIPOS_INTERFACE:
+        return INTERFACE
+    if tipo in TIPOS_TRANSITORIOS or any(trecho in mensagem for trecho in TRECHOS_TRANSITORIOS):
+        return TRANSITORIA
+    if tipo in TIPOS_DADOS:
+        return DADOS
+    # Exception genérica do fluxo ("Elemento não encontrado: ...", "Não está logado...")
+    return INTERFACE
+
+
+class PoliticaRetentativas:
+
+    def __init__(self, max_tentativas: int = None, espera_base: float = None, espera_maxima: float = None,
+                 max_reenfileiramentos_interface: int = None, semente: int = None):
+        """
+        Args:
+            max_tentativas: Tentativas no total pra falha transitória (padrão: config.MAX_TENTATIVAS)
+            espera_base: Espera antes da 2ª tentativa; dobra a cada uma (padrão: config.TEMPO_ENTRE_TENTATIVAS)
+            espera_maxima: Teto da espera (padrão: config.TEMPO_MAXIMO_ENTRE_TENTATIVAS)
+            max_reenfileiramentos_interface: Padrão config.MAX_REENFILEIRAMENTOS_ACAO_MANUAL
+            semente: Semente do jitter (só pra teste/benchmark)
+        """
+        self.max_tentativas = max_tentativas or config.MAX_TENTATIVAS
+        self.espera_base = config.TEMPO_ENTRE_TENTATIVAS if espera_base is None else espera_base
+        self.espera_maxima = config.TEMPO_MAXIMO_ENTRE_TENTATIVAS if espera_maxima is None else espera_maxima
+        self.max_interface = (config.MAX_REENFILEIRAMENTOS_ACAO_MANUAL
+                              if max_reenfileiramentos_interface is None else max_reenfileiramentos_interface)
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        # linha -> tentativas anteriores (só de quem falhou pelo menos uma vez)
+        self._historico: Dict[object, List[Dict]] = {}
+
+    def espera(self, tentativa: int) -> float:
+        """Segundos antes da próxima tentativa depois da falha nº `tentativa` (exponencial, metade com jitter)"""
+        teto = min(self.espera_maxima, self.espera_base * 2 ** (tentativa - 1))
+        with self._lock:
+            return teto / 2 + self._aleatorio.uniform(0, teto / 2)
+
+    def avaliar(self, registro: Dict, resultado: Dict, tentativa: int) -> Optional[float]:
+        """
+        Decide o destino do resultado da tentativa nº `tentativa`
+
+        Returns:
+            Segundos até a retentativa (registro volta pro fim da fila), ou None se o resultado é final -
+            nesse caso `resultado` sai anotado com tentativas/tipo_falha/historico_tentativas
+        """
+        linha = registro.get('_linha')
+        if resultado.get('status') == 'sucesso':
+            self._finalizar(linha, resultado, tentativa)
+            return None
+
+        tipo = classificar_falha(resultado)
+        with self._lock:
+            self._historico.setdefault(linha, []).append({
+                'tentativa': tentativa,
+                'tipo': tipo,
+                'erro': str(resultado.get('erro', ''))[:200],
+                'duracao_s': resultado.get('duracao_s'),
+                'timestamp': resultado.get('timestamp', time.strftime("%Y-%m-%d %H:%M:%S")),
+            })
+
+        espera = None
+        if resultado.get('confirmacao_enviada'):
+            # Confirmar já foi clicado: refazer pode duplicar a pré-postagem no portal
+            logger.warning(f"Linha {linha}: falhou depois da confirmação - sem retentativa, conferir no portal")
+        elif tipo == TRANSITORIA and tentativa < self.max_tentativas:
+            espera = self.espera(tentativa)
+        elif tipo == INTERFACE and tentativa <= self.max_interface:
+            espera = 0.0
+
+        if espera is None:
+            resultado['tipo_falha'] = tipo
+            self._finalizar(linha, resultado, tentativa)
+            return None
+        logger.info(f"Linha {linha}: falha {tipo} na tentativa {tentativa} - volta pro fim da fila "
+                    f"(começa daqui a {espera:.1f}s)")
+        return espera
+
+    def _finalizar(self, linha, resultado: Dict, tentativa: int):
+        with self._lock:
+            historico = self._historico.pop(linha, None)
+        resultado['tentativas'] = tentativa
+        if historico:
+            resultado['historico_tentativas'] = " | ".join(
+                f"{h['tentativa']}: {h['tipo']} - {h['erro']}" for h in historico
+            )
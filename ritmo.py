@@ -0,0 +1,108 @@
+"""
+Ritmo adaptativo entre registros (AIMD)
+
+A pausa fixa entre registros existia porque o portal derruba a sessão com requisição muito rápida,
+mas 1s fixo é devagar demais com o portal folgado e rápido demais quando ele está sofrendo.
+Aqui o limite é uma taxa de registros iniciados por minuto, compartilhada por todos os navegadores:
+
+  - registro saudável: taxa sobe um pouco (aumento aditivo, config.RITMO_INCREMENTO)
+  - falha transitória, registro bem mais lento que a média recente ou sessão derrubada:
+    taxa cai pela metade (recuo multiplicativo, config.RITMO_FATOR_RECUO - duas vezes na sessão)
+
+Falha de interface/dados não mexe na taxa: não diz nada sobre a saúde do portal.
+A taxa vigente vai em cada resultado (coluna ritmo_rpm) e as pausas impostas vão pro medidor
+(aba Desempenho, categoria 'ritmo').
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+import config
+from metricas import MedidorTempos
+from retentativas import TRANSITORIA, classificar_falha
+
+logger = logging.getLogger(__name__)
+
+
+class ControladorRitmo:
+
+    def __init__(self, taxa_inicial: float = None, taxa_minima: float = None, taxa_maxima: float = None,
+                 incremento: float = None, fator_recuo: float = None, limiar_latencia: float = None,
+                 medidor: Optional[MedidorTempos] = None):
+        """
+        Args:
+            taxa_inicial: Registros/min no começo (padrão: config.RITMO_INICIAL)
+            taxa_minima: Piso da taxa (padrão: config.RITMO_MINIMO)
+            taxa_maxima: Teto da taxa (padrão: config.RITMO_MAXIMO)
+            incremento: Registros/min somados a cada registro saudável (padrão: config.RITMO_INCREMENTO)
+            fator_recuo: Multiplicador da taxa em sinal de sofrimento (padrão: config.RITMO_FATOR_RECUO)
+            limiar_latencia: Registro N vezes mais lento que a média recente conta como portal lento
+                (padrão: config.RITMO_LIMIAR_LATENCIA)
+            medidor: Onde registrar as pausas impostas (opcional)
+        """
+        self.taxa_minima = taxa_minima or config.RITMO_MINIMO
+        self.taxa_maxima = taxa_maxima or config.RITMO_MAXIMO
+        self.taxa = min(self.taxa_maxima, max(self.taxa_minima, taxa_inicial or config.RITMO_INICIAL))
+        self.incremento = config.RITMO_INCREMENTO if incremento is None else incremento
+        self.fator_recuo = fator_recuo or config.RITMO_FATOR_RECUO
+        self.limiar_latencia = limiar_latencia or config.RITMO_LIMIAR_LATENCIA
+        self.medidor = medidor
+        self._lock = threading.Lock()
+        self._proximo_inicio = 0.0
+        # Média móvel exponencial da duração dos registros que deram certo
+        self._duracao_media: Optional[float] = None
+        self._amostras = 0
+
+    def aguardar_vez(self) -> float:
+        """
+        Bloqueia até o próximo registro poder começar (reserva o horário - serve pra várias threads)
+
+        Returns:
+            Segundos esperados
+        """
+        with self._lock:
+            agora = time.monotonic()
+            inicio = max(agora, self._proximo_inicio)
+            self._proximo_inicio = inicio + 60.0 / self.taxa
+        espera = inicio - agora
+        if espera > 0:
+            time.sleep(espera)
+        if self.medidor is not None:
+            self.medidor.registrar('ritmo', "pausa entre registros", espera)
+        return espera
+
+    def _recuar(self, motivo: str, vezes: int = 1):
+        anterior = self.taxa
+        self.taxa = max(self.taxa_minima, self.taxa * self.fator_recuo ** vezes)
+        # Recuo vale já pro próximo registro, não só depois do horário que já estava reservado
+        self._proximo_inicio = max(self._proximo_inicio, time.monotonic() + 60.0 / self.taxa)
+        logger.info(f"Ritmo: {anterior:.1f} -> {self.taxa:.1f} registros/min ({motivo})")
+
+    def observar(self, resultado: Dict):
+        """Ajusta a taxa pelo resultado de um registro e anota nele a taxa vigente (ritmo_rpm)"""
+        with self._lock:
+            resultado.setdefault('ritmo_rpm', round(self.taxa, 1))
+            duracao = resultado.get('duracao_s')
+
+            if resultado.get('sessao_expirada'):
+                self._recuar("sessão derrubada", vezes=2)
+                return
+            if resultado.get('status') != 'sucesso':
+                if classificar_falha(resultado) == TRANSITORIA:
+                    self._recuar("falha transitória")
+                return
+
+            if resultado.get('espera_manual'):
+                # Duração inclui o tempo até o usuário apertar ENTER: não é lentidão do portal nem
+                # amostra pra média - conta só como sucesso
+                duracao = None
+            lento = (duracao is not None and self._amostras >= 3
+                     and duracao > self._duracao_media * self.limiar_latencia)
+            if duracao is not None:
+                self._duracao_media = duracao if self._duracao_media is None else \
+                    0.8 * self._duracao_media + 0.2 * duracao
+                self._amostras += 1
+            if lento:
+                self._recuar(f"registro em {duracao:.1f}s, média {self._duracao_media:.1f}s")
+            else:
+                self.taxa = min(self.taxa_maxima, self.taxa + self.incremento)
@@ -0,0 +1,146 @@
+"""
+Servidor stub do SIGEP (homologação) pra testar o backend API sem bater nos Correios
+
+Responde solicitaEtiquetas, geraDigitoVerificadorEtiquetas e fechaPlpVariosServicos com o mesmo
+formato SOAP da homologação. A latência é configurável pra simular o servidor real.
+
+Uso:
+    python stub_api_correios.py --porta 8089 --latencia 0.05
+    set CORREIOS_API_URL=http://localhost:8089
+"""
+import argparse
+import itertools
+import logging
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+from etiquetas import calcular_digito_verificador
+
+logger = logging.getLogger(__name__)
+
+
+def _envelope(conteudo: str) -> bytes:
+    return (
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+        f'{conteudo}</soap:Body></soap:Envelope>'
+    ).encode('utf-8')
+
+
+def _resposta(operacao: str, retornos) -> bytes:
+    corpo = "".join(f"<return>{r}</return>" for r in retornos)
+    return _envelope(f'<ns2:{operacao}Response xmlns:ns2="http://cliente.bean.master.sigep.bsb.correios.com.br/">'
+                     f'{corpo}</ns2:{operacao}Response>')
+
+
+def _falha(mensagem: str) -> bytes:
+    return _envelope(f'<soap:Fault><faultcode>soap:Server</faultcode><faultstring>{mensagem}</faultstring></soap:Fault>')
+
+
+class EstadoStub:
+    """Contadores compartilhados entre as threads do servidor"""
+
+    def __init__(self, latencia: float = 0.0, inicio_etiquetas: int = 76023727):
+        self.latencia = latencia
+        self._etiquetas = itertools.count(inicio_etiquetas)
+        self._plps = itertools.count(4000000)
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+
+    def proximas_etiquetas(self, quantidade: int):
+        with self._lock:
+            return [next(self._etiquetas) for _ in range(quantidade)]
+
+    def proxima_plp(self) -> int:
+        with self._lock:
+            return next(self._plps)
+
+
+class HandlerSigep(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, igual ao servidor real
+    estado: EstadoStub = None
+
+    def log_message(self, formato, *args):
+        logger.debug(formato % args)
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = self.rfile.read(tamanho)
+        with self.estado._lock:
+            self.estado.requisicoes += 1
+        if self.estado.latencia:
+            time.sleep(self.estado.latencia)
+
+        status, resposta = self._processar(corpo)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(resposta)))
+        self.end_headers()
+        self.wfile.write(resposta)
+
+    def _processar(self, corpo: bytes):
+        try:
+            raiz = ET.fromstring(corpo)
+            operacao_el = raiz.find('.//{*}Body')[0]
+        except (ET.ParseError, IndexError, TypeError):
+            return 500, _falha("Requisição inválida")
+
+        operacao = operacao_el.tag.split('}')[-1]
+        params = {}
+        for filho in operacao_el:
+            params.setdefault(filho.tag.split('}')[-1], []).append((filho.text or '').strip())
+
+        if params.get('usuario', [''])[0] != config.API_USUARIO or params.get('senha', [''])[0] != config.API_SENHA:
+            return 500, _falha("Usuário ou senha inválidos")
+
+        if operacao == "solicitaEtiquetas":
+            quantidade = int(params.get('qtdEtiquetas', ['1'])[0])
+            numeros = self.estado.proximas_etiquetas(quantidade)
+            return 200, _resposta(operacao, [f"DL{numeros[0]:08d} BR,DL{numeros[-1]:08d} BR"])
+
+        if operacao == "geraDigitoVerificadorEtiquetas":
+            digitos = []
+            for etiqueta in params.get('etiquetas', []):
+                if not re.fullmatch(r"[A-Z]{2}\d{8} [A-Z]{2}", etiqueta):
+                    return 500, _falha(f"Etiqueta inválida: {etiqueta}")
+                digitos.append(calcular_digito_verificador(etiqueta[2:10]))
+            return 200, _resposta(operacao, digitos)
+
+        if operacao == "fechaPlpVariosServicos":
+            try:
+                xml_plp = ET.fromstring(params.get('xml', [''])[0].encode('iso-8859-1', errors='replace'))
+            except ET.ParseError:
+                return 500, _falha("XML da PLP inválido")
+            if not xml_plp.findtext('.//cep_destinatario'):
+                return 500, _falha("CEP do destinatário não informado")
+            return 200, _resposta(operacao, [self.estado.proxima_plp()])
+
+        return 500, _falha(f"Operação não suportada: {operacao}")
+
+
+def iniciar_stub(porta: int = 8089, latencia: float = 0.0) -> ThreadingHTTPServer:
+    """Sobe o stub numa thread (pra scripts de teste/benchmark). Porta 0 = qualquer porta livre."""
+    handler = type("HandlerSigepStub", (HandlerSigep,), {"estado": EstadoStub(latencia)})
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="stub-sigep", daemon=True).start()
+    logger.info(f"Stub SIGEP em http://127.0.0.1:{servidor.server_address[1]} (latência {latencia}s)")
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub do web service SIGEP (homologação)")
+    parser.add_argument("--porta", type=int, default=8089)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Segundos de atraso por requisição")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT)
+    servidor = iniciar_stub(args.porta, args.latencia)
+    print(f"Stub SIGEP rodando em http://127.0.0.1:{servidor.server_address[1]} - CTRL+C pra parar")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.shutdown()